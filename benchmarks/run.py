@@ -0,0 +1,350 @@
+"""Created on Oct 17, 2026
+
+Benchmark suite of PySyncTeX. Synthetic synctex files (see synthetic.py) are
+generated for each configuration and the following is measured:
+
+    parse       eager and lazy parse time, estimated scanner memory and peak
+                resident memory growth of a process parsing the file
+    buffering   eager parse time and lazy parse time of random sheets with
+                each SyncTeXBuffering, the speedups over fixed buffering
+    display     display_query latency percentiles, without and with line
+                index, line index build time and display_range latency
+                percentiles of 40 line ranges
+    edit        edit_query latency percentiles at points of random nodes
+    traversal   throughput of full tree traversal through SyncTeXNode
+                children, of walk, of records walk and of columnar export
+
+Results are written as JSON, so that runs can be compared. Given baseline
+results of an earlier run, metrics which got slower by more than threshold
+are reported. Exit status is 1 when any of the stable metrics (minimum and
+median times, median latencies) regressed; tail latency percentiles, means
+and memory are too noisy between runs and are reported only.
+
+Usage:
+    python run.py [--pages N ...] [--output RESULTS.json]
+                  [--baseline BASELINE.json [--threshold 0.1]]
+
+Author: Jan Kumor
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import synthetic
+
+from pysynctex import SyncTeXScanner, SyncTeXBuffering
+
+#suffixes of metrics which decide exit status of comparison with baseline
+_GATED = ('/min_s', '/median_s', '/p50_us')
+
+
+def _percentiles(samples) -> dict:
+    """Summarizes latency samples, in microseconds.
+    """
+    samples = sorted(samples)
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+    return {'count': len(samples),
+            'mean_us': statistics.fmean(samples) * 1e6,
+            'p50_us': percentile(0.5) * 1e6,
+            'p90_us': percentile(0.9) * 1e6,
+            'p99_us': percentile(0.99) * 1e6,
+            'max_us': samples[-1] * 1e6}
+
+
+def _best(function, repeat) -> dict:
+    """Times function repeat times, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'min_s': min(times), 'median_s': statistics.median(times)}
+
+
+def _latencies(function, arguments) -> dict:
+    """Times function called with each arguments tuple.
+    """
+    clock = time.perf_counter
+    samples = []
+    for args in arguments:
+        start = clock()
+        function(*args)
+        samples.append(clock() - start)
+    return _percentiles(samples)
+
+
+def _peak_rss() -> int:
+    """Gets peak resident memory of process, in bytes.
+    """
+    #on Linux ru_maxrss is inherited through exec, VmHWM is not
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    #ru_maxrss is in kilobytes, in bytes on macOS
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            * (1 if sys.platform == 'darwin' else 1024))
+
+
+def _parse_peak(output_file, lazy, pipe) -> None:
+    """Child process: parses output file and sends peak resident memory
+    growth, in bytes.
+    """
+    before = _peak_rss()
+    scanner = SyncTeXScanner(output_file, lazy=lazy)
+    if lazy:
+        scanner.edit_query(1, 0, 0)
+    after = _peak_rss()
+    scanner._cleanup()
+    pipe.send(after - before)
+
+
+def _peak_memory(output_file, lazy) -> int:
+    """Measures peak resident memory growth of fresh process parsing output
+    file.
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_parse_peak,
+                              args=(output_file, lazy, sender))
+    process.start()
+    peak = receiver.recv()
+    process.join()
+    return peak
+
+
+def bench_parse(output_file, repeat) -> dict:
+    def eager():
+        SyncTeXScanner(output_file)._cleanup()
+    def lazy():
+        SyncTeXScanner(output_file, lazy=True)._cleanup()
+    with SyncTeXScanner(output_file) as scanner:
+        memory = scanner.memory
+        scanner.node_count
+        indexed_memory = scanner.memory
+    return {'eager': _best(eager, repeat),
+            'lazy': _best(lazy, repeat),
+            'memory_bytes': memory,
+            'memory_with_node_table_bytes': indexed_memory,
+            'peak_rss_eager_bytes': _peak_memory(output_file, False),
+            'peak_rss_lazy_bytes': _peak_memory(output_file, True)}
+
+
+def bench_buffering(output_file, pages, repeat, generator) -> dict:
+    sample = generator.sample(range(1, pages + 1), min(pages, 20))
+    results = {}
+    for buffering in SyncTeXBuffering:
+        def eager():
+            SyncTeXScanner(output_file, buffering=buffering)._cleanup()
+        def lazy():
+            scanner = SyncTeXScanner(output_file, lazy=True,
+                                     buffering=buffering)
+            for page in sample:
+                scanner.edit_query(page, 0, 0)
+            scanner._cleanup()
+        results[buffering.name] = {'eager': _best(eager, repeat),
+                                   'lazy_random_sheets': _best(lazy, repeat)}
+    fixed = results[SyncTeXBuffering.fixed.name]
+    for timings in results.values():
+        for name in ('eager', 'lazy_random_sheets'):
+            timings[name]['speedup'] = (fixed[name]['min_s']
+                                        / timings[name]['min_s'])
+    return results
+
+
+def bench_display(output_file, info, queries, generator) -> dict:
+    tags = [tag for tag, lines in info['input_lines'].items() if lines]
+    arguments = []
+    for _ in range(queries):
+        tag = generator.choice(tags)
+        arguments.append((synthetic.input_name(tag),
+                          generator.randint(1, info['input_lines'][tag]), 0))
+    with SyncTeXScanner(output_file) as scanner:
+        scanner.display_query(*arguments[0])
+        plain = _latencies(scanner.display_query, arguments)
+        start = time.perf_counter()
+        scanner.build_line_index()
+        index = time.perf_counter() - start
+        indexed = _latencies(scanner.display_query, arguments)
+        ranges = _latencies(scanner.display_range,
+                            [(name, line, line + 39)
+                             for name, line, _ in arguments])
+    return {'display_query': plain, 'line_index_build_s': index,
+            'display_query_indexed': indexed, 'display_range': ranges}
+
+
+def bench_edit(output_file, queries, generator) -> dict:
+    with SyncTeXScanner(output_file) as scanner:
+        columns = scanner.export_nodes()
+        pages = columns['page']
+        hs = columns['visible_h']
+        vs = columns['visible_v']
+        indices = [generator.randrange(len(pages)) for _ in range(queries)]
+        arguments = [(pages[i], hs[i], vs[i]) for i in indices]
+        scanner.edit_query(*arguments[0])
+        return {'edit_query': _latencies(scanner.edit_query, arguments)}
+
+
+def bench_traversal(output_file, repeat) -> dict:
+    with SyncTeXScanner(output_file) as scanner:
+        count = scanner.node_count
+        def children():
+            stack = [sheet for sheet in _sheets(scanner)]
+            while stack:
+                stack.extend(stack.pop().children)
+        def walk():
+            for _ in scanner.walk():
+                pass
+        def walk_records():
+            for _ in scanner.walk(records=True):
+                pass
+        def export():
+            scanner.export_nodes()
+        results = {'nodes': count}
+        for name, function in (('children', children), ('walk', walk),
+                               ('walk_records', walk_records),
+                               ('export_nodes', export)):
+            timing = _best(function, repeat)
+            timing['nodes_per_second'] = count / timing['min_s']
+            results[name] = timing
+    return results
+
+
+def _sheets(scanner):
+    """Gets sheet nodes of scanner.
+    """
+    node = scanner.node(0)
+    while node:
+        yield node
+        node = node.sibling
+
+
+def run(configurations, repeat, queries, seed) -> dict:
+    """Runs benchmarks for each configuration.
+
+    Arguments:
+        configurations: List of dictionaries of synthetic.generate keyword
+            arguments.
+        repeat: Number of repetitions of timed operations, the best time
+            is reported.
+        queries: Number of queries of latency measurements.
+        seed: Seed of random generators.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for number, configuration in enumerate(configurations):
+            suffix = '.synctex.gz' if configuration['gzipped'] else '.synctex'
+            base = os.path.join(directory, 'doc{}'.format(number))
+            info = synthetic.generate(base + suffix, seed=seed,
+                                      **configuration)
+            output_file = base + '.pdf'
+            generator = random.Random(seed)
+            result = {'configuration': configuration,
+                      'file_bytes': os.path.getsize(base + suffix),
+                      'records': info['records'],
+                      'parse': bench_parse(output_file, repeat),
+                      'buffering': bench_buffering(
+                          output_file, configuration['pages'], repeat,
+                          generator)}
+            result.update(bench_display(output_file, info, queries,
+                                        generator))
+            result.update(bench_edit(output_file, queries, generator))
+            result['traversal'] = bench_traversal(output_file, repeat)
+            os.remove(base + suffix)
+            results.append(result)
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'machine': platform.machine(),
+                     'cpus': os.cpu_count(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                     'repeat': repeat, 'queries': queries, 'seed': seed},
+            'results': results}
+
+
+def _metrics(results, prefix=''):
+    """Flattens timing metrics of results, lower values are better.
+    """
+    if isinstance(results, dict):
+        for key, value in results.items():
+            yield from _metrics(value, prefix + '/' + str(key))
+    elif isinstance(results, list):
+        for index, value in enumerate(results):
+            yield from _metrics(value, prefix + '/' + str(index))
+    elif prefix.endswith(('_s', '_us', '_bytes')):
+        yield prefix, results
+
+
+def compare(baseline, current, threshold) -> list:
+    """Compares results with baseline results of the same configurations.
+
+    Returns:
+        List of (metric, baseline value, current value, gated) of metrics
+        which got higher by more than threshold fraction, gated being True
+        for metrics deciding exit status (see _GATED).
+    """
+    old = dict(_metrics(baseline['results']))
+    return [(name, old[name], value, name.endswith(_GATED))
+            for name, value in _metrics(current['results'])
+            if name in old and old[name] > 0
+            and value > old[name] * (1 + threshold)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark PySyncTeX.')
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 200],
+                        help='numbers of pages of benchmarked files')
+    parser.add_argument('--lines', type=int, default=40,
+                        help='text lines per page')
+    parser.add_argument('--nodes', type=int, default=20,
+                        help='nodes per text line')
+    parser.add_argument('--inputs', type=int, default=8)
+    parser.add_argument('--formats', nargs='+', default=['gz', 'plain'],
+                        choices=['gz', 'plain'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file (default: stdout)')
+    parser.add_argument('--baseline', help='results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='tolerated slowdown fraction (default: 0.1)')
+    arguments = parser.parse_args(argv)
+    configurations = [{'pages': pages, 'lines': arguments.lines,
+                       'nodes': arguments.nodes, 'inputs': arguments.inputs,
+                       'gzipped': format == 'gz'}
+                      for pages in arguments.pages
+                      for format in arguments.formats]
+    results = run(configurations, arguments.repeat, arguments.queries,
+                  arguments.seed)
+    text = json.dumps(results, indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare(json.load(file), results,
+                                  arguments.threshold)
+        for name, old, new, gated in regressions:
+            label = 'REGRESSION' if gated else 'slower'
+            print('{} {}: {:.6g} -> {:.6g}'.format(label, name, old, new),
+                  file=sys.stderr)
+        return 1 if any(gated for *_, gated in regressions) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Created on Oct 17, 2026
+
+This module contains generator of synthetic synctex files of configurable
+size, shaped like TeX output: each page is a vertical box of text lines, each
+line a horizontal box of glyph boundaries, kerns, glues and math nodes, with
+occasional void boxes and nested vertical boxes. Input files are laid out one
+after another through the document, each output line coming from next line of
+current input file.
+
+Usage:
+    python synthetic.py OUTPUT.synctex.gz [--pages N] [--lines N] ...
+
+Author: Jan Kumor
+"""
+import argparse
+import gzip
+import random
+
+#TeX scaled points per point
+_SP = 65536
+_PAGE_WIDTH = 612 * _SP
+_PAGE_HEIGHT = 792 * _SP
+_LEFT = 72 * _SP
+_TOP = 72 * _SP
+_TEXT_WIDTH = 468 * _SP
+_BASELINE_SKIP = 12 * _SP
+_HEIGHT = 7 * _SP
+_DEPTH = 2 * _SP
+
+
+def input_name(tag) -> str:
+    """Gets name of synthetic input file with given tag, as written in
+    synctex files made by generate.
+    """
+    return 'input{}.tex'.format(tag)
+
+
+def generate(path, pages=100, lines=40, nodes=20, inputs=8, gzipped=True,
+             seed=0) -> dict:
+    """Writes synthetic synctex file.
+
+    Arguments:
+        path: Path of synctex file, it should end with '.synctex.gz' when
+            gzipped, with '.synctex' otherwise.
+        pages: Number of pages.
+        lines: Number of text lines (horizontal boxes) per page.
+        nodes: Number of nodes per text line.
+        inputs: Number of input files.
+        gzipped: Whether file is gzip compressed.
+        seed: Seed of random generator, equal arguments give equal files.
+
+    Returns:
+        Dictionary with numbers of records (nodes) and of lines written for
+        each input tag.
+    """
+    generator = random.Random(seed)
+    opener = gzip.open if gzipped else open
+    records = 0
+    input_lines = dict.fromkeys(range(1, inputs + 1), 0)
+    total_lines = pages * lines
+    with opener(path, 'wt', encoding='ascii', newline='\n') as file:
+        header = ['SyncTeX Version:1']
+        header.extend('Input:{}:/synthetic/./{}'.format(tag, input_name(tag))
+                      for tag in input_lines)
+        header.extend(['Output:pdf', 'Magnification:1000', 'Unit:1',
+                       'X Offset:0', 'Y Offset:0', 'Content:'])
+        file.write('\n'.join(header) + '\n')
+        for page in range(1, pages + 1):
+            out = ['{{{}'.format(page)]
+            tag = 1 + (page - 1) * inputs // pages
+            out.append('[{},1:{},{}:{},{},0'.format(
+                tag, _LEFT, _TOP + lines * _BASELINE_SKIP, _TEXT_WIDTH,
+                lines * _BASELINE_SKIP))
+            records += 1
+            for index in range(lines):
+                number = ((page - 1) * lines + index)
+                tag = 1 + number * inputs // total_lines
+                input_lines[tag] += 1
+                line = input_lines[tag]
+                v = _TOP + (index + 1) * _BASELINE_SKIP
+                if index and not index % 10:
+                    #paragraph skip, a nested vertical list
+                    out.append('v{},{}:{},{}:{},{},0'.format(
+                        tag, line, _LEFT, v - _HEIGHT, _TEXT_WIDTH, _SP))
+                    out.append('[{},{}:{},{}:{},{},0'.format(
+                        tag, line, _LEFT, v, _TEXT_WIDTH, _BASELINE_SKIP))
+                    out.append(']')
+                    records += 2
+                out.append('({},{}:{},{}:{},{},{}'.format(
+                    tag, line, _LEFT, v, _TEXT_WIDTH, _HEIGHT, _DEPTH))
+                records += 1
+                if not index % 7:
+                    out.append('h{},{}:{},{}:{},{},0'.format(
+                        tag, line, _LEFT, v, 15 * _SP, _HEIGHT))
+                    records += 1
+                h = _LEFT
+                step = _TEXT_WIDTH // (nodes + 1)
+                for _ in range(nodes):
+                    h += generator.randint(step // 2, step)
+                    kind = generator.random()
+                    if kind < 0.55:
+                        out.append('x{},{}:{},{}'.format(tag, line, h, v))
+                    elif kind < 0.8:
+                        out.append('k{},{}:{},{}:{}'.format(
+                            tag, line, h, v, generator.randint(_SP, 3 * _SP)))
+                    elif kind < 0.97:
+                        out.append('g{},{}:{},{}'.format(tag, line, h, v))
+                    else:
+                        out.append('${},{}:{},{}'.format(tag, line, h, v))
+                records += nodes
+                out.append(')')
+            out.append(']')
+            out.append('}}{}'.format(page))
+            text = '\n'.join(out) + '\n'
+            file.write('!{}\n'.format(len(text)))
+            file.write(text)
+        file.write('Postamble:\nCount:{}\nPost scriptum:\n'.format(records))
+    return {'records': records, 'input_lines': input_lines}
+
+
+def page_size() -> tuple:
+    """Gets (width, height) of synthetic pages in TeX scaled points.
+    """
+    return _PAGE_WIDTH, _PAGE_HEIGHT
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic synctex file.')
+    parser.add_argument('path', help='path of synctex file')
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--lines', type=int, default=40,
+                        help='text lines per page')
+    parser.add_argument('--nodes', type=int, default=20,
+                        help='nodes per text line')
+    parser.add_argument('--inputs', type=int, default=8)
+    parser.add_argument('--plain', action='store_true',
+                        help='write uncompressed file')
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+    print(generate(arguments.path, arguments.pages, arguments.lines,
+                   arguments.nodes, arguments.inputs, not arguments.plain,
+                   arguments.seed)['records'])
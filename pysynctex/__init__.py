@@ -1,5 +1,10 @@
 """Main PySyncTeX package.
 """
-from pysynctex.pysynctex import SyncTeXScanner, SyncTeXNode, SyncTeXNodeType
-
-
+from pysynctex.pysynctex import SyncTeXScanner, SyncTeXNode, SyncTeXNodeType, \
+    SyncTeXNodeColumns, SyncTeXBuffering, SyncTeXNodeRecord, SyncTeXError, \
+    parse_many
+from pysynctex.spatial import SyncTeXSpatialIndex
+from pysynctex.cache import SyncTeXCache
+from pysynctex.aio import AsyncSyncTeXScanner
+from pysynctex.pool import SyncTeXScannerPool
+from pysynctex.updater import SyncTeXUpdater, update_many
@@ -0,0 +1,42 @@
+"""Created on Oct 17, 2026
+
+Command line interface of PySyncTeX.
+
+    pysynctex serve SOCKET [--workers N] [--cache-directory DIRECTORY]
+                           [--max-scanners N] [--max-memory BYTES]
+
+runs SyncTeXServer listening on Unix domain socket SOCKET until it is
+interrupted or terminated.
+
+Author: Jan Kumor
+"""
+import argparse
+
+from .server import SyncTeXServer
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog='pysynctex')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser(
+        'serve', help='serve display and edit queries on Unix domain socket')
+    serve.add_argument('socket', help='path of Unix domain socket')
+    serve.add_argument('--workers', type=int, default=None,
+                       help='number of worker processes (default: CPUs)')
+    serve.add_argument('--cache-directory', default=None,
+                       help='directory of shared snapshots (default: next '
+                       'to synctex files)')
+    serve.add_argument('--max-scanners', type=int, default=None,
+                       help='maximum number of open scanners per worker')
+    serve.add_argument('--max-memory', type=int, default=None,
+                       help='maximum estimated memory of open scanners per '
+                       'worker, in bytes')
+    arguments = parser.parse_args(argv)
+    if arguments.command == 'serve':
+        SyncTeXServer(arguments.socket, arguments.workers,
+                      arguments.cache_directory, arguments.max_scanners,
+                      arguments.max_memory).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
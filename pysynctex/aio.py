@@ -0,0 +1,260 @@
+"""Created on Oct 17, 2026
+
+This module contains asyncio front end of SyncTeXScanner, which allows to open,
+parse and query scanners inside event loop without blocking it.
+
+Native work is run in executor. Parsing and queries release the GIL in
+synctex_parser library, so event loop keeps serving other coroutines
+meanwhile.
+
+Author: Jan Kumor
+"""
+import asyncio
+import functools
+import os
+
+from .pysynctex import SyncTeXError, SyncTeXScanner
+
+
+class _SharedScanner(object):
+    """SyncTeXScanner shared by AsyncSyncTeXScanner objects which opened the
+    same document concurrently. It is freed when the last of them is closed
+    and its pending calls are done.
+    """
+
+    __slots__ = ('scanner', 'users', 'pending')
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.users = 0
+        self.pending = set()
+
+    def done(self, future) -> None:
+        """Forgets finished call, freeing scanner when it was the last one
+        of closed scanner.
+        """
+        self.pending.discard(future)
+        if not future.cancelled():
+            #exceptions of cancelled awaits are never retrieved otherwise
+            future.exception()
+        self.release()
+
+    def release(self) -> None:
+        """Frees scanner when it has no user and no pending call.
+        """
+        if not self.users and not self.pending:
+            self.scanner._cleanup()
+
+
+class AsyncSyncTeXScanner(object):
+    """Asyncio front end of SyncTeXScanner.
+
+    Opening, parsing and queries are awaitable and run in executor, event
+    loop's default one when no executor is given. Concurrent opens of the
+    same document with the same arguments share single parse and single
+    SyncTeXScanner, which is freed when all AsyncSyncTeXScanner objects using
+    it are closed.
+
+    Like SyncTeXScanner, AsyncSyncTeXScanner is asynchronous context manager
+    which makes it compatible with 'async with' Python statement. Entering
+    context opens scanner, leaving it closes scanner. Internal C object is
+    freed once calls still running in executor are done.
+    """
+
+    #opens in progress: [task, number of waiters] by loop and document
+    _opening = {}
+
+    def __init__(self, output_file, build_directory=None, pars=1, cache=None,
+                 lazy=False, executor=None):
+        """Inits AsyncSyncTeXScanner. Scanner is created by open, with the
+        same arguments as SyncTeXScanner.
+
+        Arguments:
+            executor: concurrent.futures.Executor running native work, event
+                loop's default one when None.
+        """
+        self.output_file = output_file
+        self.build_directory = build_directory
+        self.pars = pars
+        self.cache = cache
+        self.lazy = lazy
+        self._executor = executor
+        self._shared = None
+
+    def __str__(self):
+        return super().__str__()[:-1] + "; file: '" + self.output_file + "'>"
+
+    #Asynchronous context manager magic methods __aenter__ and __aexit__
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, traceback):
+        """We must release inner SyncTeXScanner.
+        """
+        await self.close()
+
+    @property
+    def scanner(self) -> SyncTeXScanner:
+        """Gets underlying SyncTeXScanner, None when scanner is not open.
+        Its methods block event loop.
+        """
+        return self._shared.scanner if self._shared is not None else None
+
+    async def open(self) -> 'AsyncSyncTeXScanner':
+        """Creates underlying SyncTeXScanner in executor, or joins open of
+        the same document already in progress. Opening open scanner does
+        nothing.
+
+        Returns:
+            This AsyncSyncTeXScanner.
+
+        Raises:
+            SyncTeXError when synctex file can not be opened or parsed.
+        """
+        if self._shared is not None:
+            return self
+        loop = asyncio.get_running_loop()
+        key = (loop, os.path.abspath(self.output_file), self.build_directory,
+               self.pars, self.cache, self.lazy)
+        opening = self._opening.get(key)
+        if opening is None:
+            opening = [loop.create_task(self._open(loop)), 0]
+            self._opening[key] = opening
+            opening[0].add_done_callback(
+                functools.partial(self._opened, key, opening))
+        opening[1] += 1
+        try:
+            shared = await asyncio.shield(opening[0])
+        except asyncio.CancelledError:
+            opening[1] -= 1
+            self._abandon(opening)
+            raise
+        shared.users += 1
+        self._shared = shared
+        return self
+
+    async def _open(self, loop) -> _SharedScanner:
+        """Creates SyncTeXScanner in executor.
+        """
+        scanner = await loop.run_in_executor(self._executor, functools.partial(
+            SyncTeXScanner, self.output_file, self.build_directory, self.pars,
+            self.cache, self.lazy))
+        if not scanner._scanner:
+            raise SyncTeXError('{}: There was a problem while opening file.'
+                               .format(scanner))
+        return _SharedScanner(scanner)
+
+    @classmethod
+    def _opened(cls, key, opening, task) -> None:
+        """Ends open in progress.
+        """
+        del cls._opening[key]
+        cls._abandon(opening)
+
+    @staticmethod
+    def _abandon(opening) -> None:
+        """Frees scanner opened for waiters which were all cancelled.
+        """
+        task = opening[0]
+        if opening[1] or not task.done() or task.cancelled():
+            return
+        if task.exception() is None:
+            task.result().release()
+
+    async def close(self) -> None:
+        """Releases underlying SyncTeXScanner. It is freed when no other
+        AsyncSyncTeXScanner uses it, once its calls running in executor are
+        done. Closing closed scanner does nothing.
+        """
+        shared, self._shared = self._shared, None
+        if shared is not None:
+            shared.users -= 1
+            shared.release()
+
+    async def _run(self, name, *args):
+        """Calls method of underlying SyncTeXScanner in executor. Call is
+        not interrupted when awaiting it is cancelled.
+
+        Raises:
+            SyncTeXError when scanner is not open.
+        """
+        shared = self._shared
+        if shared is None:
+            raise SyncTeXError('{}: Scanner is not open.'.format(self))
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            functools.partial(getattr(shared.scanner, name), *args))
+        shared.pending.add(future)
+        future.add_done_callback(shared.done)
+        return await asyncio.shield(future)
+
+    #Wrappers
+    async def parse(self) -> None:
+        """Awaitable SyncTeXScanner.parse.
+        """
+        return await self._run('parse')
+
+    async def parse_lazily(self) -> None:
+        """Awaitable SyncTeXScanner.parse_lazily.
+        """
+        return await self._run('parse_lazily')
+
+    async def parse_sheets(self) -> None:
+        """Awaitable SyncTeXScanner.parse_sheets.
+        """
+        return await self._run('parse_sheets')
+
+    async def refresh(self) -> int:
+        """Awaitable SyncTeXScanner.refresh. It runs in executor like
+        queries of other coroutines on the same scanner: lock of scanner
+        makes it wait for running queries, and queries wait for it.
+        """
+        return await self._run('refresh')
+
+    async def display_query(self, file_name, line, column) -> list:
+        """Awaitable SyncTeXScanner.display_query.
+        """
+        return await self._run('display_query', file_name, line, column)
+
+    async def display_query_records(self, file_name, line, column) -> list:
+        """Awaitable SyncTeXScanner.display_query_records.
+        """
+        return await self._run('display_query_records', file_name, line,
+                               column)
+
+    async def display_query_many(self, queries) -> list:
+        """Awaitable SyncTeXScanner.display_query_many. Queries are run in
+        single executor call.
+        """
+        return await self._run('display_query_many', list(queries))
+
+    async def edit_query(self, page, h, v) -> list:
+        """Awaitable SyncTeXScanner.edit_query.
+        """
+        return await self._run('edit_query', page, h, v)
+
+    async def edit_query_records(self, page, h, v) -> list:
+        """Awaitable SyncTeXScanner.edit_query_records.
+        """
+        return await self._run('edit_query_records', page, h, v)
+
+    async def edit_query_many(self, points) -> list:
+        """Awaitable SyncTeXScanner.edit_query_many. Queries are run in
+        single executor call.
+        """
+        return await self._run('edit_query_many', list(points))
+
+    async def build_line_index(self) -> int:
+        """Awaitable SyncTeXScanner.build_line_index.
+        """
+        return await self._run('build_line_index')
+
+    async def build_spatial_index(self):
+        """Awaitable SyncTeXScanner.build_spatial_index.
+        """
+        return await self._run('build_spatial_index')
+
+    async def snapshot(self) -> bytearray:
+        """Awaitable SyncTeXScanner.snapshot.
+        """
+        return await self._run('snapshot')
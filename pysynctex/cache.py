@@ -0,0 +1,246 @@
+"""Created on Oct 17, 2026
+
+This module contains persistent cache of scanner snapshots, which allows to
+open a document without inflating and parsing its synctex file again.
+
+Cache entries are snapshots made by synctex_scanner_snapshot function from
+synctex_parser library, preceded by key of synctex file they were made from:
+its path, size, modification time and content digest. Entries are stored next
+to synctex files or in cache directory. Snapshots start at page boundary, so
+that entries can be memory mapped and shared by processes opening the same
+document.
+
+Author: Jan Kumor
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+#magic, synctex size, synctex mtime in ns, synctex digest, path length
+_HEADER = struct.Struct('<8sQq16sI')
+_MAGIC = b'PySTeX\x00\x01'
+#snapshots are page aligned in entries, so that they can be mapped in place
+_ALIGNMENT = mmap.ALLOCATIONGRANULARITY
+_CHUNK_SIZE = 1 << 20
+
+
+def _digest(path) -> bytes:
+    """Computes content digest of file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class SyncTeXCache(object):
+    """Persistent cache of parsed scanners.
+
+    Entries are keyed by path, size, modification time and content digest of
+    synctex file. Entry with the same size and modification time is up to
+    date, entry with other modification time is up to date when content
+    digest did not change. Stale entries are evicted when found.
+
+    Snapshots are bound to the build of synctex_parser library which made
+    them, entries made by other builds are evicted too.
+
+    By default entries are memory mapped (see SyncTeXScanner.map): scanners
+    read their nodes in place and processes opening the same document share
+    them. Entries are never modified in place, except for their header.
+    """
+
+    SUFFIX = '.pysynctex'
+
+    def __init__(self, directory=None, mapped=True):
+        """Inits SyncTeXCache.
+
+        Arguments:
+            directory: Directory of cache entries. When None entries are
+                stored next to synctex files.
+            mapped: Whether entries are memory mapped, or read and copied.
+        """
+        self.directory = directory
+        self.mapped = mapped
+
+    def __str__(self):
+        return (super().__str__()[:-1] + "; directory: '"
+                + str(self.directory) + "'>")
+
+    def path(self, synctex) -> str:
+        """Gets path of cache entry of synctex file.
+        """
+        synctex = os.path.abspath(synctex)
+        if self.directory is None:
+            return synctex + self.SUFFIX
+        name = hashlib.blake2b(os.fsencode(synctex), digest_size=16)
+        return os.path.join(self.directory, name.hexdigest() + self.SUFFIX)
+
+    def open(self, scanner) -> bool:
+        """Loads unparsed scanner from cache entry of its synctex file. When
+        there is no up to date entry scanner is parsed and its snapshot is
+        stored.
+
+        Arguments:
+            scanner: SyncTeXScanner created with pars=0.
+
+        Returns:
+            True when scanner was loaded from cache, False when it was parsed.
+
+        Raises:
+            SyncTeXError when parsing fails.
+        """
+        synctex = os.path.abspath(scanner.synctex)
+        if self._load(scanner, synctex):
+            return True
+        try:
+            stat = os.stat(synctex)
+        except OSError:
+            stat = None
+        scanner.parse()
+        if stat is not None:
+            self._store(scanner, synctex, stat)
+        return False
+
+    def evict(self, synctex) -> bool:
+        """Removes cache entry of synctex file.
+
+        Returns:
+            True when entry was removed, False when there was no entry.
+        """
+        try:
+            os.remove(self.path(synctex))
+        except OSError:
+            return False
+        return True
+
+    def prune(self) -> int:
+        """Removes stale entries from cache directory: entries of synctex
+        files which changed or do not exist anymore. Entries stored next to
+        synctex files are only evicted when found stale by open.
+
+        Returns:
+            Number of removed entries.
+        """
+        if self.directory is None:
+            return 0
+        count = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as file:
+                    entry = self._read_header(file.read(_CHUNK_SIZE))
+            except OSError:
+                continue
+            if entry is None or not self._is_fresh(path, entry):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                count += 1
+        return count
+
+    def _load(self, scanner, synctex) -> bool:
+        """Loads scanner from up to date cache entry, evicting stale one.
+        """
+        path = self.path(synctex)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read(_CHUNK_SIZE)
+                entry = self._read_header(data)
+                if (entry is not None and not self.mapped
+                        and len(data) == _CHUNK_SIZE):
+                    data += file.read()
+        except OSError:
+            return False
+        if (entry is None or entry[0] != synctex
+                or not self._is_fresh(path, entry)):
+            self.evict(synctex)
+            return False
+        if self.mapped:
+            loaded = scanner.map(path, entry[-1])
+        else:
+            loaded = scanner.load(memoryview(data)[entry[-1]:])
+        if not loaded:
+            self.evict(synctex)
+        return loaded
+
+    def _is_fresh(self, path, entry) -> bool:
+        """Checks whether entry is up to date with its synctex file. When only
+        modification time changed entry's header is updated.
+        """
+        synctex, size, mtime, digest, offset = entry
+        try:
+            stat = os.stat(synctex)
+            if stat.st_size != size:
+                return False
+            if stat.st_mtime_ns == mtime:
+                return True
+            if _digest(synctex) != digest:
+                return False
+            with open(path, 'r+b') as file:
+                file.write(self._header(synctex, stat, digest))
+        except OSError:
+            return False
+        return True
+
+    def _store(self, scanner, synctex, stat) -> None:
+        """Stores snapshot of scanner parsed from synctex file with given
+        stat. Nothing is stored when synctex file changed meanwhile or cache
+        can not be written, cache is only an optimization.
+        """
+        try:
+            digest = _digest(synctex)
+            current = os.stat(synctex)
+            snapshot = scanner.snapshot()
+        except (OSError, RuntimeError):
+            return
+        if ((current.st_size, current.st_mtime_ns)
+                != (stat.st_size, stat.st_mtime_ns)):
+            return
+        path = self.path(synctex)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(suffix=self.SUFFIX + '.tmp',
+                                                 dir=directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                file.write(self._header(synctex, stat, digest))
+                file.write(snapshot)
+            os.replace(temporary, path)
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def _header(self, synctex, stat, digest) -> bytes:
+        """Makes header of cache entry, padded to snapshot alignment.
+        """
+        name = os.fsencode(synctex)
+        header = _HEADER.pack(_MAGIC, stat.st_size, stat.st_mtime_ns, digest,
+                              len(name)) + name
+        return header + bytes(-len(header) % _ALIGNMENT)
+
+    def _read_header(self, data):
+        """Reads header of cache entry.
+
+        Returns:
+            Tuple of synctex path, size, modification time, digest and offset
+            of snapshot in entry, or None when data is not cache entry.
+        """
+        if len(data) < _HEADER.size:
+            return None
+        magic, size, mtime, digest, length = _HEADER.unpack_from(data)
+        end = _HEADER.size + length
+        if magic != _MAGIC or len(data) < end:
+            return None
+        synctex = os.fsdecode(bytes(data[_HEADER.size:end]))
+        return synctex, size, mtime, digest, end + (-end % _ALIGNMENT)
@@ -0,0 +1,268 @@
+"""Created on Oct 17, 2026
+
+This module contains pool of parsed scanners shared by requests about many
+documents, which keeps recently used scanners open within bounds of number of
+scanners and estimated memory.
+
+Author: Jan Kumor
+"""
+import collections
+import concurrent.futures
+import contextlib
+import os
+import threading
+
+from .pysynctex import SyncTeXError, SyncTeXScanner
+
+
+class _SyncTeXPoolEntry(object):
+    """Scanner of pool with its synctex file state and users.
+    """
+
+    __slots__ = ('key', 'scanner', 'stat', 'memory', 'users', 'evicted')
+
+    def __init__(self, key, scanner, stat):
+        self.key = key
+        self.scanner = scanner
+        self.stat = stat
+        self.memory = scanner.memory
+        self.users = 0
+        self.evicted = False
+
+    def is_stale(self) -> bool:
+        """Checks whether synctex file changed since scanner was parsed.
+        """
+        try:
+            stat = os.stat(self.scanner.synctex)
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != self.stat
+
+
+class SyncTeXScannerPool(object):
+    """Pool of parsed scanners keyed by output file and build directory.
+
+    Scanners are acquired from pool and released back to it, scanner is
+    opened by the first acquire of its document and shared by the next ones.
+    Concurrent acquires of document being opened wait for single parse. Pool
+    is thread safe, acquired scanners are safe to query from many threads.
+
+    Scanner whose synctex file modification time or size changed is replaced
+    by new one at next acquire. Least recently used scanners are evicted when
+    there are more than max_scanners of them or when their estimated memory
+    (see SyncTeXScanner.memory) exceeds max_memory, the most recently used
+    one is always kept. Evicted scanners are freed as soon as they are not
+    acquired anymore.
+
+    Pool counts hits, misses (acquires which opened scanner), evictions and
+    invalidations (scanners replaced because their synctex file changed).
+
+    To avoid manual freeing of scanners SyncTeXScannerPool is implemented as
+    context manager. Leaving context clears the pool.
+    """
+
+    def __init__(self, max_scanners=None, max_memory=None, cache=None,
+                 lazy=False):
+        """Inits SyncTeXScannerPool.
+
+        Arguments:
+            max_scanners: Maximum number of open scanners, unbounded when
+                None.
+            max_memory: Maximum estimated memory of open scanners in bytes,
+                unbounded when None.
+            cache: SyncTeXCache scanners are loaded from, as in
+                SyncTeXScanner.
+            lazy: Whether scanners are parsed lazily, as in SyncTeXScanner.
+        """
+        self.max_scanners = max_scanners
+        self.max_memory = max_memory
+        self.cache = cache
+        self.lazy = lazy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = collections.OrderedDict()
+        self._opening = {}
+        self._acquired = {}
+        self._memory = 0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return (super().__str__()[:-1]
+                + "; scanners: {}; hits: {}; misses: {}; evictions: {}>"
+                .format(len(self), self.hits, self.misses, self.evictions))
+
+    def __len__(self):
+        return len(self._entries)
+
+    #Context manager magic methods __enter__ and __exit__
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        """We must free scanners.
+        """
+        self.clear()
+
+    @property
+    def memory(self) -> int:
+        """Gets estimated memory of open scanners, in bytes, as of their last
+        release.
+        """
+        return self._memory
+
+    def acquire(self, output_file, build_directory=None) -> SyncTeXScanner:
+        """Gets parsed scanner of output file from pool, opening it when
+        there is no up to date one. Scanner must be released (see release)
+        when it is not used anymore.
+
+        Arguments:
+            output_file: Name of output file, as for SyncTeXScanner.
+            build_directory: Build directory, as for SyncTeXScanner.
+
+        Returns:
+            Parsed SyncTeXScanner owned by pool.
+
+        Raises:
+            SyncTeXError when synctex file can not be opened or parsed.
+        """
+        key = (os.path.abspath(output_file), build_directory)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.is_stale():
+                    self.invalidations += 1
+                    self._remove(entry)
+                    entry = None
+                if entry is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._lease(entry)
+                opening = self._opening.get(key)
+                if opening is None:
+                    opening = concurrent.futures.Future()
+                    self._opening[key] = opening
+                    self.misses += 1
+                    break
+            #scanner is being opened by other thread
+            opening.result()
+        try:
+            entry = self._open(key, output_file, build_directory)
+        except BaseException as error:
+            with self._lock:
+                del self._opening[key]
+            opening.set_exception(error)
+            raise
+        with self._lock:
+            del self._opening[key]
+            self._entries[key] = entry
+            self._memory += entry.memory
+            scanner = self._lease(entry)
+            self._shrink()
+        opening.set_result(None)
+        return scanner
+
+    def release(self, scanner) -> None:
+        """Gives scanner acquired from pool back. Scanner is freed when it
+        was evicted meanwhile and it is not acquired anymore. Its estimated
+        memory is updated otherwise, lazily parsed scanners and their
+        indexes grow while they are queried.
+        """
+        with self._lock:
+            entry = self._acquired[id(scanner)]
+            entry.users -= 1
+            if not entry.users:
+                del self._acquired[id(scanner)]
+                if entry.evicted:
+                    entry.scanner._cleanup()
+            if entry.evicted:
+                return
+            memory = scanner.memory
+            self._memory += memory - entry.memory
+            entry.memory = memory
+            self._shrink()
+
+    @contextlib.contextmanager
+    def scanner(self, output_file, build_directory=None):
+        """Context manager which acquires scanner of output file from pool
+        (see acquire) and releases it when context is left.
+        """
+        scanner = self.acquire(output_file, build_directory)
+        try:
+            yield scanner
+        finally:
+            self.release(scanner)
+
+    def evict(self, output_file, build_directory=None) -> bool:
+        """Removes scanner of output file from pool.
+
+        Returns:
+            True when scanner was removed, False when there was no scanner.
+        """
+        with self._lock:
+            entry = self._entries.get((os.path.abspath(output_file),
+                                       build_directory))
+            if entry is None:
+                return False
+            self.evictions += 1
+            self._remove(entry)
+        return True
+
+    def clear(self) -> None:
+        """Removes all scanners from pool. Scanners which are still acquired
+        are freed when they are released.
+        """
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._remove(entry)
+
+    def _open(self, key, output_file, build_directory) -> _SyncTeXPoolEntry:
+        """Opens scanner of output file.
+        """
+        scanner = SyncTeXScanner(output_file, build_directory, 0)
+        if not scanner._scanner:
+            raise SyncTeXError('{}: There was a problem while opening file.'
+                               .format(scanner))
+        try:
+            #stat taken before parsing, changes made meanwhile are detected
+            stat = os.stat(scanner.synctex)
+            if self.cache is not None:
+                self.cache.open(scanner)
+            elif self.lazy:
+                scanner.parse_lazily()
+            else:
+                scanner.parse()
+        except BaseException:
+            scanner._cleanup()
+            raise
+        return _SyncTeXPoolEntry(key, scanner,
+                                 (stat.st_mtime_ns, stat.st_size))
+
+    def _lease(self, entry) -> SyncTeXScanner:
+        """Marks scanner of entry as acquired once more.
+        """
+        entry.users += 1
+        self._acquired[id(entry.scanner)] = entry
+        return entry.scanner
+
+    def _shrink(self) -> None:
+        """Evicts least recently used scanners while pool exceeds its bounds.
+        """
+        while len(self._entries) > 1 and (
+                (self.max_scanners is not None
+                 and len(self._entries) > self.max_scanners)
+                or (self.max_memory is not None
+                    and self._memory > self.max_memory)):
+            self.evictions += 1
+            self._remove(next(iter(self._entries.values())))
+
+    def _remove(self, entry) -> None:
+        """Removes entry from pool, freeing its scanner unless it is
+        acquired.
+        """
+        del self._entries[entry.key]
+        self._memory -= entry.memory
+        entry.evicted = True
+        if not entry.users:
+            entry.scanner._cleanup()
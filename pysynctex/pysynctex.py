@@ -11,11 +11,22 @@ contain verbose commentary which covers library use cases).
 
 Author: Jan Kumor
 """
+import array
+import bisect
+import collections
+import concurrent.futures
+import contextlib
 import enum
+import functools
+import os
+import struct
+import threading
+import time
 
 from . import _synctex_parser as _sp
 
 from .dochelpers import adddoc, wrapdoc 
+from .spatial import SyncTeXSpatialIndex
 
 _C_STDOUT_NOTE = """IMPORTANT NOTE: This function targets debugging and 
         development purposes. It uses C level stdout functions which are not
@@ -29,6 +40,87 @@ _PAGE_COORD_DOC = """Expressed in page coordinates, with origin at
         the top left corner."""
 
 
+_FIELD_SIZE = 4
+
+#initial capacity of query result buffers, queries rarely return more nodes
+_RESULTS_CAPACITY = 16
+
+#default number of nodes selected by each synctex_scanner_select call of walks
+_WALK_CHUNK_SIZE = 1024
+
+#(name, synctex_field_t value, typecode) of columns exported by scanner
+_NODE_FIELDS = (
+    ('type', _sp.synctex_field_type, 'i'),
+    ('tag', _sp.synctex_field_tag, 'i'),
+    ('line', _sp.synctex_field_line, 'i'),
+    ('column', _sp.synctex_field_column, 'i'),
+    ('page', _sp.synctex_field_page, 'i'),
+    ('parent', _sp.synctex_field_parent, 'i'),
+    ('h', _sp.synctex_field_h, 'i'),
+    ('v', _sp.synctex_field_v, 'i'),
+    ('width', _sp.synctex_field_width, 'i'),
+    ('height', _sp.synctex_field_height, 'i'),
+    ('depth', _sp.synctex_field_depth, 'i'),
+    ('box_h', _sp.synctex_field_box_h, 'i'),
+    ('box_v', _sp.synctex_field_box_v, 'i'),
+    ('box_width', _sp.synctex_field_box_width, 'i'),
+    ('box_height', _sp.synctex_field_box_height, 'i'),
+    ('box_depth', _sp.synctex_field_box_depth, 'i'),
+    ('mean_line', _sp.synctex_field_mean_line, 'i'),
+    ('child_count', _sp.synctex_field_child_count, 'i'),
+    ('horiz_v', _sp.synctex_field_horiz_v, 'i'),
+    ('vert_v', _sp.synctex_field_vert_v, 'i'),
+    ('width_v', _sp.synctex_field_width_v, 'i'),
+    ('height_v', _sp.synctex_field_height_v, 'i'),
+    ('depth_v', _sp.synctex_field_depth_v, 'i'),
+    ('visible_h', _sp.synctex_field_visible_h, 'f'),
+    ('visible_v', _sp.synctex_field_visible_v, 'f'),
+    ('visible_width', _sp.synctex_field_visible_width, 'f'),
+    ('box_visible_h', _sp.synctex_field_box_visible_h, 'f'),
+    ('box_visible_v', _sp.synctex_field_box_visible_v, 'f'),
+    ('box_visible_width', _sp.synctex_field_box_visible_width, 'f'),
+    ('box_visible_height', _sp.synctex_field_box_visible_height, 'f'),
+    ('box_visible_depth', _sp.synctex_field_box_visible_depth, 'f'),
+    )
+
+#row of all fields of a node, as filled by synctex_node_export
+_RECORD = struct.Struct(''.join(typecode for _, _, typecode in _NODE_FIELDS))
+#row of page and rectangle, as filled by synctex_display_range
+_PAGE_RECTANGLE = struct.Struct('i4f')
+#(name, synctex_stat_t value) of scanner counters, node counters excluded
+_STATS = (
+    ('bytes_read', _sp.synctex_stat_bytes_read),
+    ('read_ns', _sp.synctex_stat_read_ns),
+    ('parse_ns', _sp.synctex_stat_parse_ns),
+    ('sheets_parsed', _sp.synctex_stat_sheets_parsed),
+    ('display_queries', _sp.synctex_stat_display_queries),
+    ('display_ns', _sp.synctex_stat_display_ns),
+    ('display_friends', _sp.synctex_stat_display_friends),
+    ('display_friends_max', _sp.synctex_stat_display_friends_max),
+    ('edit_queries', _sp.synctex_stat_edit_queries),
+    ('edit_ns', _sp.synctex_stat_edit_ns),
+    ('edit_boxes', _sp.synctex_stat_edit_boxes),
+    ('edit_boxes_max', _sp.synctex_stat_edit_boxes_max),
+    )
+#(name, synctex_friend_stat_t value) of figures of friend lists
+_FRIEND_STATS = (
+    ('lists', _sp.synctex_friend_stat_lists),
+    ('friends', _sp.synctex_friend_stat_friends),
+    ('used_lists', _sp.synctex_friend_stat_used_lists),
+    ('longest_list', _sp.synctex_friend_stat_longest_list),
+    )
+#node types whose rectangles are given by default by page_rectangles
+_BOX_TYPES = ('hbox', 'void_hbox', 'vbox', 'void_vbox')
+#operations of current thread being reported to stats callback
+_REPORTING = threading.local()
+
+
+class SyncTeXError(RuntimeError):
+    """Error of synctex_parser library function or of its wrapper: parsing,
+    query, conversion or update failure.
+    """
+
+
 class SyncTeXNodeType(enum.Enum):
     """Enum showing types of SyncTeXNodes.
     
@@ -48,21 +140,137 @@ class SyncTeXNodeType(enum.Enum):
     boundary = _sp.synctex_node_type_boundary
 
 
+class SyncTeXBuffering(enum.Enum):
+    """Enum showing how scanner reads contents of its synctex file.
+    
+    Wraps around synctex_buffering_t enum values from syncex_parser
+    library.
+    """
+    fixed = _sp.synctex_buffering_fixed
+    adaptive = _sp.synctex_buffering_adaptive
+    bulk = _sp.synctex_buffering_bulk
+
+
+class SyncTeXNodeColumns(object):
+    """SyncTeXNodeColumns is columnar snapshot of all nodes of a scanner.
+    
+    It is filled by single synctex_scanner_export call. Each node field is
+    available as attribute being one dimensional typed memoryview (format 'i'
+    for integer fields and 'f' for visible fields expressed in page
+    coordinates). Memoryviews support buffer protocol so they can be passed
+    without copying to array.array, struct or NumPy (numpy.asarray).
+    
+    Item i of every column describes node with index i in scanner's node
+    table (see SyncTeXScanner.node). The parent column holds parent's index,
+    -1 for sheets. Fields which node does not store are exported as 0.
+    """
+    
+    FIELDS = tuple(name for name, _, _ in _NODE_FIELDS)
+    
+    def __init__(self, buffer, count):
+        """Inits SyncTeXNodeColumns from buffer filled by
+        synctex_scanner_export.
+        """
+        self._buffer = buffer
+        self._count = count
+        view = memoryview(buffer)
+        size = count * _FIELD_SIZE
+        for name, field, typecode in _NODE_FIELDS:
+            setattr(self, name,
+                    view[field * size:(field + 1) * size].cast(typecode))
+    
+    def __len__(self):
+        return self._count
+    
+    def __getitem__(self, name):
+        """Gets column by field name.
+        """
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+    
+    def __str__(self):
+        return super().__str__()[:-1] + "; nodes: " + str(self._count) + ">"
+
+
+class SyncTeXNodeRecord(collections.namedtuple('SyncTeXNodeRecord',
+                                                SyncTeXNodeColumns.FIELDS)):
+    """SyncTeXNodeRecord is immutable snapshot of all fields of a node.
+    
+    It is filled by single synctex_node_export or synctex_scanner_export_nodes
+    call. Fields are the same as SyncTeXNodeColumns ones: type is value of
+    SyncTeXNodeType member, parent is index of parent in scanner's node table
+    (-1 for sheets and when node table is not built) and fields which node
+    does not store are 0. Being a plain tuple, record does not refer to
+    scanner: it outlives it and pickles cheaply.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def unpack(cls, buffer) -> list:
+        """Creates list of SyncTeXNodeRecord objects from buffer filled by
+        synctex_node_export or synctex_scanner_export_nodes.
+        """
+        return [cls._make(values) for values in _RECORD.iter_unpack(buffer)]
+
+
 class SyncTeXNode(object):
     """SyncTeXNode is object based wrapper around synctex_node_t pointer.
+    
+    SyncTeXNode objects wrapping the same C node are equal and have the same
+    hash, so they can be used as dict keys. When enabled, objects created
+    by factory are reused from bounded cache of recently used nodes (see
+    set_cache_size).
     """
     
+    __slots__ = ('_node', '_key')
+    
+    _cache = None
+    
     @classmethod
     def factory(cls, pointer):
         """Creates SyncTeXNode from given C pointer or returns None if
-        pointer is NULL.
+        pointer is NULL. When cache is enabled SyncTeXNode of recently used
+        node is reused.
         """
-        return SyncTeXNode(pointer) if pointer else None
+        if not pointer:
+            return None
+        cache = cls._cache
+        if cache is None:
+            return SyncTeXNode(pointer)
+        return cache.get(pointer)
+    
+    @classmethod
+    def set_cache_size(cls, size) -> None:
+        """Sets capacity of cache of SyncTeXNode objects created by factory.
+        Least recently used objects are evicted first. Cache is disabled by
+        default: it saves allocations when the same nodes are visited again
+        and again (parents, query results), but slows down traversals which
+        visit each node once.
+        
+        Arguments:
+            size: Maximal number of cached objects, 0 disables cache.
+        """
+        cls._cache = _SyncTeXNodeCache(size) if size > 0 else None
+    
+    @classmethod
+    def cache_size(cls) -> int:
+        """Gets capacity of cache of SyncTeXNode objects, 0 when disabled.
+        """
+        return cls._cache.size if cls._cache is not None else 0
          
-    def __init__(self, node):
+    def __init__(self, node, key=None):
         """Inits SyncTeXNode.
+        
+        Arguments:
+            node: synctex_node_t pointer.
+            key: Address of C node, computed when not given.
         """
         self._node = node
+        if key is None:
+            key = int(node) if node is not None else 0
+        self._key = key
         
     def __bool__(self):
         """In boolean context SyncTeXNode is True when internal C pointer is
@@ -70,6 +278,16 @@ class SyncTeXNode(object):
         """
         return self._node is not None
     
+    def __eq__(self, other):
+        """SyncTeXNode objects are equal when they wrap the same C node.
+        """
+        if not isinstance(other, SyncTeXNode):
+            return NotImplemented
+        return self._key == other._key
+    
+    def __hash__(self):
+        return hash(self._key)
+    
     def __str__(self):
         return super().__str__()[:-1] + " is: " + str(self.type) + ">"
     
@@ -150,6 +368,26 @@ class SyncTeXNode(object):
         """
         return SyncTeXNodeType(_sp.synctex_node_type(self._node))
     
+    @wrapdoc('synctex_node_export')
+    def record(self) -> SyncTeXNodeRecord:
+        """Gets all fields of node at once, in single C call instead of one
+        call per property.
+        
+        {wrapdoc}
+        
+        Returns:
+            SyncTeXNodeRecord of node.
+            
+        Raises:
+            SyncTeXError when node is NULL.
+        """
+        buffer = bytearray(_RECORD.size)
+        status = _sp.synctex_node_export(self._node, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to export node. Status={}"
+                               .format(self, status))
+        return SyncTeXNodeRecord._make(_RECORD.unpack(buffer))
+    
     @adddoc(cstdout=_C_STDOUT_NOTE)
     @wrapdoc('synctex_node_log')
     def log(self):
@@ -427,6 +665,162 @@ class SyncTeXNode(object):
         return _sp.synctex_node_box_visible_depth(self._node)
         
     
+class _SyncTeXNodeCache(object):
+    """Bounded cache of SyncTeXNode objects keyed by address of C node.
+    Least recently used objects are evicted first. Wrapping a node does not
+    keep it alive, so cached objects stay valid as long as their node does,
+    like any other SyncTeXNode.
+    """
+    
+    def __init__(self, size):
+        """Inits _SyncTeXNodeCache.
+        
+        Arguments:
+            size: Maximal number of cached objects.
+        """
+        self.size = size
+        self._nodes = collections.OrderedDict()
+        self._lock = threading.Lock()
+        
+    def get(self, pointer):
+        """Gets SyncTeXNode wrapping given not NULL C pointer.
+        """
+        key = int(pointer)
+        nodes = self._nodes
+        with self._lock:
+            node = nodes.get(key)
+            if node is not None:
+                nodes.move_to_end(key)
+                return node
+            node = nodes[key] = SyncTeXNode(pointer, key)
+            if len(nodes) > self.size:
+                nodes.popitem(last=False)
+        return node
+
+
+class _SharedLock(object):
+    """Readers/writer lock of scanner: held shared by any number of threads
+    reading nodes, or held exclusively by single thread changing them
+    (parsing, refreshing, freeing). Used as context manager it is held
+    exclusively, its shared method gives context manager holding it shared.
+    
+    Threads waiting to hold it exclusively go before new shared holders, so
+    that steady queries do not starve refresh. Exclusive holds nest and the
+    exclusive holder may hold it shared too, but shared holds do not nest: a
+    thread holding it shared must not hold it again.
+    """
+    
+    def __init__(self):
+        """Inits _SharedLock.
+        """
+        self._mutex = threading.Lock()
+        self._condition = threading.Condition(self._mutex)
+        self._readers = 0
+        self._writers = 0
+        self._owner = None
+        self._depth = 0
+        self._shared = _SharedHold(self)
+        
+    def shared(self):
+        """Gets context manager holding lock shared.
+        """
+        return self._shared
+        
+    def acquire_shared(self) -> None:
+        """Holds lock shared, see shared.
+        """
+        owner = self._owner
+        if owner is not None and owner == threading.get_ident():
+            return
+        with self._mutex:
+            while self._writers:
+                self._condition.wait()
+            self._readers += 1
+        
+    def release_shared(self) -> None:
+        """Releases shared hold of lock.
+        """
+        owner = self._owner
+        if owner is not None and owner == threading.get_ident():
+            return
+        with self._mutex:
+            self._readers -= 1
+            if not self._readers and self._writers:
+                self._condition.notify_all()
+        
+    def __enter__(self):
+        ident = threading.get_ident()
+        if self._owner == ident:
+            self._depth += 1
+            return
+        with self._mutex:
+            self._writers += 1
+            while self._owner is not None or self._readers:
+                self._condition.wait()
+            self._owner = ident
+            self._depth = 1
+        
+    def __exit__(self, exc_type, exc_val, traceback):
+        self._depth -= 1
+        if self._depth:
+            return
+        with self._mutex:
+            self._owner = None
+            self._writers -= 1
+            self._condition.notify_all()
+
+
+class _SharedHold(object):
+    """Context manager holding _SharedLock shared.
+    """
+    
+    __slots__ = ('_lock',)
+    
+    def __init__(self, lock):
+        self._lock = lock
+        
+    def __enter__(self):
+        self._lock.acquire_shared()
+        
+    def __exit__(self, exc_type, exc_val, traceback):
+        self._lock.release_shared()
+
+
+def _reported(method):
+    """Decorates scanner operation, so that its duration is reported to
+    scanner's stats_callback, when there is one. Operations called by
+    reported operation are not reported.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        callback = self.stats_callback
+        if callback is None or getattr(_REPORTING, 'active', False):
+            return method(self, *args, **kwargs)
+        _REPORTING.active = True
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _REPORTING.active = False
+            callback(self, method.__name__, time.perf_counter() - start)
+    return wrapper
+
+
+def _name_keys(name, directory=None) -> list:
+    """Gets keys of file name in name map of scanner, from most to least
+    specific: name normalized (leading './', double separators and '..'
+    removed, case folded where file system ignores case), name made absolute
+    from given directory when it is relative, and base name.
+    """
+    normalized = os.path.normcase(os.path.normpath(name))
+    keys = [normalized]
+    if directory and not os.path.isabs(normalized):
+        keys.append(os.path.normcase(os.path.normpath(
+            os.path.join(directory, normalized))))
+    keys.append(os.path.basename(normalized))
+    return keys
+
+
 class SyncTeXScanner(object):
     """SyncTeXScanner is object based wrapper class around synctex_scanner_t
     pointer. 
@@ -437,15 +831,109 @@ class SyncTeXScanner(object):
     To avoid manual freeing internal C object SyncTeXScanner is implemented
     as context manager which makes it compatible with 'with' Python
     statement. Leaving context frees internal C object automatically.
+    
+    Queries are reentrant and release the GIL while searching, so single
+    scanner can serve concurrent queries from many threads. Queries hold
+    lock of scanner shared, parsing, refreshing and freeing hold it
+    exclusively, so that nodes are not freed under running queries. Parsing
+    releases the GIL too, so many scanners can be parsed in parallel threads
+    (see parse_many).
+    
+    Parsing and queries can be instrumented: counters of scanner are
+    enabled by enable_stats and read by stats. When stats_callback is set,
+    it is called after each parse, refresh or query with scanner, name of
+    operation (method) and its duration in seconds, for instance to forward
+    stats to metrics system. Disabled instrumentation costs a flag check.
     """
+    
+    #callable(scanner, operation, seconds) called after operations, or None
+    stats_callback = None
 
-    def __init__(self, output_file, build_directory=None, pars=1):
+    def __init__(self, output_file, build_directory=None, pars=1, cache=None,
+                 lazy=False, stats=False, buffering=None, buffer_size=0):
         """Inits SyncTeXScanner.
+        
+        When cache (SyncTeXCache) is given, scanner is loaded from snapshot
+        cached for its synctex file if there is an up to date one. Otherwise
+        it is parsed and its snapshot is cached.
+        
+        When lazy is True (and no cache is given), sheets are parsed on
+        demand (see parse_lazily).
+        
+        When stats is True, counters are enabled before parsing (see
+        enable_stats).
+        
+        When buffering (SyncTeXBuffering) is given, contents are read with
+        it and buffer_size (see set_buffering).
+        """
+        lazy = lazy and cache is None
+        deferred = stats or buffering is not None
+        self._init(output_file, _sp.synctex_scanner_new_with_output_file(
+            output_file, build_directory,
+            0 if cache is not None or lazy or deferred else pars))
+        if stats and self._scanner:
+            self.enable_stats()
+        if buffering is not None and self._scanner:
+            self.set_buffering(buffering, buffer_size)
+        if cache is not None and pars and self._scanner:
+            cache.open(self)
+        elif lazy and pars and self._scanner:
+            self.parse_lazily()
+        elif deferred and pars and self._scanner:
+            self.parse()
+    
+    def _init(self, output_file, scanner):
+        """Inits attributes around internal C object.
         """
         self.output_file = output_file
-        self._scanner = _sp.synctex_scanner_new_with_output_file(output_file,
-                                                                 build_directory,
-                                                                 pars)
+        self._scanner = scanner
+        self._spatial_index = None
+        self._lock = _SharedLock()
+        self._prepared = False
+        self._tags = None
+        self._names = None
+    
+    @classmethod
+    @wrapdoc('synctex_scanner_new_with_data')
+    def from_bytes(cls, data, output_file=''):
+        """Creates scanner from synctex contents in memory, gzipped or plain,
+        without writing them to file. Contents are parsed right away, GIL is
+        released while parsing.
+        
+        {wrapdoc}
+        
+        Arguments:
+            data: Bytes-like object with contents of synctex file.
+            output_file: Name of output file the contents belong to, used to
+                resolve input names relative to it.
+                
+        Returns:
+            Parsed SyncTeXScanner.
+            
+        Raises:
+            SyncTeXError when contents can not be parsed.
+        """
+        #contents must not change while GIL is released
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        scanner = cls.__new__(cls)
+        scanner._init(output_file,
+                      _sp.synctex_scanner_new_with_data(output_file, data))
+        if not scanner._scanner:
+            raise SyncTeXError('{}: There was a problem while parsing data.'
+                               .format(scanner))
+        return scanner
+    
+    @classmethod
+    def from_stream(cls, stream, output_file=''):
+        """Creates scanner from readable binary stream (file-like object)
+        with synctex contents, gzipped or plain. Stream is read to its end.
+        See from_bytes.
+        
+        Raises:
+            SyncTeXError when contents can not be parsed.
+        """
+        return cls.from_bytes(stream.read(), output_file)
     
     def __str__(self):
         return super().__str__()[:-1] + "; file: '" + self.output_file + "'>"
@@ -460,34 +948,220 @@ class SyncTeXScanner(object):
         self._cleanup()
     
     def _cleanup(self):
-        """Frees internal C object.
+        """Frees internal C object, once running queries are done.
         """
-        _sp.synctex_scanner_free(self._scanner)
-        self._scanner = None  
+        with self._lock:
+            _sp.synctex_scanner_free(self._scanner)
+            self._scanner = None
+            self._spatial_index = None
+            self._prepared = False
+            self._tags = None
+            self._names = None
     
     #Wrappers            
+    @_reported
     def parse(self) -> None:
         """Used to manually assure that scanner did the parsing process.
         
         For more information check documentation of synctex_scanner_parse
-        function from synctex_parser library. 
+        function from synctex_parser library. GIL is released while parsing.
         
         Raises:
-            RuntimeError when parsing fails.
+            SyncTeXError when parsing fails.
         """
-        self._scanner = _sp.synctex_scanner_parse(self._scanner)
+        with self._lock:
+            self._scanner = _sp.synctex_scanner_parse(self._scanner)
         if not self._scanner:
-            raise RuntimeError('{}: There was a problem while parsing file.'
+            raise SyncTeXError('{}: There was a problem while parsing file.'
                                .format(self))
+    
+    @_reported
+    @wrapdoc('synctex_scanner_parse_lazily')
+    def parse_lazily(self) -> None:
+        """Parses synctex file lazily: content of each sheet is parsed the
+        first time edit_query needs it. Other queries parse all remaining
+        sheets first. Opening large documents which are only partially
+        queried is faster and takes less memory. Queries are serialized
+        until all sheets are parsed. GIL is released while parsing.
+        
+        {wrapdoc}
+        
+        Raises:
+            SyncTeXError when parsing fails.
+        """
+        with self._lock:
+            self._scanner = _sp.synctex_scanner_parse_lazily(self._scanner)
+        if not self._scanner:
+            raise SyncTeXError('{}: There was a problem while parsing file.'
+                               .format(self))
+    
+    @_reported
+    @wrapdoc('synctex_scanner_parse_sheets')
+    def parse_sheets(self) -> None:
+        """Parses all sheets of lazily parsed scanner not parsed yet.
+        
+        {wrapdoc}
+        
+        Raises:
+            SyncTeXError when parsing fails.
+        """
+        with self._lock:
+            status = _sp.synctex_scanner_parse_sheets(self._scanner)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to parse sheets. Status={}"
+                               .format(self, status))
+    
+    @property
+    @wrapdoc('synctex_scanner_unparsed_sheets')
+    def unparsed_sheets(self) -> int:
+        """Gets number of sheets of lazily parsed scanner not parsed yet.
+        
+        {wrapdoc}
+        """
+        return _sp.synctex_scanner_unparsed_sheets(self._scanner)
+
+    @wrapdoc('synctex_scanner_set_buffering')
+    def set_buffering(self, buffering, size=0) -> None:
+        """Sets how contents of synctex file are read by next parse (or
+        refresh): through buffer of fixed size, through buffer sized after
+        contents (adaptive) or inflated in memory at once (bulk). Size is
+        buffer size, maximal buffer size or maximal size of contents inflated
+        in bulk respectively, 0 for default.
+        
+        {wrapdoc}
+        
+        Arguments:
+            buffering: SyncTeXBuffering member.
+            size: Size in bytes, 0 for default.
             
+        Raises:
+            SyncTeXError when buffering or size is not valid.
+        """
+        status = _sp.synctex_scanner_set_buffering(
+            self._scanner, SyncTeXBuffering(buffering).value, size)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to set buffering. Status={}"
+                               .format(self, status))
+    
+    @wrapdoc('synctex_scanner_set_stats')
+    def enable_stats(self, enabled=True) -> None:
+        """Enables or disables counters of scanner (see stats). Enabling
+        disabled counters resets them.
+        
+        {wrapdoc}
+        """
+        _sp.synctex_scanner_set_stats(self._scanner, int(enabled))
+    
+    @wrapdoc('synctex_scanner_stats')
+    def stats(self) -> dict:
+        """Gets counters of scanner, as updated since they were enabled:
+        bytes read, time spent reading (inflating included) and parsing,
+        number of parsed sheets, number, time and friend nodes visited by
+        display queries, number, time and horizontal boxes visited by edit
+        queries, and number of nodes created by type. Times are in
+        nanoseconds.
+        
+        {wrapdoc}
+        
+        Returns:
+            Dictionary of counters by name, with 'nodes' dictionary of
+            node counters by SyncTeXNodeType member.
+            
+        Raises:
+            SyncTeXError when counters can not be read.
+        """
+        buffer = bytearray(8 * _sp.synctex_number_of_stats)
+        status = _sp.synctex_scanner_stats(self._scanner, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to read stats. Status={}"
+                               .format(self, status))
+        buffer = memoryview(buffer).cast('Q')
+        stats = {name: buffer[index] for name, index in _STATS}
+        stats['nodes'] = {node_type: buffer[_sp.synctex_stat_nodes
+                                            + node_type.value]
+                          for node_type in SyncTeXNodeType
+                          if node_type is not SyncTeXNodeType.error}
+        return stats
+    
+    @property
+    @wrapdoc('synctex_scanner_friend_stats')
+    def friend_stats(self) -> dict:
+        """Gets figures of friend lists, hash table of nodes by tag and
+        line browsed by display queries: number of lists, of nodes in lists,
+        of non empty lists, length of longest list and mean length of non
+        empty lists. Sheets of lazy scanner are parsed.
+        
+        {wrapdoc}
+        
+        Returns:
+            Dictionary of figures by name.
+            
+        Raises:
+            SyncTeXError when sheets can not be parsed.
+        """
+        buffer = bytearray(4 * _sp.synctex_number_of_friend_stats)
+        with self._lock:
+            status = _sp.synctex_scanner_friend_stats(self._scanner, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to read friend stats. Status={}"
+                               .format(self, status))
+        buffer = memoryview(buffer).cast('i')
+        stats = {name: buffer[index] for name, index in _FRIEND_STATS}
+        stats['mean_list'] = (stats['friends'] / stats['used_lists']
+                              if stats['used_lists'] else 0.0)
+        return stats
+    
+    @property
+    @wrapdoc('synctex_scanner_memory')
+    def memory(self) -> int:
+        """Gets estimated memory used by scanner, in bytes.
+
+        {wrapdoc}
+        """
+        with self._lock.shared():
+            return _sp.synctex_scanner_memory(self._scanner)
+
+    @_reported
+    @wrapdoc('synctex_scanner_refresh')
+    def refresh(self) -> int:
+        """Re-syncs scanner with its synctex file after document was
+        compiled again. Only sheets whose content changed are parsed again,
+        nodes of unchanged sheets are kept. Node table and spatial index are
+        rebuilt on demand. SyncTeXNode objects of changed sheets obtained
+        before must not be used anymore. Refresh waits for running queries
+        and queries wait for refresh. GIL is released while parsing.
+
+        {wrapdoc}
+
+        Returns:
+            Number of new or changed sheets. Unchanged sheets never parsed
+            by lazy scanner are not counted.
+
+        Raises:
+            SyncTeXError when scanner was created from bytes, synctex file
+            can not be opened or parsing fails. In the last case scanner
+            has no sheet anymore.
+        """
+        with self._lock:
+            status = _sp.synctex_scanner_refresh(self._scanner)
+            self._spatial_index = None
+            self._prepared = False
+            self._tags = None
+            self._names = None
+        if status < 0:
+            raise SyncTeXError("{}: Failed to refresh scanner. Status={}"
+                               .format(self, status))
+        return status
+
+    @_reported
     def display_query(self, file_name, line, column) -> list:
         """Given the file name, a line and a column number returns list of
         nodes satisfying constrain.
         
-        Internally uses synctex_display_query function for making query and  
-        synctex_next_result function when constructing result list ( both
-        functions belong to synctex_parser library). For more information 
-        check their documentation.
+        Internally uses synctex_display_query_tag_r function from
+        synctex_parser library, given tag of file name (see get_tag), which
+        stores results in buffer given by caller instead of scanner. For
+        more information check its documentation.
         
         Arguments:
             file_name: Name of TeX input file which will be queried.
@@ -498,35 +1172,152 @@ class SyncTeXScanner(object):
             List of SyncTeXNode objects satisfying query constrain.
             
         Raises:
-            RuntimeError when query fails.
+            SyncTeXError when query fails.
         """
-        #TODO: custom exception
-        status = _sp.synctex_display_query(self._scanner, file_name,
-                                                   line, column)
+        tag = self.get_tag(file_name)
+        status, nodes = self._query(_sp.synctex_display_query_tag_r, tag,
+                                    line, column) if tag else (-1, [])
         if status < 0:
-            raise RuntimeError("{}: Failed to query {}:{}:{}. Status={}"
+            raise SyncTeXError("{}: Failed to query {}:{}:{}. Status={}"
                                .format(self, file_name, line, column, status))
-        
-        nodes = []
-        #apparently this is python idiomatic way of iterating
-        while True: 
-            node_ptr = _sp.synctex_next_result(self._scanner)
-            if node_ptr:
-                nodes.append(SyncTeXNode(node_ptr))
-            else:
-                break
         return nodes
     
+    @_reported
+    def display_query_records(self, file_name, line, column) -> list:
+        """Same as display_query, but returns SyncTeXNodeRecord objects of
+        resulting nodes, filled by single synctex_scanner_export_nodes call.
+        
+        Returns:
+            List of SyncTeXNodeRecord objects satisfying query constrain.
+            
+        Raises:
+            SyncTeXError when query fails.
+        """
+        tag = self.get_tag(file_name)
+        status, records = self._query(_sp.synctex_display_query_tag_r, tag,
+                                      line, column,
+                                      records=True) if tag else (-1, [])
+        if status < 0:
+            raise SyncTeXError("{}: Failed to query {}:{}:{}. Status={}"
+                               .format(self, file_name, line, column, status))
+        return records
+    
+    @_reported
+    def display_query_many(self, queries) -> list:
+        """Batch version of display_query. Given iterable of
+        (file_name, line, column) queries returns list of results, one list
+        of nodes per query.
+        
+        Line index of scanner is built first (see build_line_index), so
+        each query costs a binary search.
+        
+        Arguments:
+            queries: Iterable of (file_name, line, column) tuples, with the
+                same meaning as display_query arguments.
+            
+        Returns:
+            List of lists of SyncTeXNode objects satisfying query constrains,
+            in order of queries.
+            
+        Raises:
+            SyncTeXError when query fails.
+        """
+        self.build_line_index()
+        return [self.display_query(file_name, line, column)
+                for file_name, line, column in queries]
+    
+    @_reported
+    @wrapdoc('synctex_display_range')
+    def display_range(self, file_name, first_line, last_line, zoom=1.0,
+                      dpi=72.0) -> dict:
+        """Given the file name and a range of lines, like a selected
+        paragraph, returns bounding rectangle of nodes of all lines on each
+        page, found in single C call. Rectangles are in page coordinates, or
+        in pixels of pages rendered at given zoom and resolution (see
+        rectangles). For ranges of many thousand lines build line index
+        first (see build_line_index).
+        
+        {wrapdoc}
+        
+        Arguments:
+            file_name: Name of TeX input file which will be queried.
+            first_line: First line of range.
+            last_line: Last line of range, included.
+            zoom: Zoom factor of rendered pages.
+            dpi: Resolution of rendered pages at zoom 1.
+            
+        Returns:
+            Dictionary of (left, top, right, bottom) tuples by page, in
+            page order.
+            
+        Raises:
+            ValueError when first_line is greater than last_line.
+            SyncTeXError when query fails.
+        """
+        if first_line > last_line:
+            raise ValueError("First line must not be greater than last line.")
+        #input file name as written by TeX, found at once by C
+        tag = self.get_tag(file_name)
+        if not tag:
+            raise SyncTeXError("{}: Failed to query {}:{}-{}. Unknown input "
+                               "file.".format(self, file_name, first_line,
+                                              last_line))
+        file_name = self.get_name(tag)
+        scale = zoom * dpi / 72.0
+        buffer = bytearray(_RESULTS_CAPACITY * _PAGE_RECTANGLE.size)
+        with self._read():
+            status = _sp.synctex_display_range(self._scanner, file_name,
+                                               first_line, last_line, scale,
+                                               buffer)
+            if status > _RESULTS_CAPACITY:
+                buffer = bytearray(status * _PAGE_RECTANGLE.size)
+                status = _sp.synctex_display_range(self._scanner, file_name,
+                                                   first_line, last_line,
+                                                   scale, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to query {}:{}-{}. Status={}"
+                               .format(self, file_name, first_line,
+                                       last_line, status))
+        rows = _PAGE_RECTANGLE.iter_unpack(
+            memoryview(buffer)[:status * _PAGE_RECTANGLE.size])
+        return {page: tuple(rectangle) for page, *rectangle in rows}
+    
+    @wrapdoc('synctex_scanner_index_lines')
+    def build_line_index(self) -> int:
+        """Builds index of scanner's nodes by input file tag and line. Once
+        built it is used by every display query to find the nearest line
+        with nodes by binary search, instead of browsing friend lists line
+        after line. Index is built only once.
+        
+        {wrapdoc}
+        
+        Returns:
+            Number of indexed nodes.
+            
+        Raises:
+            SyncTeXError when index can not be built.
+        """
+        with self._lock:
+            count = _sp.synctex_scanner_index_lines(self._scanner)
+        if count < 0:
+            raise SyncTeXError("{}: Failed to index lines. Status={}"
+                               .format(self, count))
+        return count
+    
+    @_reported
     def edit_query(self, page, h, v) -> list:
         """Given page number, vertical and horizontal coordinates returns list of
         nodes satisfying constrain. Page number is 1 based (counting starts
         from 1). Coordinates are in 72 dpi units and relative to top left
         corner of the page.
         
-        Internally uses synctex_edit_query function for making query and  
-        synctex_next_result function when constructing result list ( both
-        functions belong to synctex_parser library). For more information 
-        check their documentation.
+        Internally uses synctex_edit_query_r function from synctex_parser
+        library, which stores results in buffer given by caller instead of
+        scanner. For more information check its documentation.
+        
+        When spatial index was built (see build_spatial_index) query is
+        answered by edit_query_many instead. When scanner is lazy (see
+        parse_lazily) only the queried page is parsed.
         
         Arguments:
             page: Number of output file page which will be queried ( 1 based)
@@ -537,26 +1328,673 @@ class SyncTeXScanner(object):
             List of SyncTeXNode objects satisfying query constrain.
             
         Raises:
-            RuntimeError when query fails.
+            SyncTeXError when query fails.
         """
-        #TODO: custom exception
         if page < 1:
             raise ValueError("Page number must be greater then 0.")
-        status = _sp.synctex_edit_query(self._scanner, page, h, v)
+        if self._spatial_index is not None:
+            return self.edit_query_many([(page, h, v)])[0]
+        if not self._prepared and self.unparsed_sheets:
+            status, nodes = self._lazy_edit_query(page, h, v)
+        else:
+            status, nodes = self._query(_sp.synctex_edit_query_r, page, h, v)
         if status < 0:
-            raise RuntimeError("{}: Failed to query {}:{}:{}. Status={}"
+            raise SyncTeXError("{}: Failed to query {}:{}:{}. Status={}"
                                .format(self, page, h, v, status))
+        return nodes
+    
+    @_reported
+    def edit_query_records(self, page, h, v) -> list:
+        """Same as edit_query, but returns SyncTeXNodeRecord objects of
+        resulting nodes, filled by single synctex_scanner_export_nodes call.
+        When query is answered by lazy scanner, record of each node is
+        filled by synctex_node_export instead.
+        
+        Returns:
+            List of SyncTeXNodeRecord objects satisfying query constrain.
+            
+        Raises:
+            SyncTeXError when query fails.
+        """
+        if page < 1:
+            raise ValueError("Page number must be greater then 0.")
+        if self._spatial_index is not None:
+            return self._edit_query_many([(page, h, v)], records=True)[0]
+        if not self._prepared and self.unparsed_sheets:
+            status, records = self._lazy_edit_query(page, h, v, records=True)
+        else:
+            status, records = self._query(_sp.synctex_edit_query_r, page, h,
+                                          v, records=True)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to query {}:{}:{}. Status={}"
+                               .format(self, page, h, v, status))
+        return records
+    
+    @_reported
+    def edit_query_many(self, points) -> list:
+        """Batch version of edit_query. Given iterable of (page, h, v)
+        points returns list of results, one list of nodes per point.
+        
+        Uses spatial index of scanner (see build_spatial_index) to find the
+        smallest horizontal box containing each point, then
+        synctex_edit_query_in_box_r function from synctex_parser library to
+        get results. Points are converted to TeX
+        coordinates in single synctex_scanner_hit_points call.
         
+        Arguments:
+            points: Iterable of (page, h, v) tuples, with the same meaning as
+                edit_query arguments.
+            
+        Returns:
+            List of lists of SyncTeXNode objects satisfying query constrains,
+            in order of points.
+            
+        Raises:
+            SyncTeXError when query fails.
+        """
+        points = list(points)
+        if any(page < 1 for page, _, _ in points):
+            raise ValueError("Page number must be greater then 0.")
+        return self._edit_query_many(points)
+    
+    def _edit_query_many(self, points, records=False) -> list:
+        """Runs edit_query_many, collecting SyncTeXNode objects or
+        SyncTeXNodeRecord objects of resulting nodes (see _query).
+        """
+        while True:
+            index = self.build_spatial_index()
+            with self._read():
+                #index is rebuilt when scanner was refreshed meanwhile
+                if index is not self._spatial_index:
+                    continue
+                coordinates = array.array('f', (coordinate
+                                                for _, h, v in points
+                                                for coordinate in (h, v)))
+                status = _sp.synctex_scanner_hit_points(self._scanner,
+                                                        coordinates)
+                if status < 0:
+                    raise SyncTeXError("{}: Failed to convert points. "
+                                       "Status={}".format(self, status))
+                hit_points = memoryview(coordinates).cast('B').cast('i')
+                results = []
+                for i, (page, h, v) in enumerate(points):
+                    try:
+                        box = index.container(page, hit_points[2 * i],
+                                              hit_points[2 * i + 1])
+                    except KeyError:
+                        status = -1
+                    else:
+                        if box is None:
+                            results.append([])
+                            continue
+                        status, nodes = self._collect(
+                            _sp.synctex_edit_query_in_box_r,
+                            _sp.synctex_scanner_node(self._scanner, box), h,
+                            v, records=records)
+                    if status < 0:
+                        raise SyncTeXError("{}: Failed to query {}:{}:{}. "
+                                           "Status={}".format(self, page, h,
+                                                              v, status))
+                    results.append(nodes)
+                return results
+    
+    def build_spatial_index(self) -> SyncTeXSpatialIndex:
+        """Builds spatial index of scanner's horizontal boxes, used by
+        edit_query and edit_query_many. Index is built only once, page
+        structures are built at first query of each page.
+        
+        Returns:
+            SyncTeXSpatialIndex of scanner.
+        """
+        if self._spatial_index is None:
+            #nodes must not change until index is set
+            with self._lock:
+                if self._spatial_index is None:
+                    self._spatial_index = SyncTeXSpatialIndex(
+                        self.export_nodes())
+        return self._spatial_index
+    
+    def _prepare(self) -> None:
+        """Makes sure that scanner did the parsing process and built its
+        node table, the only scanner state changed by reentrant queries. It
+        is done once, under lock, so that concurrent queries only read
+        scanner.
+        """
+        if not self._prepared:
+            with self._lock:
+                _sp.synctex_scanner_node_count(self._scanner)
+                self._prepared = True
+    
+    def _acquire(self) -> None:
+        """Prepares scanner (see _prepare) and holds its lock shared, so
+        that its nodes are neither changed nor freed by other threads until
+        lock is released.
+        """
+        while True:
+            self._prepare()
+            self._lock.acquire_shared()
+            if self._prepared:
+                return
+            #refreshed meanwhile
+            self._lock.release_shared()
+    
+    @contextlib.contextmanager
+    def _read(self):
+        """Context manager preparing scanner and holding its lock shared
+        (see _acquire).
+        """
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._lock.release_shared()
+    
+    def _lazy_edit_query(self, page, h, v, records=False) -> tuple:
+        """Runs non reentrant synctex_edit_query function from
+        synctex_parser library, which only parses the queried sheet of lazy
+        scanner instead of all of them. Runs under exclusive lock, like
+        parsing.
+        
+        Returns:
+            Tuple of query status and list of SyncTeXNode objects, or of
+            their SyncTeXNodeRecord objects when records is True.
+        """
         nodes = []
-        #apparently this is python idiomatic way of iterating
-        while True: 
-            node_ptr = _sp.synctex_next_result(self._scanner)
-            if node_ptr:
-                nodes.append(SyncTeXNode(node_ptr))
-            else:
-                break
-        return nodes
+        with self._lock:
+            status = _sp.synctex_edit_query(self._scanner, page, h, v)
+            node = _sp.synctex_next_result(self._scanner)
+            while status > 0 and node:
+                node = SyncTeXNode.factory(node)
+                nodes.append(node.record() if records else node)
+                node = _sp.synctex_next_result(self._scanner)
+        return status, nodes
+    
+    def _query(self, function, *args, records=False) -> tuple:
+        """Runs reentrant query function from synctex_parser library and
+        collects its results. Result buffer is enlarged and query repeated
+        when it can not hold all results.
+        
+        Arguments:
+            function: One of synctex_*_query_r functions.
+            args: Query arguments following scanner.
+            records: Whether SyncTeXNodeRecord objects of resulting nodes
+                are collected instead of SyncTeXNode objects.
+            
+        Returns:
+            Tuple of query status and list of SyncTeXNode or
+            SyncTeXNodeRecord objects.
+        """
+        self._acquire()
+        try:
+            return self._collect(function, *args, records=records)
+        finally:
+            self._lock.release_shared()
+    
+    def _collect(self, function, *args, records=False) -> tuple:
+        """Runs _query, lock of scanner being held shared by caller.
+        """
+        indices = array.array('i', bytes(_RESULTS_CAPACITY * _FIELD_SIZE))
+        status = function(self._scanner, *args, indices)
+        if status > len(indices):
+            indices = array.array('i', bytes(status * _FIELD_SIZE))
+            status = function(self._scanner, *args, indices)
+        if records:
+            records = self._records(indices[:max(status, 0)])
+            return (status, records) if records is not None else (-1, [])
+        return status, self._nodes(indices[:max(status, 0)])
+    
+    def _nodes(self, indices) -> list:
+        """Gets SyncTeXNode objects of nodes with given indices in node
+        table.
+        """
+        return [SyncTeXNode.factory(_sp.synctex_scanner_node(self._scanner,
+                                                             index))
+                for index in indices]
+    
+    def _records(self, indices):
+        """Gets SyncTeXNodeRecord objects of nodes with given indices in
+        node table, filled by single synctex_scanner_export_nodes call.
+        
+        Arguments:
+            indices: array.array of node table indices.
+        
+        Returns:
+            List of SyncTeXNodeRecord objects or None when export fails.
+        """
+        buffer = bytearray(len(indices) * _RECORD.size)
+        if indices and _sp.synctex_scanner_export_nodes(
+                self._scanner, indices, buffer) < 0:
+            return None
+        return SyncTeXNodeRecord.unpack(buffer)
+    
+    @property
+    @wrapdoc('synctex_scanner_node_count')
+    def node_count(self) -> int:
+        """Gets number of nodes in scanner's node table.
+        
+        {wrapdoc}
+        """
+        with self._read():
+            return _sp.synctex_scanner_node_count(self._scanner)
+    
+    @wrapdoc('synctex_scanner_node')
+    def node(self, index):
+        """Gets node by its index in scanner's node table. Nodes are indexed
+        in document order, each sheet is followed by its content depth first.
+        
+        {wrapdoc}
+        
+        Arguments:
+            index: 0 based index of node.
+            
+        Returns:
+            SyncTeXNode with given index or None if index is out of range.
+        """
+        with self._read():
+            return SyncTeXNode.factory(_sp.synctex_scanner_node(self._scanner,
+                                                                index))
     
+    @property
+    @wrapdoc('synctex_scanner_page_count')
+    def page_count(self) -> int:
+        """Gets number of pages (sheets) of scanner. Sheets of lazy scanner
+        are not parsed.
+        
+        {wrapdoc}
+        """
+        with self._lock:
+            return _sp.synctex_scanner_page_count(self._scanner)
+    
+    @wrapdoc('synctex_sheet')
+    def sheet(self, page):
+        """Gets sheet node of given page, found in constant time through
+        page table of scanner. Sheet of lazy scanner is parsed if needed.
+        
+        {wrapdoc}
+        
+        Arguments:
+            page: 1 based page number.
+            
+        Returns:
+            SyncTeXNode being sheet of page or None if there is no such page.
+        """
+        with self._lock:
+            return SyncTeXNode.factory(_sp.synctex_sheet(self._scanner, page))
+    
+    @wrapdoc('synctex_scanner_page')
+    def iter_pages(self, start=None, stop=None):
+        """Generator of sheet nodes of pages from start (inclusive) to stop
+        (exclusive), in document order. Sheets of lazy scanner are parsed
+        as they are yielded.
+        
+        {wrapdoc}
+        
+        Arguments:
+            start: First page, None for first page of document.
+            stop: Page following last page, None for end of document.
+            
+        Returns:
+            Generator yielding SyncTeXNode sheets.
+        """
+        for index in range(self.page_count):
+            page = _sp.synctex_scanner_page(self._scanner, index)
+            if stop is not None and page >= stop:
+                return
+            if start is None or page >= start:
+                yield self.sheet(page)
+    
+    @wrapdoc('synctex_scanner_export')
+    def export_nodes(self) -> SyncTeXNodeColumns:
+        """Exports all nodes of scanner in single pass into columnar
+        snapshot.
+        
+        {wrapdoc}
+        
+        Returns:
+            SyncTeXNodeColumns with one typed column per node field.
+            
+        Raises:
+            SyncTeXError when export fails.
+        """
+        with self._read():
+            count = _sp.synctex_scanner_node_count(self._scanner)
+            buffer = bytearray(count * _sp.synctex_number_of_fields
+                               * _FIELD_SIZE)
+            status = _sp.synctex_scanner_export(self._scanner, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to export nodes. Status={}"
+                               .format(self, status))
+        return SyncTeXNodeColumns(buffer, count)
+    
+    @wrapdoc('synctex_scanner_select')
+    def walk_chunks(self, types=None, pages=None, tag=None, records=False,
+                    chunk_size=_WALK_CHUNK_SIZE):
+        """Generator of chunks of scanner's nodes in document order, depth
+        first: the order of node table (see node). Nodes are filtered in C,
+        a chunk of nodes costs a single synctex_scanner_select call, and a
+        single synctex_scanner_export_nodes call when records are yielded.
+        Lock of scanner is held shared while each chunk is made, not while
+        it is yielded.
+        
+        {wrapdoc}
+        
+        Arguments:
+            types: Iterable of accepted SyncTeXNodeType members, None for all
+                types.
+            pages: Tuple of first and last accepted page (1 based,
+                inclusive), None for all pages. Each bound may be None.
+            tag: Accepted input file tag (see get_tag), None for all nodes.
+                Sheets have no tag.
+            records: Whether SyncTeXNodeRecord objects are yielded instead
+                of SyncTeXNode objects.
+            chunk_size: Maximal number of nodes per chunk.
+            
+        Returns:
+            Generator yielding lists of SyncTeXNode or SyncTeXNodeRecord
+            objects.
+            
+        Raises:
+            SyncTeXError when walk fails.
+        """
+        mask = 0
+        for node_type in types or ():
+            mask |= 1 << SyncTeXNodeType(node_type).value
+        first_page, last_page = pages if pages is not None else (None, None)
+        indices = array.array('i', bytes(chunk_size * _FIELD_SIZE))
+        start = 0
+        while True:
+            with self._read():
+                status = _sp.synctex_scanner_select(self._scanner, start,
+                                                    mask, first_page or 0,
+                                                    last_page or 0, tag or 0,
+                                                    indices)
+                if status < 0:
+                    raise SyncTeXError("{}: Failed to walk nodes. Status={}"
+                                       .format(self, status))
+                if status == 0:
+                    return
+                chunk = indices[:status]
+                result = (self._records(chunk) if records
+                          else self._nodes(chunk))
+            if result is None:
+                raise SyncTeXError("{}: Failed to export nodes."
+                                   .format(self))
+            yield result
+            if status < chunk_size:
+                return
+            start = chunk[-1] + 1
+    
+    def walk(self, types=None, pages=None, tag=None, records=False):
+        """Generator of scanner's nodes in document order, depth first.
+        Same as walk_chunks, but yields nodes one by one.
+        
+        Returns:
+            Generator yielding SyncTeXNode or SyncTeXNodeRecord objects.
+        """
+        for chunk in self.walk_chunks(types, pages, tag, records):
+            yield from chunk
+    
+    @staticmethod
+    def _items(values, typecode, width):
+        """Gets values as one dimensional buffer of items with given
+        typecode, values being buffer (array.array, NumPy array...) or
+        iterable of tuples of width items. Buffers of such items are not
+        copied.
+        """
+        try:
+            view = memoryview(values)
+        except TypeError:
+            items = array.array(typecode)
+            for value in values:
+                if width > 1:
+                    if len(value) != width:
+                        raise ValueError("Expected {} values, got {}"
+                                         .format(width, len(value)))
+                    items.extend(value)
+                else:
+                    items.append(value)
+            return items
+        if view.ndim != 1:
+            view = view.cast('B').cast(view.format)
+        return view if view.format == typecode else array.array(typecode,
+                                                                view)
+    
+    @staticmethod
+    def _rows(buffer, typecode, width) -> memoryview:
+        """Gets buffer as memoryview of rows of width items with given
+        typecode. Empty buffer gives empty one dimensional memoryview.
+        """
+        view = memoryview(buffer)
+        if not view:
+            return view.cast(typecode)
+        return view.cast(typecode, (len(view) // (width * _FIELD_SIZE),
+                                    width))
+    
+    @wrapdoc('synctex_scanner_rectangles')
+    def rectangles(self, indices, zoom=1.0, dpi=72.0) -> memoryview:
+        """Converts nodes with given indices in node table (see node) to
+        rectangles in page coordinates, or in pixels of page rendered at
+        given zoom and resolution, in single C call. Rectangle of a box is
+        its visible box, as used by edit_query.
+        
+        {wrapdoc}
+        
+        Arguments:
+            indices: Buffer or iterable of node table indices.
+            zoom: Zoom factor of rendered page.
+            dpi: Resolution of rendered page at zoom 1, page coordinates
+                are 72 dpi.
+            
+        Returns:
+            Memoryview of floats with shape (number of nodes, 4), a row of
+            left, top, right and bottom per node. It can be passed to NumPy
+            without copying (numpy.asarray).
+            
+        Raises:
+            SyncTeXError when conversion fails.
+        """
+        indices = self._items(indices, 'i', 1)
+        with self._read():
+            return self._rectangles(indices, zoom * dpi / 72.0)
+    
+    def _rectangles(self, indices, scale) -> memoryview:
+        """Runs rectangles with scale of page coordinates, lock of scanner
+        being held shared by caller.
+        """
+        buffer = bytearray(len(indices) * 4 * _FIELD_SIZE)
+        status = _sp.synctex_scanner_rectangles(
+            self._scanner, indices, scale, buffer) if indices else 0
+        if status < 0:
+            raise SyncTeXError("{}: Failed to convert nodes. Status={}"
+                               .format(self, status))
+        return self._rows(buffer, 'f', 4)
+    
+    def page_rectangles(self, pages=None, types=None, zoom=1.0,
+                        dpi=72.0) -> dict:
+        """Gets rectangles of nodes of each page, in page coordinates or
+        in pixels of pages rendered at given zoom and resolution (see
+        rectangles). Nodes of all pages are selected and converted by a few
+        C calls.
+        
+        Arguments:
+            pages: Tuple of first and last page (1 based, inclusive), None
+                for all pages. Each bound may be None.
+            types: Iterable of SyncTeXNodeType members, None for boxes
+                (horizontal and vertical boxes, void ones included).
+            zoom: Zoom factor of rendered pages.
+            dpi: Resolution of rendered pages at zoom 1.
+            
+        Returns:
+            Dictionary of memoryviews of floats with shape (number of nodes,
+            4), by page. Rows are in document order, the one of walk, and
+            all memoryviews share single buffer.
+            
+        Raises:
+            SyncTeXError when conversion fails.
+        """
+        if types is None:
+            types = [SyncTeXNodeType[name] for name in _BOX_TYPES]
+        with self._read():
+            starts = self._select((SyncTeXNodeType.sheet,), pages)
+            sheets = self._records(starts)
+            if sheets is None:
+                raise SyncTeXError("{}: Failed to export sheets."
+                                   .format(self))
+            indices = self._select(types, pages)
+            rectangles = self._rectangles(indices, zoom * dpi / 72.0)
+        result = {}
+        for number, sheet in enumerate(sheets):
+            first = bisect.bisect_left(indices, starts[number])
+            last = (bisect.bisect_left(indices, starts[number + 1])
+                    if number + 1 < len(starts) else len(indices))
+            result[sheet.page] = rectangles[first:last]
+        return result
+    
+    def _select(self, types, pages) -> array.array:
+        """Gets array.array of node table indices of nodes with given types
+        on given pages, in document order (see walk_chunks). Lock of scanner
+        is held shared by caller.
+        """
+        mask = 0
+        for node_type in types:
+            mask |= 1 << SyncTeXNodeType(node_type).value
+        first_page, last_page = pages if pages is not None else (None, None)
+        count = _sp.synctex_scanner_node_count(self._scanner)
+        indices = array.array('i', bytes(max(count, 1) * _FIELD_SIZE))
+        status = _sp.synctex_scanner_select(self._scanner, 0, mask,
+                                            first_page or 0, last_page or 0,
+                                            0, indices)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to select nodes. Status={}"
+                               .format(self, status))
+        del indices[status:]
+        return indices
+    
+    @wrapdoc('synctex_scanner_tex_to_page')
+    def tex_to_page(self, boxes, zoom=1.0, dpi=72.0) -> memoryview:
+        """Converts boxes in TeX coordinates to rectangles in page
+        coordinates, or in pixels of page rendered at given zoom and
+        resolution, in single C call.
+        
+        {wrapdoc}
+        
+        Arguments:
+            boxes: Buffer of ints, 5 per box, or iterable of (h, v, width,
+                height, depth) tuples.
+            zoom: Zoom factor of rendered page.
+            dpi: Resolution of rendered page at zoom 1.
+            
+        Returns:
+            Memoryview of floats with shape (number of boxes, 4), a row of
+            left, top, right and bottom per box.
+            
+        Raises:
+            SyncTeXError when conversion fails.
+        """
+        boxes = self._items(boxes, 'i', 5)
+        count = len(boxes) // 5
+        buffer = bytearray(count * 4 * _FIELD_SIZE)
+        status = _sp.synctex_scanner_tex_to_page(
+            self._scanner, boxes, zoom * dpi / 72.0, buffer) if count else 0
+        if status < 0:
+            raise SyncTeXError("{}: Failed to convert boxes. Status={}"
+                               .format(self, status))
+        return self._rows(buffer, 'f', 4)
+    
+    @wrapdoc('synctex_scanner_page_to_tex')
+    def page_to_tex(self, points, zoom=1.0, dpi=72.0) -> memoryview:
+        """Converts points in page coordinates, or in pixels of page
+        rendered at given zoom and resolution, to TeX coordinates, in
+        single C call.
+        
+        {wrapdoc}
+        
+        Arguments:
+            points: Buffer of floats, 2 per point, or iterable of (x, y)
+                tuples.
+            zoom: Zoom factor of rendered page.
+            dpi: Resolution of rendered page at zoom 1.
+            
+        Returns:
+            Memoryview of ints with shape (number of points, 2), a row of h
+            and v per point.
+            
+        Raises:
+            SyncTeXError when conversion fails.
+        """
+        points = self._items(points, 'f', 2)
+        count = len(points) // 2
+        buffer = bytearray(count * 2 * _FIELD_SIZE)
+        status = _sp.synctex_scanner_page_to_tex(
+            self._scanner, points, zoom * dpi / 72.0, buffer) if count else 0
+        if status < 0:
+            raise SyncTeXError("{}: Failed to convert points. Status={}"
+                               .format(self, status))
+        return self._rows(buffer, 'i', 2)
+    
+    @wrapdoc('synctex_scanner_snapshot')
+    def snapshot(self) -> bytearray:
+        """Makes binary snapshot of parsed scanner, which can be loaded by
+        another scanner (see load) instead of parsing. Snapshot is bound to
+        the build of synctex_parser library which made it.
+        
+        {wrapdoc}
+        
+        Returns:
+            Bytearray with snapshot.
+            
+        Raises:
+            SyncTeXError when snapshot fails.
+        """
+        with self._read():
+            size = _sp.synctex_scanner_snapshot(self._scanner, bytearray())
+            buffer = bytearray(max(size, 0))
+            status = _sp.synctex_scanner_snapshot(self._scanner, buffer)
+        if status < 0:
+            raise SyncTeXError("{}: Failed to make snapshot. Status={}"
+                               .format(self, status))
+        return buffer
+    
+    @wrapdoc('synctex_scanner_load')
+    def load(self, snapshot) -> bool:
+        """Loads scanner from snapshot made by snapshot method, instead of
+        parsing synctex file. Scanner must be created with pars=0. GIL is
+        released while loading.
+        
+        {wrapdoc}
+        
+        Arguments:
+            snapshot: Bytes-like object containing snapshot.
+            
+        Returns:
+            True when scanner was loaded, False when snapshot does not fit
+            (it was made by other build of library, or scanner was already
+            parsed).
+        """
+        with self._lock:
+            return _sp.synctex_scanner_load(self._scanner, snapshot) >= 0
+
+    @wrapdoc('synctex_scanner_map')
+    def map(self, path, offset=0) -> bool:
+        """Loads scanner from snapshot stored in file, instead of parsing
+        synctex file, without copying it. Nodes are read in place from the
+        memory mapped file and pages of a snapshot mapped at the address it
+        was made for are shared by all processes using it. Scanner must be
+        created with pars=0. GIL is released while mapping.
+
+        {wrapdoc}
+
+        Arguments:
+            path: Path of file containing snapshot made by snapshot method.
+            offset: Offset of snapshot in file, multiple of mmap.PAGESIZE.
+
+        Returns:
+            True when scanner was loaded, False when snapshot does not fit
+            or can not be mapped.
+        """
+        with self._lock:
+            return _sp.synctex_scanner_map(self._scanner, path, offset) >= 0
+
     @adddoc(cstdout=_C_STDOUT_NOTE)
     def display(self) -> None:
         """Displays all information contained in scanner object. 
@@ -602,29 +2040,99 @@ class SyncTeXScanner(object):
         Returns:
             Origin's magnification value.
         """
-        return _sp.synctex_scanner_y_offset(self._scanner)
+        return _sp.synctex_scanner_magnification(self._scanner)
+    
+    def _name_map(self) -> tuple:
+        """Gets name map of scanner, built once input files are known:
+        dictionary of tags by input file name and by their keys (see
+        _name_keys), base names shared by several input files excluded, and
+        dictionary of input file names by tag. Both are None before parsing.
+        """
+        if self._tags is None:
+            with self._lock:
+                names = {input_node.tag: _sp.synctex_scanner_get_name(
+                    self._scanner, input_node.tag)
+                         for input_node in self.inputs}
+                if not names:
+                    return None, None
+                directory = (os.path.dirname(os.path.abspath(
+                    self.output_file)) if self.output_file else None)
+                tags = {}
+                base_names = collections.Counter()
+                for tag, name in names.items():
+                    *keys, base_name = _name_keys(name, directory)
+                    base_names[base_name] += 1
+                    for key in [name] + keys:
+                        tags.setdefault(key, tag)
+                for tag, name in names.items():
+                    base_name = _name_keys(name)[-1]
+                    if base_names[base_name] == 1:
+                        tags.setdefault(base_name, tag)
+                self._names = names
+                self._tags = tags
+        return self._tags, self._names
     
     def get_name(self, tag: int) -> str:
-        """Retrieves file name corresponding to tag.
+        """Retrieves file name corresponding to tag, from name map built
+        after parsing.
         
         Wraps around syctex_scanner_get_name function from synctex_parser
         library.
         
         Returns:
-            File name corresponding to tag.
+            File name corresponding to tag, None for unknown tag.
         """
-        return _sp.synctex_scanner_get_name(self._scanner, tag)
+        names = self._name_map()[1]
+        if names is None:
+            with self._lock.shared():
+                return _sp.synctex_scanner_get_name(self._scanner, tag)
+        return names.get(tag)
     
     def get_tag(self, name: str) -> int:
-        """Retrieves tag corresponding to file name.
+        """Retrieves tag corresponding to file name, from name map built
+        after parsing. Name matches input file name as written by TeX, once
+        normalized (for instance './chapter.tex' or
+        '/tmp/build/./chapter.tex'), absolute name of relative input file
+        (relative to directory of output file) or base name of single input
+        file. Other names are resolved by synctex_scanner_get_tag and
+        remembered.
         
         Wraps around syctex_scanner_get_tag function from synctex_parser
         library.
         
         Returns:
-            Tag corresponding to file name.
+            Tag corresponding to file name, 0 for unknown name.
+        """
+        tags = self._name_map()[0]
+        if tags is None:
+            with self._lock.shared():
+                return _sp.synctex_scanner_get_tag(self._scanner, name)
+        tag = tags.get(name)
+        if tag is None:
+            directory = (os.path.dirname(os.path.abspath(self.output_file))
+                         if self.output_file else None)
+            for key in _name_keys(name, directory):
+                tag = tags.get(key)
+                if tag is not None:
+                    break
+            else:
+                with self._lock.shared():
+                    tag = _sp.synctex_scanner_get_tag(self._scanner, name)
+                if not tag:
+                    return 0
+            tags[name] = tag
+        return tag
+    
+    @property
+    def input_tags(self) -> dict:
+        """Getter for tags of scanner's input files, by file name as
+        written by TeX (see get_tag).
+        
+        Returns:
+            Dictionary of tags by file name.
         """
-        return _sp.synctex_scanner_get_tag(self._scanner, name)    
+        names = self._name_map()[1] or {}
+        return {name: tag for tag, name in names.items()}
 
     @property
     def input(self):
@@ -675,6 +2183,43 @@ class SyncTeXScanner(object):
         """
         return _sp.synctex_scanner_get_synctex(self._scanner)
 
+
+def parse_many(output_files, build_directory=None, max_workers=None) -> list:
+    """Creates and parses scanners for many output files concurrently.
+    
+    Each scanner is parsed in its own thread of ThreadPoolExecutor, parsing
+    releases the GIL so files are parsed in parallel.
+    
+    Arguments:
+        output_files: Iterable of output file names, as for SyncTeXScanner.
+        build_directory: Build directory shared by all output files.
+        max_workers: Maximum number of threads, ThreadPoolExecutor default
+            when None.
+        
+    Returns:
+        List of parsed SyncTeXScanner objects, in order of output files.
+        
+    Raises:
+        SyncTeXError when parsing of any file fails. Scanners of other files
+        are freed then.
+    """
+    def parse(output_file):
+        scanner = SyncTeXScanner(output_file, build_directory)
+        scanner.parse()
+        return scanner
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(parse, output_file)
+                   for output_file in output_files]
+    scanners = [future.result() for future in futures
+                if future.exception() is None]
+    if len(scanners) < len(futures):
+        for scanner in scanners:
+            scanner._cleanup()
+        for future in futures:
+            future.result()
+    return scanners
+
         
 if __name__ == '__main__':
 #SERVES AS TEST SUITE
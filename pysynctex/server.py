@@ -0,0 +1,447 @@
+"""Created on Oct 17, 2026
+
+This module contains local query server, which answers batches of display and
+edit queries from pool of worker processes listening on Unix domain socket,
+and its client.
+
+Workers load scanners through memory mapped SyncTeXCache entries: document is
+parsed once, its snapshot is stored in cache and every worker maps it
+read-only, so node pages are shared by all workers instead of being parsed
+again by each of them.
+
+Protocol is a sequence of frames over stream socket, each frame is 4 bytes
+little endian length of its payload followed by the payload. Client sends
+request frames, server answers each with response frame, in order. Server
+answers request frames longer than _MAX_REQUEST_SIZE with failure response
+and closes connection.
+
+Request payload:
+    header '<BHHI': operation (1 display, 2 edit), length of output file
+        name, length of build directory name (0 for none), number of queries
+    output file name and build directory name, UTF-8 encoded
+    queries of display operation, each '<iiH': line, column, length of
+        input file name, followed by UTF-8 encoded input file name
+    queries of edit operation, each '<iff': page, h, v
+
+Response payload:
+    header '<BI': status (0 success, 1 failure), number of results or length
+        of error message
+    on failure UTF-8 encoded error message
+    on success results, one per query, each '<i': number of resulting nodes
+        (-1 when query failed), followed by their records, each a row of
+        SyncTeXNodeRecord fields as filled by synctex_node_export
+
+Author: Jan Kumor
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import threading
+
+from .cache import SyncTeXCache
+from .pool import SyncTeXScannerPool
+from .pysynctex import SyncTeXError, SyncTeXNodeRecord, _RECORD
+
+DISPLAY = 1
+EDIT = 2
+_FRAME = struct.Struct('<I')
+_REQUEST = struct.Struct('<BHHI')
+_RESPONSE = struct.Struct('<BI')
+_DISPLAY_QUERY = struct.Struct('<iiH')
+_EDIT_QUERY = struct.Struct('<iff')
+_RESULT = struct.Struct('<i')
+_OK = 0
+_FAILED = 1
+#maximal payload length of request frame
+_MAX_REQUEST_SIZE = 64 << 20
+
+
+def _receive(connection, size) -> bytes:
+    """Receives exactly size bytes from socket.
+
+    Returns:
+        Received bytes, or None when peer closed connection first.
+    """
+    data = bytearray(size)
+    view = memoryview(data)
+    while view:
+        count = connection.recv_into(view)
+        if not count:
+            return None
+        view = view[count:]
+    return data
+
+
+def _receive_frame(connection, max_size=None):
+    """Receives frame payload from socket, None when peer closed connection.
+
+    Raises:
+        ValueError when payload is longer than max_size, its bytes are left
+        unread.
+    """
+    header = _receive(connection, _FRAME.size)
+    if header is None:
+        return None
+    size = _FRAME.unpack(header)[0]
+    if max_size is not None and size > max_size:
+        raise ValueError('Frame of {} bytes exceeds {} bytes'.format(
+            size, max_size))
+    return _receive(connection, size)
+
+
+def _send_frame(connection, payload) -> None:
+    """Sends frame with payload to socket.
+    """
+    connection.sendall(_FRAME.pack(len(payload)) + payload)
+
+
+def encode_request(operation, output_file, queries,
+                   build_directory=None) -> bytes:
+    """Encodes request payload.
+
+    Arguments:
+        operation: DISPLAY or EDIT.
+        output_file: Name of output file, as for SyncTeXScanner.
+        queries: Iterable of (file_name, line, column) tuples for DISPLAY,
+            of (page, h, v) tuples for EDIT.
+        build_directory: Build directory, as for SyncTeXScanner.
+    """
+    output_file = os.fsencode(output_file)
+    build_directory = os.fsencode(build_directory or '')
+    parts = []
+    if operation == DISPLAY:
+        for file_name, line, column in queries:
+            file_name = file_name.encode()
+            parts.append(_DISPLAY_QUERY.pack(line, column, len(file_name)))
+            parts.append(file_name)
+        count = len(parts) // 2
+    else:
+        parts = [_EDIT_QUERY.pack(page, h, v) for page, h, v in queries]
+        count = len(parts)
+    return b''.join([_REQUEST.pack(operation, len(output_file),
+                                   len(build_directory), count),
+                     output_file, build_directory] + parts)
+
+
+def decode_request(payload) -> tuple:
+    """Decodes request payload.
+
+    Returns:
+        Tuple of operation, output file name, build directory name (None
+        for none) and list of queries.
+
+    Raises:
+        ValueError when payload is not valid request.
+    """
+    try:
+        operation, output_length, build_length, count = \
+            _REQUEST.unpack_from(payload)
+        offset = _REQUEST.size + output_length + build_length
+        output_file = os.fsdecode(bytes(payload[_REQUEST.size:offset
+                                                - build_length]))
+        build_directory = (os.fsdecode(bytes(payload[offset - build_length:
+                                                     offset]))
+                           if build_length else None)
+        queries = []
+        if operation == DISPLAY:
+            for _ in range(count):
+                line, column, length = _DISPLAY_QUERY.unpack_from(payload,
+                                                                  offset)
+                offset += _DISPLAY_QUERY.size + length
+                name = bytes(payload[offset - length:offset]).decode()
+                queries.append((name, line, column))
+        elif operation == EDIT:
+            queries = list(_EDIT_QUERY.iter_unpack(
+                payload[offset:offset + count * _EDIT_QUERY.size]))
+            offset += count * _EDIT_QUERY.size
+        else:
+            raise ValueError('Unknown operation {}'.format(operation))
+    except (struct.error, UnicodeDecodeError) as error:
+        raise ValueError('Malformed request: {}'.format(error))
+    if offset != len(payload) or len(queries) != count:
+        raise ValueError('Malformed request: bad length')
+    return operation, output_file, build_directory, queries
+
+
+def encode_response(results) -> bytes:
+    """Encodes successful response payload.
+
+    Arguments:
+        results: List of lists of SyncTeXNodeRecord objects, None for failed
+            queries.
+    """
+    parts = [_RESPONSE.pack(_OK, len(results))]
+    for records in results:
+        if records is None:
+            parts.append(_RESULT.pack(-1))
+            continue
+        parts.append(_RESULT.pack(len(records)))
+        parts.extend(_RECORD.pack(*record) for record in records)
+    return b''.join(parts)
+
+
+def encode_error(message) -> bytes:
+    """Encodes failure response payload.
+    """
+    message = message.encode()
+    return _RESPONSE.pack(_FAILED, len(message)) + message
+
+
+def decode_response(payload) -> list:
+    """Decodes response payload.
+
+    Returns:
+        List of lists of SyncTeXNodeRecord objects, None for failed queries.
+
+    Raises:
+        SyncTeXError when server failed to answer request.
+    """
+    status, count = _RESPONSE.unpack_from(payload)
+    offset = _RESPONSE.size
+    if status != _OK:
+        raise SyncTeXError('Server failed to answer request: {}'.format(
+            bytes(payload[offset:offset + count]).decode()))
+    results = []
+    for _ in range(count):
+        length = _RESULT.unpack_from(payload, offset)[0]
+        offset += _RESULT.size
+        if length < 0:
+            results.append(None)
+            continue
+        end = offset + length * _RECORD.size
+        results.append(SyncTeXNodeRecord.unpack(payload[offset:end]))
+        offset = end
+    return results
+
+
+def _answer(pool, payload) -> bytes:
+    """Answers request payload with scanner from pool.
+    """
+    try:
+        operation, output_file, build_directory, queries = \
+            decode_request(payload)
+        with pool.scanner(output_file, build_directory) as scanner:
+            results = []
+            if operation == DISPLAY:
+                scanner.build_line_index()
+                query = scanner.display_query_records
+            else:
+                query = scanner.edit_query_records
+            for arguments in queries:
+                try:
+                    results.append(query(*arguments))
+                except (ValueError, SyncTeXError):
+                    results.append(None)
+    except (ValueError, SyncTeXError) as error:
+        return encode_error(str(error))
+    return encode_response(results)
+
+
+def _serve_connection(pool, connection) -> None:
+    """Answers requests of connection until peer closes it.
+    """
+    with connection:
+        while True:
+            try:
+                payload = _receive_frame(connection, _MAX_REQUEST_SIZE)
+            except ValueError as error:
+                #rest of frame is not read, so stream can not go on
+                _send_frame(connection, encode_error(str(error)))
+                return
+            if payload is None:
+                return
+            _send_frame(connection, _answer(pool, payload))
+
+
+def _work(listener, cache_directory, max_scanners, max_memory) -> None:
+    """Worker process: accepts connections of listening socket and serves
+    each of them in its own thread. Queries release the GIL, so connections
+    are served in parallel.
+    """
+    pool = SyncTeXScannerPool(max_scanners, max_memory,
+                              SyncTeXCache(cache_directory, mapped=True))
+    try:
+        while True:
+            connection, _ = listener.accept()
+            threading.Thread(target=_serve_connection,
+                             args=(pool, connection), daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+
+
+class SyncTeXServer(object):
+    """Local query server.
+
+    Server listens on Unix domain socket and forks worker processes which
+    accept its connections. Each worker keeps SyncTeXScannerPool of scanners
+    loaded from memory mapped SyncTeXCache entries.
+
+    SyncTeXServer is context manager, leaving context stops workers and
+    removes socket.
+    """
+
+    def __init__(self, path, workers=None, cache_directory=None,
+                 max_scanners=None, max_memory=None):
+        """Inits SyncTeXServer.
+
+        Arguments:
+            path: Path of Unix domain socket. Existing socket file is
+                replaced.
+            workers: Number of worker processes, number of CPUs when None.
+            cache_directory: Directory of SyncTeXCache entries shared by
+                workers. When None entries are stored next to synctex files.
+            max_scanners: Maximum number of open scanners per worker, as for
+                SyncTeXScannerPool.
+            max_memory: Maximum estimated memory of open scanners per
+                worker, as for SyncTeXScannerPool.
+        """
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_directory = cache_directory
+        self.max_scanners = max_scanners
+        self.max_memory = max_memory
+        self._listener = None
+        self._processes = []
+
+    def __str__(self):
+        return super().__str__()[:-1] + "; path: '" + self.path + "'>"
+
+    #Context manager magic methods __enter__ and __exit__
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        """We must stop workers.
+        """
+        self.close()
+
+    def start(self) -> None:
+        """Binds socket, accessible to owner only, and starts worker
+        processes.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.path)
+        #no connection is accepted before listen
+        os.chmod(self.path, 0o600)
+        self._listener.listen(socket.SOMAXCONN)
+        #workers inherit listening socket
+        context = multiprocessing.get_context('fork')
+        self._processes = [context.Process(
+            target=_work, args=(self._listener, self.cache_directory,
+                                self.max_scanners, self.max_memory),
+            daemon=True) for _ in range(self.workers)]
+        for process in self._processes:
+            process.start()
+
+    def serve_forever(self) -> None:
+        """Starts server and waits until it is interrupted or terminated.
+        """
+        def terminate(signum, frame):
+            raise KeyboardInterrupt
+        previous = signal.signal(signal.SIGTERM, terminate)
+        try:
+            self.start()
+            for process in self._processes:
+                process.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.close()
+
+    def close(self) -> None:
+        """Stops worker processes and removes socket.
+        """
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class SyncTeXClient(object):
+    """Client of SyncTeXServer.
+
+    Client keeps single connection, requests are sent one at a time. Client
+    is thread safe, but concurrent requests are serialized: use one client
+    per thread to query in parallel.
+
+    SyncTeXClient is context manager, leaving context closes connection.
+    """
+
+    def __init__(self, path):
+        """Inits SyncTeXClient and connects to server socket at path.
+        """
+        self.path = path
+        self._connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._connection.connect(path)
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return super().__str__()[:-1] + "; path: '" + self.path + "'>"
+
+    #Context manager magic methods __enter__ and __exit__
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        """We must close connection.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """Closes connection.
+        """
+        self._connection.close()
+
+    def display_query_many(self, output_file, queries,
+                           build_directory=None) -> list:
+        """Batch of display queries of output file, see
+        SyncTeXScanner.display_query_many.
+
+        Returns:
+            List of lists of SyncTeXNodeRecord objects, in order of queries.
+            Failed queries have None results.
+
+        Raises:
+            SyncTeXError when output file can not be opened or parsed.
+        """
+        return self._request(encode_request(DISPLAY, output_file, queries,
+                                            build_directory))
+
+    def edit_query_many(self, output_file, points,
+                        build_directory=None) -> list:
+        """Batch of edit queries of output file, see
+        SyncTeXScanner.edit_query_many.
+
+        Returns:
+            List of lists of SyncTeXNodeRecord objects, in order of points.
+            Failed queries have None results.
+
+        Raises:
+            SyncTeXError when output file can not be opened or parsed.
+        """
+        return self._request(encode_request(EDIT, output_file, points,
+                                            build_directory))
+
+    def _request(self, payload) -> list:
+        """Sends request payload and decodes its response.
+        """
+        with self._lock:
+            _send_frame(self._connection, payload)
+            response = _receive_frame(self._connection)
+        if response is None:
+            raise ConnectionError('{}: Server closed connection.'
+                                  .format(self))
+        return decode_response(response)
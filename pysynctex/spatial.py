@@ -0,0 +1,121 @@
+"""Created on Oct 17, 2026
+
+This module contains spatial index of horizontal boxes which allows to answer
+edit queries (output to input synchronization) without browsing all boxes of
+queried page.
+
+The index reproduces the first step of synctex_edit_query function from
+synctex_parser library: finding the smallest horizontal box containing the hit
+point. The remaining steps are done by synctex_edit_query_in_box function.
+
+Author: Jan Kumor
+"""
+from . import _synctex_parser as _sp
+
+
+class SyncTeXSpatialIndex(object):
+    """Per page spatial index of horizontal boxes.
+
+    Index is built from SyncTeXNodeColumns snapshot of scanner nodes. Page
+    structures are built lazily, at first query of given page. Boxes of page
+    are distributed into horizontal bands covering their vertical extent and
+    each band is sorted by box size, so the first box of a band containing
+    the hit point is the smallest container. Queries cost is proportional to
+    the number of boxes crossing the band, not to the number of boxes of the
+    page.
+
+    All coordinates used by index are TeX coordinates (see
+    synctex_scanner_hit_points function from synctex_parser library).
+    """
+
+    def __init__(self, columns):
+        """Inits SyncTeXSpatialIndex.
+
+        Arguments:
+            columns: SyncTeXNodeColumns of indexed scanner.
+        """
+        self._columns = columns
+        types = columns.type.tolist()
+        starts = [i for i, node_type in enumerate(types)
+                  if node_type == _sp.synctex_node_type_sheet]
+        starts.append(len(types))
+        self._sheets = {}
+        for start, stop in zip(starts, starts[1:]):
+            #as in synctex_edit_query, the first sheet with given page wins
+            self._sheets.setdefault(columns.page[start], (start, stop))
+        self._pages = {}
+
+    def __contains__(self, page):
+        return page in self._sheets
+
+    def container(self, page, h, v):
+        """Finds smallest horizontal box containing given hit point.
+
+        Arguments:
+            page: Number of page ( 1 based).
+            h: Horizontal TeX coordinate of hit point.
+            v: Vertical TeX coordinate of hit point.
+
+        Returns:
+            Index of found box in scanner's node table. When no box contains
+            hit point index of first child of page's sheet is returned, or
+            None if sheet is empty.
+
+        Raises:
+            KeyError when there is no sheet for page.
+        """
+        top, band_height, bands, fallback = self._page(page)
+        band = (v - top) // band_height
+        if 0 <= band < len(bands):
+            for left, right, upper, lower, index in bands[band]:
+                if left <= h <= right and upper <= v <= lower:
+                    return index
+        return fallback
+
+    def _page(self, page):
+        """Gets index structure for page, building it if necessary.
+        """
+        try:
+            return self._pages[page]
+        except KeyError:
+            pass
+        start, stop = self._sheets[page]
+        columns = self._columns
+        parents = columns.parent[start:stop].tolist()
+        #The end of node i is the index of the last node of its subtree,
+        #synctex_edit_query browses boxes in the order of their ends.
+        ends = list(range(start, stop))
+        for i in range(stop - start - 1, 0, -1):
+            parent = parents[i] - start
+            if ends[i] > ends[parent]:
+                ends[parent] = ends[i]
+        fields = [getattr(columns, name)[start:stop].tolist()
+                  for name in ('type', 'width', 'height', 'depth', 'horiz_v',
+                               'vert_v', 'width_v', 'height_v', 'depth_v')]
+        boxes = []
+        for i, (node_type, width, height, depth, left, vert, width_v,
+                height_v, depth_v) in enumerate(zip(*fields)):
+            if node_type != _sp.synctex_node_type_hbox:
+                continue
+            #smallest container is the one with smallest width then smallest
+            #height, the last browsed one among equal ones
+            key = (abs(width), abs(height) + abs(depth), -ends[i], start + i)
+            boxes.append((key, (left, left + abs(width_v),
+                                vert - abs(height_v), vert + abs(depth_v),
+                                start + i)))
+        bands = []
+        top = band_height = 1
+        if boxes:
+            boxes.sort()
+            top = min(box[2] for _, box in boxes)
+            bottom = max(box[3] for _, box in boxes)
+            count = max(1, len(boxes) // 2)
+            band_height = (bottom - top) // count + 1
+            bands = [[] for _ in range(count)]
+            for _, box in boxes:
+                for band in range((box[2] - top) // band_height,
+                                  (box[3] - top) // band_height + 1):
+                    bands[band].append(box)
+        fallback = start + 1 if stop - start > 1 else None
+        result = self._pages[page] = (top, band_height, bands, fallback)
+        return result
@@ -0,0 +1,173 @@
+"""Created on Oct 17, 2026
+
+This module contains wrapper of synctex updater, which appends magnification
+and offsets records to synctex files of output files post processed by
+dvipdf like filters (imposition for instance), and helper updating synctex
+files of many output files in parallel worker processes.
+
+Synctex files are not parsed nor read: records are appended to their end, as
+a new gzip member for gzipped files, and read by scanners from the post
+scriptum of the file.
+
+Author: Jan Kumor
+"""
+import concurrent.futures
+import os
+
+from . import _synctex_parser as _sp
+from .dochelpers import wrapdoc
+from .pysynctex import SyncTeXError
+
+#(field name, synctex_updater_append_* function) of records, in order
+_FIELDS = (
+    ('magnification', _sp.synctex_updater_append_magnification),
+    ('x_offset', _sp.synctex_updater_append_x_offset),
+    ('y_offset', _sp.synctex_updater_append_y_offset),
+    )
+
+
+def _record_value(name, value) -> str:
+    """Formats value of record: strings are kept (offsets may have TeX unit,
+    like '1in'), numbers are written as is for magnification and in TeX
+    points for offsets.
+    """
+    if not isinstance(value, str):
+        value = '{!r}{}'.format(float(value),
+                                '' if name == 'magnification' else 'pt')
+    if not value or '\n' in value or '\r' in value:
+        raise ValueError("Bad {} value: {!r}".format(name, value))
+    return value
+
+
+class SyncTeXUpdater(object):
+    """SyncTeXUpdater is wrapper around synctex_updater_t from
+    synctex_parser library.
+
+    Records are buffered and appended at once when updater is closed, so
+    that synctex file is opened and written once. SyncTeXUpdater is context
+    manager: leaving context closes it, records are discarded when context
+    is left by exception.
+
+    Usage example:
+        with SyncTeXUpdater('document.pdf') as updater:
+            updater.update(x_offset='1in', y_offset=-36)
+    """
+
+    def __init__(self, output_file, build_directory=None):
+        """Inits SyncTeXUpdater of synctex file of given output file, found
+        like SyncTeXScanner does. Synctex file is opened on close.
+        """
+        self.output_file = output_file
+        self.build_directory = build_directory
+        self._records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._records = []
+
+    def __str__(self):
+        return super().__str__()[:-1] + "; file: '" + self.output_file + "'>"
+
+    def update(self, magnification=None, x_offset=None, y_offset=None):
+        """Buffers records of given values, None values are not recorded.
+
+        Arguments:
+            magnification: Magnification factor, number or string.
+            x_offset: Horizontal offset, number of TeX points or string with
+                TeX unit (in, cm, mm, pt, bp, pc, sp, dd or cc).
+            y_offset: Vertical offset, like x_offset.
+
+        Raises:
+            ValueError when value can not be written in synctex file.
+        """
+        values = {'magnification': magnification, 'x_offset': x_offset,
+                  'y_offset': y_offset}
+        for name, function in _FIELDS:
+            if values[name] is not None:
+                self._records.append(
+                    (function, _record_value(name, values[name])))
+
+    @wrapdoc('synctex_updater_new_with_output_file')
+    def close(self) -> int:
+        """Appends buffered records to synctex file. Nothing is written when
+        there is no record.
+
+        {wrapdoc}
+
+        Returns:
+            Number of appended records.
+
+        Raises:
+            SyncTeXError when synctex file can not be opened for appending.
+        """
+        records, self._records = self._records, []
+        if not records:
+            return 0
+        updater = _sp.synctex_updater_new_with_output_file(
+            self.output_file, self.build_directory)
+        if updater is None:
+            raise SyncTeXError("{}: Failed to open synctex file."
+                               .format(self))
+        try:
+            for function, value in records:
+                function(updater, value)
+        finally:
+            _sp.synctex_updater_free(updater)
+        return len(records)
+
+
+def _update(task) -> tuple:
+    """Updates synctex file in worker process of update_many.
+
+    Returns:
+        Tuple of number of appended records and error message, None on
+        success.
+    """
+    output_file, build_directory, values = task
+    try:
+        with SyncTeXUpdater(output_file, build_directory) as updater:
+            updater.update(**values)
+        return len([value for value in values.values()
+                    if value is not None]), None
+    except (SyncTeXError, ValueError) as error:
+        return 0, str(error)
+
+
+def update_many(updates, build_directory=None, max_workers=None) -> list:
+    """Updates synctex files of many output files in parallel worker
+    processes of ProcessPoolExecutor, each file with single
+    SyncTeXUpdater. Files are sent to workers in chunks.
+
+    Arguments:
+        updates: Iterable of (output_file, values) pairs, values being
+            dictionary of SyncTeXUpdater.update arguments.
+        build_directory: Build directory shared by all output files.
+        max_workers: Maximum number of processes, ProcessPoolExecutor
+            default (number of CPUs) when None.
+
+    Returns:
+        List of numbers of records appended to each synctex file, in order
+        of updates.
+
+    Raises:
+        SyncTeXError when any file can not be updated, once other files
+        were updated.
+    """
+    tasks = [(output_file, build_directory, dict(values))
+             for output_file, values in updates]
+    if not tasks:
+        return []
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        results = list(executor.map(_update, tasks, chunksize=chunksize))
+    errors = [error for _, error in results if error is not None]
+    if errors:
+        raise SyncTeXError("Failed to update {} of {} files: {}"
+                           .format(len(errors), len(tasks), errors[0]))
+    return [count for count, _ in results]
@@ -5,7 +5,8 @@ if __name__ == '__main__':
                                 sources=['wrapper/synctex_parser.i',
                                 'wrapper/synctex_package/synctex_parser.c',
                                 'wrapper/synctex_package/synctex_parser_utils.c'],
-                                include_dirs=['wrapper/synctex_package'])
+                                include_dirs=['wrapper/synctex_package'],
+                                libraries=['z'])
     
     setup(name='PySyncTeX',
           version='0.2.0',
@@ -18,6 +19,9 @@ if __name__ == '__main__':
           platforms='ANY',
           packages=['pysynctex'],
           ext_modules=[_synctex_parser],
+          entry_points={
+            'console_scripts': ['pysynctex = pysynctex.__main__:main'],
+            },
           classifiers=[
             'Development Status :: 3 - Alpha',
             'Intended Audience :: Developers',
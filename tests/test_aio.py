@@ -0,0 +1,66 @@
+"""Created on Oct 17, 2026
+
+Tests of asyncio front end of SyncTeXScanner.
+
+Author: Jan Kumor
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+from pysynctex.aio import AsyncSyncTeXScanner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'benchmarks'))
+import synthetic  # noqa: E402
+
+PAGES = 100
+
+
+class AsyncRefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.directory.name, 'document.pdf')
+        self.synctex = os.path.join(self.directory.name, 'document.synctex')
+        self.generate(0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, seed):
+        synthetic.generate(self.synctex, pages=PAGES, lines=20, nodes=10,
+                           gzipped=False, seed=seed)
+
+    def test_refresh_while_querying(self):
+        """Coroutines querying shared scanner in executor do not fail while
+        other coroutine refreshes it.
+        """
+        async def click(scanner, number, stop):
+            name = synthetic.input_name(number % 8 + 1)
+            count = 0
+            while not stop.is_set():
+                count += 1
+                await scanner.edit_query_records(count % PAGES + 1, 300, 400)
+                await scanner.display_query_records(name, count % 200 + 1, 0)
+
+        async def main():
+            async with AsyncSyncTeXScanner(self.output_file) as scanner:
+                stop = asyncio.Event()
+                clicks = [asyncio.ensure_future(click(scanner, number, stop))
+                          for number in range(8)]
+                try:
+                    for seed in range(1, 6):
+                        self.generate(seed)
+                        await scanner.refresh()
+                finally:
+                    stop.set()
+                await asyncio.gather(*clicks)
+
+        asyncio.run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
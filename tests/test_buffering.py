@@ -0,0 +1,53 @@
+"""Created on Oct 17, 2026
+
+Tests of parsing synctex files through small buffers.
+
+Author: Jan Kumor
+"""
+import os
+import unittest
+
+from pysynctex import SyncTeXBuffering, SyncTeXScanner
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', 'example',
+                       'example.pdf')
+
+
+def _display(scanner, lines) -> list:
+    """Gets (page, line, h, v) tuples of display query results of each line
+    of first input of scanner.
+    """
+    name = scanner.get_name(1)
+    results = []
+    for line in lines:
+        nodes = scanner.display_query(name, line, 0) or []
+        results.append([(node.page, node.line, node.h, node.v)
+                        for node in nodes])
+    return results
+
+
+class BufferingTest(unittest.TestCase):
+
+    def test_small_buffer_size(self):
+        """Input names longer than the buffer and display queries match
+        default parse.
+        """
+        lines = range(1, 60)
+        scanner = SyncTeXScanner(EXAMPLE)
+        name = scanner.get_name(1)
+        expected = _display(scanner, lines)
+        self.assertTrue(any(expected))
+        for buffering in SyncTeXBuffering:
+            for size in (16, 32, 64, 80, 128):
+                for lazy in (False, True):
+                    with self.subTest(buffering=buffering, size=size,
+                                      lazy=lazy):
+                        scanner = SyncTeXScanner(EXAMPLE, lazy=lazy,
+                                                 buffering=buffering,
+                                                 buffer_size=size)
+                        self.assertEqual(scanner.get_name(1), name)
+                        self.assertEqual(_display(scanner, lines), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
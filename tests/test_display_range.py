@@ -0,0 +1,60 @@
+"""Created on Oct 17, 2026
+
+Tests of display queries of line ranges.
+
+Author: Jan Kumor
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from pysynctex import SyncTeXError, SyncTeXScanner
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', 'example',
+                       'example.pdf')
+
+
+class DisplayRangeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = SyncTeXScanner(EXAMPLE)
+        self.name = self.scanner.get_name(1)
+
+    def test_union(self):
+        """Rectangle of range bounds rectangles of its lines on each page.
+        """
+        rectangles = self.scanner.display_range(self.name, 18, 22)
+        self.assertTrue(rectangles)
+        for line in range(18, 23):
+            for page, (left, top, right, bottom) in self.scanner.display_range(
+                    self.name, line, line).items():
+                merged = rectangles[page]
+                self.assertLessEqual(merged[0], left)
+                self.assertLessEqual(merged[1], top)
+                self.assertGreaterEqual(merged[2], right)
+                self.assertGreaterEqual(merged[3], bottom)
+
+    def test_reversed_range(self):
+        with self.assertRaises(ValueError):
+            self.scanner.display_range(self.name, 10, 5)
+
+    def test_unknown_file(self):
+        """Unknown input file fails without writing to standard output.
+        """
+        with tempfile.TemporaryFile() as output:
+            sys.stdout.flush()
+            saved = os.dup(1)
+            os.dup2(output.fileno(), 1)
+            try:
+                with self.assertRaises(SyncTeXError):
+                    self.scanner.display_range('nosuch.tex', 1, 10)
+            finally:
+                os.dup2(saved, 1)
+                os.close(saved)
+            output.seek(0)
+            self.assertEqual(output.read(), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Created on Oct 17, 2026
+
+Tests of sizing friend lists, hash table of nodes by tag and line.
+
+Author: Jan Kumor
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from pysynctex import SyncTeXScanner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'benchmarks'))
+import synthetic  # noqa: E402
+
+
+class FriendsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.directory.name, 'document.pdf')
+        self.synctex = os.path.join(self.directory.name, 'document.synctex')
+        synthetic.generate(self.synctex, pages=150, lines=40, nodes=10,
+                           gzipped=False)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSized(self, stats):
+        """Lists are sized from distinct tags and lines, not from number of
+        friends: about one line per list.
+        """
+        self.assertGreater(stats['friends'], 4 * stats['lists'])
+        self.assertLess(stats['lists'], 2 * stats['used_lists'])
+
+    def test_sizes(self):
+        """Eager, lazy and refreshed scanners have equal lists.
+        """
+        with SyncTeXScanner(self.output_file) as scanner:
+            expected = scanner.friend_stats
+            self.assertSized(expected)
+            scanner.refresh()
+            self.assertEqual(scanner.friend_stats, expected)
+        with SyncTeXScanner(self.output_file, lazy=True) as scanner:
+            scanner.edit_query(2, 100, 100)
+            self.assertEqual(scanner.friend_stats, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Created on Oct 17, 2026
+
+Tests of refreshing scanners after their synctex file changed.
+
+Author: Jan Kumor
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from pysynctex import SyncTeXScanner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'benchmarks'))
+import synthetic  # noqa: E402
+
+PAGES = 100
+
+
+class RefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.directory.name, 'document.pdf')
+        self.synctex = os.path.join(self.directory.name, 'document.synctex')
+        self.generate(0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, seed):
+        synthetic.generate(self.synctex, pages=PAGES, lines=20, nodes=10,
+                           gzipped=False, seed=seed)
+
+    def test_unchanged(self):
+        """Unchanged file has no changed sheet, for eager and lazy scanner.
+        """
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                with SyncTeXScanner(self.output_file, lazy=lazy) as scanner:
+                    scanner.edit_query(1, 100, 100)
+                    self.assertEqual(scanner.refresh(), 0)
+                    self.assertEqual(scanner.refresh(), 0)
+
+    def test_changed(self):
+        """Refreshed scanner answers like scanner of new file.
+        """
+        name = synthetic.input_name(1)
+        with SyncTeXScanner(self.output_file) as scanner:
+            self.generate(1)
+            self.assertGreater(scanner.refresh(), 0)
+            with SyncTeXScanner(self.output_file) as expected:
+                for line in range(1, 50):
+                    self.assertEqual(
+                        scanner.display_query_records(name, line, 0),
+                        expected.display_query_records(name, line, 0))
+
+    def test_concurrent_queries(self):
+        """Refresh waits for queries of other threads, and queries wait
+        for refresh: none of them fails.
+        """
+        scanner = SyncTeXScanner(self.output_file)
+        stop = threading.Event()
+        errors = []
+
+        def query(number):
+            name = synthetic.input_name(number % 8 + 1)
+            count = 0
+            while not stop.is_set():
+                count += 1
+                try:
+                    scanner.edit_query_records(count % PAGES + 1, 300, 400)
+                    scanner.display_query_records(name, count % 200 + 1, 0)
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        threads = [threading.Thread(target=query, args=(number,))
+                   for number in range(8)]
+        for thread in threads:
+            thread.start()
+        try:
+            for seed in range(1, 7):
+                self.generate(seed)
+                scanner.refresh()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            scanner._cleanup()
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Created on Oct 17, 2026
+
+Tests of local query server and its client.
+
+Author: Jan Kumor
+"""
+import os
+import socket
+import stat
+import tempfile
+import unittest
+
+from pysynctex import SyncTeXError
+from pysynctex.server import (SyncTeXClient, SyncTeXServer, _FRAME,
+                              _MAX_REQUEST_SIZE, decode_response)
+
+EXAMPLE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
+                                       'example', 'example.pdf'))
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'synctex.sock')
+        self.server = SyncTeXServer(self.path, workers=1,
+                                    cache_directory=self.directory.name)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.close()
+        self.directory.cleanup()
+
+    def test_socket_mode(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_failed_query_in_batch(self):
+        """Query with invalid arguments fails alone, other queries of batch
+        are answered.
+        """
+        with SyncTeXClient(self.path) as client:
+            results = client.edit_query_many(
+                EXAMPLE, [(0, 100.0, 100.0), (1, 100.0, 100.0)])
+        self.assertEqual(len(results), 2)
+        self.assertIsNone(results[0])
+        self.assertTrue(results[1])
+
+    def test_oversized_frame(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.path)
+            connection.sendall(_FRAME.pack(_MAX_REQUEST_SIZE + 1))
+            header = connection.recv(_FRAME.size, socket.MSG_WAITALL)
+            payload = connection.recv(_FRAME.unpack(header)[0],
+                                      socket.MSG_WAITALL)
+        with self.assertRaisesRegex(SyncTeXError, 'exceeds'):
+            decode_response(payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
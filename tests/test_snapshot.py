@@ -0,0 +1,127 @@
+"""Created on Oct 17, 2026
+
+Tests of scanner snapshots and of their persistent cache.
+
+Author: Jan Kumor
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from pysynctex import SyncTeXCache, SyncTeXScanner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..',
+                                'benchmarks'))
+import synthetic  # noqa: E402
+
+PAGES = 30
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.directory.name, 'document.pdf')
+        self.synctex = os.path.join(self.directory.name, 'document.synctex')
+        self.cache = SyncTeXCache(os.path.join(self.directory.name, 'cache'))
+        self.generate(0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def generate(self, seed):
+        synthetic.generate(self.synctex, pages=PAGES, lines=20, nodes=10,
+                           gzipped=False, seed=seed)
+
+    def rewrite(self, seed):
+        """Generates synctex file again, with later modification time.
+        """
+        stat = os.stat(self.synctex)
+        self.generate(seed)
+        os.utime(self.synctex, ns=(stat.st_atime_ns,
+                                   stat.st_mtime_ns + 10**9))
+
+    def assertAnswers(self, scanner, expected):
+        """Scanner answers edit and display queries like expected scanner.
+        """
+        self.assertEqual(scanner.node_count, expected.node_count)
+        for page in (1, PAGES // 2, PAGES):
+            for h, v in ((72, 100), (200, 400), (300, 700)):
+                self.assertEqual(scanner.edit_query_records(page, h, v),
+                                 expected.edit_query_records(page, h, v))
+        for tag in (1, 2):
+            name = synthetic.input_name(tag)
+            for line in range(1, 60, 3):
+                self.assertEqual(scanner.display_query_records(name, line, 0),
+                                 expected.display_query_records(name, line,
+                                                                0))
+
+    def test_load(self):
+        """Scanner loaded from snapshot answers like parsed scanner.
+        """
+        with SyncTeXScanner(self.output_file) as expected:
+            snapshot = expected.snapshot()
+            with SyncTeXScanner(self.output_file, pars=0) as scanner:
+                self.assertTrue(scanner.load(snapshot))
+                self.assertFalse(scanner.load(snapshot))
+                self.assertAnswers(scanner, expected)
+
+    def test_mapped_twice(self):
+        """Two scanners map the cache entry of one document in one process,
+        the second one can not get the address of the snapshot and relocates
+        its nodes.
+        """
+        with SyncTeXScanner(self.output_file, pars=0) as expected:
+            self.assertFalse(self.cache.open(expected))
+            with SyncTeXScanner(self.output_file, pars=0) as second:
+                with SyncTeXScanner(self.output_file, pars=0) as first:
+                    self.assertTrue(self.cache.open(first))
+                    self.assertTrue(self.cache.open(second))
+                    self.assertAnswers(first, expected)
+                    self.assertAnswers(second, expected)
+                #relocated nodes do not depend on first mapping
+                self.assertAnswers(second, expected)
+
+    def test_touched(self):
+        """Entry of synctex file rewritten with the same content is still up
+        to date.
+        """
+        with SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertFalse(self.cache.open(scanner))
+        self.rewrite(0)
+        with SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertTrue(self.cache.open(scanner))
+
+    def test_stale(self):
+        """Entry of rewritten synctex file is evicted, scanner is parsed again
+        and its new snapshot is cached.
+        """
+        with SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertFalse(self.cache.open(scanner))
+        self.rewrite(1)
+        with SyncTeXScanner(self.output_file) as expected, \
+                SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertFalse(self.cache.open(scanner))
+            self.assertAnswers(scanner, expected)
+            with SyncTeXScanner(self.output_file, pars=0) as cached:
+                self.assertTrue(self.cache.open(cached))
+                self.assertAnswers(cached, expected)
+
+    def test_prune(self):
+        """Pruning removes entries of rewritten and removed synctex files.
+        """
+        with SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertFalse(self.cache.open(scanner))
+        self.assertEqual(self.cache.prune(), 0)
+        self.rewrite(1)
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertFalse(os.path.exists(self.cache.path(self.synctex)))
+        with SyncTeXScanner(self.output_file, pars=0) as scanner:
+            self.assertFalse(self.cache.open(scanner))
+        os.remove(self.synctex)
+        self.assertEqual(self.cache.prune(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -76,11 +76,23 @@ Thu Jun 19 09:39:21 UTC 2008
 #include <string.h>
 #include <errno.h>
 #include <limits.h>
+#include <time.h>
 
 #if defined(HAVE_LOCALE_H)
 #include <locale.h>
 #endif
 
+/*  Snapshots can be mapped from files where mmap is available. */
+#if defined(_WIN32)
+#   define SYNCTEX_CAN_MAP 0
+#else
+#   define SYNCTEX_CAN_MAP 1
+#   include <fcntl.h>
+#   include <unistd.h>
+#   include <sys/mman.h>
+#   include <sys/stat.h>
+#endif
+
 /*  The data is organized in a graph with multiple entries.
  *  The root object is a scanner, it is created with the contents on a synctex file.
  *  Each leaf of the tree is a synctex_node_t object.
@@ -240,6 +252,9 @@ struct __synctex_class_t {
 		SYNCTEX_GETTER(NODE,next_hbox)[0]=NEXT_HBOX;\
 	}
 
+static void _synctex_release_node(synctex_node_t node);
+#   define SYNCTEX_RELEASE(NODE) _synctex_release_node(NODE)
+
 /*  A node is meant to own its child and sibling.
  *  It is not owned by its parent, unless it is its first child.
  *  This destructor is for all nodes with children.
@@ -249,7 +264,7 @@ static void _synctex_free_node(synctex_node_t node) {
 		(*((node->class)->sibling))(node);
 		SYNCTEX_FREE(SYNCTEX_SIBLING(node));
 		SYNCTEX_FREE(SYNCTEX_CHILD(node));
-		free(node);
+		SYNCTEX_RELEASE(node);
 	}
 	return;
 }
@@ -262,7 +277,7 @@ static void _synctex_free_node(synctex_node_t node) {
 static void _synctex_free_leaf(synctex_node_t node) {
 	if (node) {
 		SYNCTEX_FREE(SYNCTEX_SIBLING(node));
-		free(node);
+		SYNCTEX_RELEASE(node);
 	}
 	return;
 }
@@ -272,6 +287,46 @@ static void _synctex_free_leaf(synctex_node_t node) {
 #		include <zlib.h>
 #	endif
 
+/*  The synctex contents of a scanner created from memory, see synctex_scanner_new_with_data.
+ *  Gzipped contents are inflated on the fly, as gzread would do. */
+typedef struct {
+	const char * data;            /*  the contents, owned by the caller */
+	size_t size;
+	size_t next;                  /*  the offset of the next byte to read in data */
+	z_off_t position;             /*  the offset in the inflated contents */
+	int gzipped;
+	int owned;                    /*  whether data is freed with the memory, see synctex_buffering_bulk */
+	z_stream stream;
+} _synctex_memory_t;
+
+/*  An entry of the line index of the scanner, see synctex_scanner_index_lines.
+ *  order is the display order among the nodes with the same tag and line. */
+typedef struct {
+	int tag;
+	int line;
+	int order;
+	synctex_node_t node;
+} _synctex_line_entry_t;
+
+/*  A sheet of a parsed scanner, see synctex_scanner_parse_lazily and synctex_scanner_refresh.
+ *  Until all the sheets of a lazy scanner are parsed, each parsed sheet has its own friend lists.
+ *  The checksums of the content of the sheet tell the sheets which did not change between two parses. */
+typedef struct {
+	synctex_node_t sheet;
+	z_off_t offset;               /*  where the content of the sheet starts in the synctex file */
+	synctex_node_t * friends;     /*  the friend lists of the sheet */
+	int parsed;
+	uLong crc;                    /*  the crc32 of the content of the sheet */
+	uLong adler;                  /*  the adler32 of the content of the sheet */
+	size_t length;                /*  the length of the content of the sheet */
+} _synctex_sheet_entry_t;
+
+/*  An entry of the node table sorted by node address, see _synctex_scanner_node_index. */
+typedef struct {
+	synctex_node_t node;
+	int index;
+} _synctex_node_entry_t;
+
 /*  The synctex scanner is the root object.
  *  Is is initialized with the contents of a text file or a gzipped file.
  *  The buffer_? are first used to parse the text.
@@ -282,13 +337,18 @@ struct __synctex_scanner_t {
 	char * buffer_cur;            /*  current location in the buffer */
 	char * buffer_start;          /*  start of the buffer */
 	char * buffer_end;            /*  end of the buffer */
+	size_t buffer_size;           /*  the length of the buffers of the current parse */
+	synctex_buffering_t buffering;/*  how the contents are read, see synctex_scanner_set_buffering */
+	size_t buffering_size;        /*  the size given with the buffering */
 	char * output_fmt;            /*  dvi or pdf, not yet used */
 	char * output;                /*  the output name used to create the scanner */
 	char * synctex;               /*  the .synctex or .synctex.gz name used to create the scanner */
+	_synctex_memory_t * memory;   /*  the contents when the scanner is created from memory instead of a file */
 	int version;                  /*  1, not yet used */
 	struct {
 		unsigned has_parsed:1;		/*  Whether the scanner has parsed its underlying synctex file. */
-		unsigned reserved:sizeof(unsigned)-1;	/*  alignment */
+		unsigned lazy:1;			/*  Whether the content of the sheets is parsed on demand. */
+		unsigned reserved:sizeof(unsigned)-2;	/*  alignment */
 	} flags;
 	int pre_magnification;        /*  magnification from the synctex preamble */
 	int pre_unit;                 /*  unit from the synctex preamble */
@@ -300,11 +360,98 @@ struct __synctex_scanner_t {
 	float y_offset;               /*  Y Offset, from synctex preamble or post scriptum */
 	synctex_node_t sheet;         /*  The first sheet node, its siblings are the other sheet nodes */
 	synctex_node_t input;         /*  The first input node, its siblings are the other input nodes */
+	int number_of_sheets;         /*  The number of entries in the sheet table */
+	int number_of_unparsed_sheets;/*  The number of sheets whose content is not parsed yet */
+	_synctex_sheet_entry_t * sheets;/*  The sheet table, NULL when the scanner is loaded from a snapshot */
+	char * hash_from;             /*  Where the unhashed content of the last sheet starts in the buffer, while it is parsed */
+	char * sheet_buffer_start;    /*  The buffer of the sheets parsed on demand, it holds the contents of the file */
+	char * sheet_buffer_end;      /*  up to the current position of the file, starting from here */
 	int number_of_lists;          /*  The number of friend lists */
+	int number_of_friend_keys;    /*  About the number of distinct tags and lines of the friends, see _synctex_scanner_add_friend */
 	synctex_node_t * lists_of_friends;/*  The friend lists */
+	int number_of_nodes;          /*  The number of entries in the node table */
+	synctex_node_t * nodes;       /*  The node table, all the nodes in document order, built on demand */
+	int * parents;                /*  The node table index of the parent of each node, -1 for sheets */
+	_synctex_node_entry_t * node_entries;/*  The node table sorted by node address */
+	int line_index_size;          /*  The number of entries in the line index */
+	_synctex_line_entry_t * line_index;/*  The friend nodes sorted by tag and line, built on demand */
+	int number_of_pages;          /*  The number of entries in the page table, built on demand */
+	synctex_node_t * page_sheets; /*  The page table: the sheets in document order */
+	int first_page;               /*  The page of the first entry of the page index */
+	int page_index_size;          /*  The number of entries in the page index */
+	int * page_index;             /*  The position in the page table of each page from first_page, -1 for none */
+	char * arena;                 /*  The snapshot image holding the nodes, names and friend lists of a loaded scanner */
+	size_t mapping_size;          /*  The size of the image when it is mapped from a file, 0 when it is allocated */
+	size_t allocated;             /*  The size of the nodes allocated by the scanner, or of its private snapshot image */
+	int stats_enabled;            /*  Whether the counters are updated */
+	unsigned long long stats[synctex_number_of_stats]; /*  The counters, see synctex_scanner_stats */
 	_synctex_class_t class[synctex_node_number_of_types]; /*  The classes of the nodes of the scanner */
 };
 
+/*  Instrumentation. Counters are only updated when enabled, atomically because the reentrant
+ *  queries can run concurrently. Timers are started at 0 when the counters are disabled. */
+#   if defined(__GNUC__)
+#       define SYNCTEX_STATS_ADD(SCANNER,STAT,VALUE) if ((SCANNER)->stats_enabled) {\
+	__atomic_fetch_add((SCANNER)->stats+(STAT),(unsigned long long)(VALUE),__ATOMIC_RELAXED);\
+}
+#   else
+#       define SYNCTEX_STATS_ADD(SCANNER,STAT,VALUE) if ((SCANNER)->stats_enabled) {\
+	(SCANNER)->stats[STAT] += (unsigned long long)(VALUE);\
+}
+#   endif
+
+static unsigned long long _synctex_clock(void) {
+#   if defined(CLOCK_MONOTONIC)
+	struct timespec now;
+	clock_gettime(CLOCK_MONOTONIC,&now);
+	return (unsigned long long)now.tv_sec*1000000000ULL+(unsigned long long)now.tv_nsec;
+#   else
+	return (unsigned long long)clock()*(1000000000ULL/CLOCKS_PER_SEC);
+#   endif
+}
+
+static unsigned long long _synctex_stats_start(synctex_scanner_t scanner) {
+	return scanner && scanner->stats_enabled?_synctex_clock():0;
+}
+
+static void _synctex_stats_stop(synctex_scanner_t scanner, synctex_stat_t stat, unsigned long long start) {
+	if (start) {
+		SYNCTEX_STATS_ADD(scanner,stat,_synctex_clock()-start);
+	}
+}
+
+static void _synctex_stats_max(synctex_scanner_t scanner, synctex_stat_t stat, unsigned long long value) {
+	if (scanner->stats_enabled) {
+#   if defined(__GNUC__)
+		unsigned long long max = __atomic_load_n(scanner->stats+stat,__ATOMIC_RELAXED);
+		while (value>max && !__atomic_compare_exchange_n(scanner->stats+stat,&max,value,1,__ATOMIC_RELAXED,__ATOMIC_RELAXED));
+#   else
+		if (value>scanner->stats[stat]) {
+			scanner->stats[stat] = value;
+		}
+#   endif
+	}
+}
+
+/*  The initial and the maximum number of friend lists, see _synctex_scanner_resize_friends. */
+#   define SYNCTEX_FRIEND_LISTS 1024
+#   define SYNCTEX_MAX_FRIEND_LISTS (1<<24)
+
+/*  The index of the friend list of the nodes at the given tag and line.
+ *  The lines are spread by a multiplicative hash, such that the consecutive lines of all the inputs
+ *  don't pile up in the same lists as with the sum of the tag and the line. */
+static int _synctex_friend_index(synctex_scanner_t scanner, int tag, int line) {
+	return (int)(((unsigned)line*2654435761u+(unsigned)tag*40503u)%(unsigned)scanner->number_of_lists);
+}
+
+static size_t _synctex_node_size(int type);
+
+/*  Node destructors give the size of the node back to its scanner. */
+static void _synctex_release_node(synctex_node_t node) {
+	node->class->scanner->allocated -= _synctex_node_size(node->class->type);
+	free(node);
+}
+
 /*  SYNCTEX_CUR, SYNCTEX_START and SYNCTEX_END are convenient shortcuts
  */
 #   define SYNCTEX_CUR (scanner->buffer_cur)
@@ -369,6 +516,8 @@ static synctex_node_t _synctex_new_##NAME(synctex_scanner_t scanner) {\
 			SYNCTEX_IMPLEMENT_CHARINDEX(node,0);\
 			++SYNCTEX_CUR;\
 			node->class = scanner->class+synctex_node_type_##NAME;\
+			scanner->allocated += sizeof(synctex_node_##NAME##_t);\
+			SYNCTEX_STATS_ADD(scanner,synctex_stat_nodes+synctex_node_type_##NAME,1);\
 		}\
 		return node;\
 	}\
@@ -692,6 +841,8 @@ static synctex_node_t _synctex_new_input(synctex_scanner_t scanner) {
 		if (node) {
             SYNCTEX_IMPLEMENT_CHARINDEX(node,strlen(SYNCTEX_INPUT_MARK));
 			node->class = scanner->class+synctex_node_type_input;
+			scanner->allocated += sizeof(synctex_input_t);
+			SYNCTEX_STATS_ADD(scanner,synctex_stat_nodes+synctex_node_type_input,1);
 		}
 		return node;
 	}
@@ -702,7 +853,7 @@ static void _synctex_free_input(synctex_node_t node){
 	if (node) {
 		SYNCTEX_FREE(SYNCTEX_SIBLING(node));
 		free(SYNCTEX_NAME(node));
-		free(node);
+		SYNCTEX_RELEASE(node);
 	}
 }
 
@@ -1094,6 +1245,9 @@ static void _synctex_display_boundary(synctex_node_t node) {
  */
 #   define SYNCTEX_BUFFER_MIN_SIZE 16
 #   define SYNCTEX_BUFFER_SIZE 32768
+/*  The default limits of adaptive buffers and of contents inflated in bulk, see synctex_scanner_set_buffering. */
+#   define SYNCTEX_BUFFER_ADAPTIVE_SIZE 1048576
+#   define SYNCTEX_BUFFER_BULK_SIZE 268435456
 
 #	ifdef SYNCTEX_NOTHING
 #       pragma mark -
@@ -1119,6 +1273,128 @@ int synctex_scanner_pre_y_offset(synctex_scanner_t scanner);
 const char * synctex_scanner_get_output_fmt(synctex_scanner_t scanner);
 int _synctex_node_is_box(synctex_node_t node);
 
+/*  The synctex contents are read from the file, or from memory.
+ *  The memory counterparts of gzread, gztell, gzseek and gzclose follow. */
+#   define SYNCTEX_HAS_CONTENTS (SYNCTEX_FILE || scanner->memory)
+
+static int _synctex_memory_read(_synctex_memory_t * memory, char * buffer, size_t size) {
+	int status = Z_OK;
+	if (!memory->gzipped) {
+		if (size > memory->size-memory->next) {
+			size = memory->size-memory->next;
+		}
+		memcpy(buffer,memory->data+memory->next,size);
+		memory->next += size;
+		memory->position += size;
+		return (int)size;
+	}
+	memory->stream.next_out = (Bytef *)buffer;
+	memory->stream.avail_out = (uInt)size;
+	while (memory->stream.avail_out) {
+		memory->stream.next_in = (Bytef *)(memory->data+memory->next);
+		memory->stream.avail_in = (uInt)(memory->size-memory->next);
+		status = inflate(&memory->stream,Z_NO_FLUSH);
+		memory->next = (const char *)memory->stream.next_in-memory->data;
+		if (Z_STREAM_END == status) {
+			/*  gzip files may be made of many members */
+			if (memory->size-memory->next < 2 || memcmp(memory->data+memory->next,"\x1f\x8b",2)
+					|| Z_OK != inflateReset(&memory->stream)) {
+				break;
+			}
+		} else if (Z_BUF_ERROR == status) {
+			/*  truncated contents, what was inflated is returned */
+			break;
+		} else if (Z_OK != status) {
+			_synctex_error("inflate error (%i,%s)",status,memory->stream.msg?memory->stream.msg:"");
+			return -1;
+		}
+	}
+	size -= memory->stream.avail_out;
+	memory->position += size;
+	return (int)size;
+}
+
+static z_off_t _synctex_memory_seek(_synctex_memory_t * memory, z_off_t offset) {
+	char skipped[SYNCTEX_BUFFER_MIN_SIZE*64];
+	if (offset < memory->position) {
+		if (!memory->gzipped) {
+			memory->next = (size_t)offset;
+			return memory->position = offset;
+		}
+		/*  Like gzseek, inflate again from the start */
+		if (Z_OK != inflateReset(&memory->stream)) {
+			return -1;
+		}
+		memory->next = 0;
+		memory->position = 0;
+	}
+	while (memory->position < offset) {
+		size_t size = (size_t)(offset-memory->position);
+		if (_synctex_memory_read(memory,skipped,size<sizeof(skipped)?size:sizeof(skipped))<=0) {
+			return -1;
+		}
+	}
+	return memory->position;
+}
+
+static void _synctex_memory_free(_synctex_memory_t * memory) {
+	if (memory) {
+		if (memory->gzipped) {
+			inflateEnd(&memory->stream);
+		}
+		if (memory->owned) {
+			free((void *)memory->data);
+		}
+		free(memory);
+	}
+}
+
+static int _synctex_read_contents(synctex_scanner_t scanner, char * buffer, size_t size) {
+	return SYNCTEX_FILE?gzread(SYNCTEX_FILE,(void *)buffer,(unsigned)size):_synctex_memory_read(scanner->memory,buffer,size);
+}
+
+static int _synctex_read(synctex_scanner_t scanner, char * buffer, size_t size) {
+	unsigned long long start = _synctex_stats_start(scanner);
+	int read = _synctex_read_contents(scanner,buffer,size);
+	_synctex_stats_stop(scanner,synctex_stat_read_ns,start);
+	if (read>0) {
+		SYNCTEX_STATS_ADD(scanner,synctex_stat_bytes_read,read);
+	}
+	return read;
+}
+
+static z_off_t _synctex_tell(synctex_scanner_t scanner) {
+	return SYNCTEX_FILE?gztell(SYNCTEX_FILE):scanner->memory->position;
+}
+
+static z_off_t _synctex_seek(synctex_scanner_t scanner, z_off_t offset) {
+	return SYNCTEX_FILE?gzseek(SYNCTEX_FILE,offset,SEEK_SET):_synctex_memory_seek(scanner->memory,offset);
+}
+
+/*  Adds the content of the buffer parsed since the last call to the checksums of the last sheet.
+ *  The checksums don't depend on how the content is split. */
+static void _synctex_scanner_hash(synctex_scanner_t scanner) {
+	_synctex_sheet_entry_t * entry = scanner->sheets+scanner->number_of_sheets-1;
+	uInt length = (uInt)(SYNCTEX_CUR-scanner->hash_from);
+	if (length) {
+		entry->crc = crc32(entry->crc,(const Bytef *)scanner->hash_from,length);
+		entry->adler = adler32(entry->adler,(const Bytef *)scanner->hash_from,length);
+		entry->length += length;
+	}
+	scanner->hash_from = SYNCTEX_CUR;
+}
+
+static void _synctex_close(synctex_scanner_t scanner) {
+	if (SYNCTEX_FILE) {
+		gzclose(SYNCTEX_FILE);
+		SYNCTEX_FILE = NULL;
+	}
+	free(scanner->sheet_buffer_start);
+	scanner->sheet_buffer_start = scanner->sheet_buffer_end = NULL;
+	_synctex_memory_free(scanner->memory);
+	scanner->memory = NULL;
+}
+
 /*  Try to ensure that the buffer contains at least size bytes.
  *  Passing a huge size argument means the whole buffer length.
  *  Passing a null size argument means return the available buffer length, without reading the file.
@@ -1135,8 +1411,8 @@ synctex_status_t _synctex_buffer_get_available_size(synctex_scanner_t scanner, s
 		return SYNCTEX_STATUS_BAD_ARGUMENT;
 	}
 #   define size (* size_ptr)
-	if (size>SYNCTEX_BUFFER_SIZE){
-		size = SYNCTEX_BUFFER_SIZE;
+	if (size>scanner->buffer_size){
+		size = scanner->buffer_size;
 	}
 	available = SYNCTEX_END - SYNCTEX_CUR; /*  available is the number of unparsed chars in the buffer */
 	if (size<=available) {
@@ -1144,30 +1420,38 @@ synctex_status_t _synctex_buffer_get_available_size(synctex_scanner_t scanner, s
 		size = available;
 		return SYNCTEX_STATUS_OK;
 	}
-	if (SYNCTEX_FILE) {
+	if (SYNCTEX_HAS_CONTENTS) {
 		/*  Copy the remaining part of the buffer to the beginning,
 		 *  then read the next part of the file */
 		int already_read = 0;
 #   if defined(SYNCTEX_USE_CHARINDEX)
         scanner->charindex_offset += SYNCTEX_CUR - SYNCTEX_START;
 #   endif
+		if (scanner->hash_from) {
+			/*  The parsed part of the buffer is about to be overwritten */
+			_synctex_scanner_hash(scanner);
+			scanner->hash_from = SYNCTEX_START;
+		}
 		if (available) {
 			memmove(SYNCTEX_START, SYNCTEX_CUR, available);
 		}
 		SYNCTEX_CUR = SYNCTEX_START + available; /*  the next character after the move, will change. */
 		/*  Fill the buffer up to its end */
-		already_read = gzread(SYNCTEX_FILE,(void *)SYNCTEX_CUR,(int)(SYNCTEX_BUFFER_SIZE - available));
+		already_read = _synctex_read(scanner,SYNCTEX_CUR,scanner->buffer_size - available);
 		if (already_read>0) {
-			/*  We assume that 0<already_read<=SYNCTEX_BUFFER_SIZE - available, such that
-			 *  SYNCTEX_CUR + already_read = SYNCTEX_START + available  + already_read <= SYNCTEX_START + SYNCTEX_BUFFER_SIZE */
+			/*  We assume that 0<already_read<=buffer_size - available, such that
+			 *  SYNCTEX_CUR + already_read = SYNCTEX_START + available  + already_read <= SYNCTEX_START + buffer_size */
 			SYNCTEX_END = SYNCTEX_CUR + already_read;
-			/*  If the end of the file was reached, all the required SYNCTEX_BUFFER_SIZE - available
+			/*  If the end of the file was reached, all the required buffer_size - available
 			 *  may not be filled with values from the file.
 			 *  In that case, the buffer should stop properly after already_read characters. */
 			* SYNCTEX_END = '\0';
 			SYNCTEX_CUR = SYNCTEX_START;
 			size = SYNCTEX_END - SYNCTEX_CUR; /* == old available + already_read*/
 			return SYNCTEX_STATUS_OK; /*  May be available is less than size, the caller will have to test. */
+		} else if (0>already_read && !SYNCTEX_FILE) {
+			/*  The memory reader already reported the error */
+			return SYNCTEX_STATUS_ERROR;
 		} else if (0>already_read) {
 			/*  There is a possible error in reading the file */
 			int errnum = 0;
@@ -1181,9 +1465,11 @@ synctex_status_t _synctex_buffer_get_available_size(synctex_scanner_t scanner, s
                 return SYNCTEX_STATUS_ERROR;
 			}
 		}
-        /*  Nothing was read, we are at the end of the file. */
-        gzclose(SYNCTEX_FILE);
-        SYNCTEX_FILE = NULL;
+        /*  Nothing was read, we are at the end of the file.
+         *  Lazy scanners keep it open to parse the sheets later. */
+        if (!scanner->flags.lazy) {
+            _synctex_close(scanner);
+        }
         SYNCTEX_END = SYNCTEX_CUR;
         SYNCTEX_CUR = SYNCTEX_START;
         * SYNCTEX_END = '\0';/*  Terminate the string properly.*/
@@ -1271,7 +1557,7 @@ return_OK:
 	} else if (strncmp((char *)SYNCTEX_CUR,the_string,available)) {
 			/*  No need to go further, this is not the expected string in the buffer. */
 			return SYNCTEX_STATUS_NOT_OK;
-	} else if (SYNCTEX_FILE) {
+	} else if (SYNCTEX_HAS_CONTENTS) {
 		/*  The buffer was too small to contain remaining_len characters.
 		 *  We have to cut the string into pieces. */
 		z_off_t offset = 0L;
@@ -1291,7 +1577,7 @@ return_OK:
 		 *  In fact, the states of the buffer before and after this function are in general different
 		 *  but they are totally equivalent as long as the values of the buffer before SYNCTEX_CUR
 		 *  can be safely discarded.  */
-		offset = gztell(SYNCTEX_FILE);
+		offset = _synctex_tell(scanner);
 		/*  offset now corresponds to the first character of the file that was not buffered. */
 		available = SYNCTEX_CUR - SYNCTEX_START; /*  available can be used as temporary placeholder. */
 		/*  available now corresponds to the number of chars that where already buffered and
@@ -1312,7 +1598,7 @@ more_characters:
 		if (available==0) {
 			/*  Missing characters: recover the initial state of the file and return. */
 return_NOT_OK:
-			if (offset != gzseek(SYNCTEX_FILE,offset,SEEK_SET)) {
+			if (offset != _synctex_seek(scanner,offset)) {
 				/*  This is a critical error, we could not recover the previous state. */
 				_synctex_error("can't seek file");
 				return SYNCTEX_STATUS_ERROR;
@@ -1487,7 +1773,21 @@ next_character:
 			if (memcpy((*value_ref)+current_size,SYNCTEX_CUR,len)) {
 				(* value_ref)[new_size]='\0'; /*  Terminate the string */
 				SYNCTEX_CUR = SYNCTEX_END;/*  Advance the cursor to the end of the bufer */
-				return SYNCTEX_STATUS_OK;
+				/*  The line goes on past the buffer: refill it and scan the next part of the line */
+				current_size = new_size;
+				available = 1;
+				status = _synctex_buffer_get_available_size(scanner,&available);
+				if (status<0) {
+					free(* value_ref);
+					* value_ref = NULL;
+					return status;
+				}
+				if (0 == available) {
+					/*  The file ends without a terminating '\n' */
+					return SYNCTEX_STATUS_OK;
+				}
+				end = SYNCTEX_CUR;
+				goto next_character;
 			}
 			free(* value_ref);
 			* value_ref = NULL;
@@ -1966,6 +2266,19 @@ scan_next_line:
     SYNCTEX_RETURN(SYNCTEX_STATUS_ERROR);
 }
 
+/*  Inserts the given node at the head of its list among the given friend lists.
+ *  A node starts a new key unless the head of its list has the same tag and line: the friends of a line
+ *  are mostly inserted in a row, such that the count follows the number of distinct keys without browsing the lists,
+ *  and never falls below it. It sizes the lists, see _synctex_scanner_resize_friends. */
+static void _synctex_scanner_add_friend(synctex_scanner_t scanner, synctex_node_t * lists_of_friends, synctex_node_t node, int tag, int line) {
+	synctex_node_t * list = lists_of_friends+_synctex_friend_index(scanner,tag,line);
+	if (NULL == *list || line != SYNCTEX_LINE(*list) || tag != SYNCTEX_TAG(*list)) {
+		++scanner->number_of_friend_keys;
+	}
+	SYNCTEX_GETTER(node,friend)[0] = *list;
+	*list = node;
+}
+
 /*  Used when parsing the synctex file.
  *  The sheet argument is a newly created sheet node that will hold the contents.
  *  Something is returned in case of error.
@@ -1975,7 +2288,6 @@ synctex_status_t _synctex_scan_sheet(synctex_scanner_t scanner, synctex_node_t s
 	synctex_node_t child = NULL;
 	synctex_node_t sibling = NULL;
 	synctex_node_t box = sheet;
-	int friend_index = 0;
 	synctex_info_t * info = NULL;
 	synctex_status_t status = 0;
 	size_t available = 0;
@@ -2091,9 +2403,7 @@ scan_xobv:
 			++SYNCTEX_CUR;
 			if (NULL != parent && parent->class->type == synctex_node_type_vbox) {
 				#define SYNCTEX_UPDATE_BOX_FRIEND(NODE)\
-				friend_index = ((SYNCTEX_INFO(NODE))[SYNCTEX_TAG_IDX].INT+(SYNCTEX_INFO(NODE))[SYNCTEX_LINE_IDX].INT)%(scanner->number_of_lists);\
-				SYNCTEX_SET_FRIEND(NODE,(scanner->lists_of_friends)[friend_index]);\
-				(scanner->lists_of_friends)[friend_index] = NODE;
+				_synctex_scanner_add_friend(scanner,scanner->lists_of_friends,NODE,(SYNCTEX_INFO(NODE))[SYNCTEX_TAG_IDX].INT,(SYNCTEX_INFO(NODE))[SYNCTEX_LINE_IDX].INT);
 				if (NULL == SYNCTEX_CHILD(parent)) {
 					/*  only void boxes are friends */
 					SYNCTEX_UPDATE_BOX_FRIEND(parent);
@@ -2179,9 +2489,7 @@ scan_xobh:
 				}
 				SYNCTEX_SET_CHILD(parent,child);
 				#define SYNCTEX_UPDATE_FRIEND(NODE)\
-				friend_index = (info[SYNCTEX_TAG_IDX].INT+info[SYNCTEX_LINE_IDX].INT)%(scanner->number_of_lists);\
-				SYNCTEX_SET_FRIEND(NODE,(scanner->lists_of_friends)[friend_index]);\
-				(scanner->lists_of_friends)[friend_index] = NODE;
+				_synctex_scanner_add_friend(scanner,scanner->lists_of_friends,NODE,info[SYNCTEX_TAG_IDX].INT,info[SYNCTEX_LINE_IDX].INT);
 				SYNCTEX_UPDATE_FRIEND(child);
 #               if SYNCTEX_VERBOSE
                     synctex_node_log(child);
@@ -2573,6 +2881,51 @@ sibling_loop:
 #   undef SYNCTEX_DECODE_FAILED
 }
 
+/*  Used when lazily parsing the synctex file, instead of _synctex_scan_sheet.
+ *  The sheet is recorded with the location of its content in the sheet table,
+ *  then everything is gobbled until the closing '}'. */
+/*  Appends a new sheet to the sheet table, its content starts at the current location.
+ *  Then the content is hashed while it is parsed. */
+static synctex_status_t _synctex_scanner_add_sheet(synctex_scanner_t scanner, synctex_node_t sheet) {
+	_synctex_sheet_entry_t * entry = NULL;
+	int n = scanner->number_of_sheets;
+	if (n < 16 ? 0 == n : 0 == (n&(n-1))) {
+		/*  The table is full */
+		if (NULL == (entry = (_synctex_sheet_entry_t *)realloc(scanner->sheets,(n?2*n:16)*sizeof(_synctex_sheet_entry_t)))) {
+			_synctex_error("realloc error");
+			return SYNCTEX_STATUS_ERROR;
+		}
+		scanner->sheets = entry;
+	}
+	entry = scanner->sheets+n;
+	memset(entry,0,sizeof(*entry));
+	entry->sheet = sheet;
+	entry->offset = _synctex_tell(scanner)-(z_off_t)(SYNCTEX_END-SYNCTEX_CUR);
+	entry->adler = adler32(0L,Z_NULL,0);
+	entry->parsed = !scanner->flags.lazy;
+	scanner->number_of_sheets += 1;
+	scanner->number_of_unparsed_sheets += scanner->flags.lazy;
+	scanner->hash_from = SYNCTEX_CUR;
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  Skips the content of a sheet of a lazy scanner. */
+static synctex_status_t _synctex_scan_lazy_sheet(synctex_scanner_t scanner) {
+	unsigned int depth = 1;
+	while (SYNCTEX_CUR<SYNCTEX_END) {
+		if (*SYNCTEX_CUR == SYNCTEX_CHAR_BEGIN_SHEET) {
+			++depth;
+		} else if (*SYNCTEX_CUR == SYNCTEX_CHAR_END_SHEET && 0 == --depth) {
+			return _synctex_next_line(scanner)<SYNCTEX_STATUS_OK?SYNCTEX_STATUS_ERROR:SYNCTEX_STATUS_OK;
+		}
+		if (_synctex_next_line(scanner)<SYNCTEX_STATUS_OK) {
+			break;
+		}
+	}
+	_synctex_error("Uncomplete sheet(3)");
+	return SYNCTEX_STATUS_ERROR;
+}
+
 #   define SYNCTEX_APPEND_SHEET(SCANNER,SHEET) if (SCANNER->sheet) {\
         synctex_node_t last_sheet = SCANNER->sheet;\
         synctex_node_t next_sheet = NULL;\
@@ -2594,7 +2947,8 @@ synctex_status_t _synctex_scan_content(synctex_scanner_t scanner) {
 	}
 	/*  set up the lists of friends */
 	if (NULL == scanner->lists_of_friends) {
-		scanner->number_of_lists = 1024;
+		scanner->number_of_lists = SYNCTEX_FRIEND_LISTS;
+		scanner->number_of_friend_keys = 0;
 		scanner->lists_of_friends = (synctex_node_t *)_synctex_malloc(scanner->number_of_lists*sizeof(synctex_node_t));
 		if (NULL == scanner->lists_of_friends) {
 			_synctex_error("malloc:2");
@@ -2645,9 +2999,21 @@ bail:
 		_synctex_error("Uncomplete file.");
 		goto bail;
 	}
-	status = _synctex_scan_sheet(scanner,sheet);
+	if (_synctex_scanner_add_sheet(scanner,sheet)<SYNCTEX_STATUS_OK) {
+		goto bail;
+	}
+	if (scanner->flags.lazy) {
+		status = _synctex_scan_lazy_sheet(scanner);
+	} else {
+		status = _synctex_scan_sheet(scanner,sheet);
+		SYNCTEX_STATS_ADD(scanner,synctex_stat_sheets_parsed,1);
+	}
+	_synctex_scanner_hash(scanner);
+	scanner->hash_from = NULL;
 	if (status<SYNCTEX_STATUS_OK) {
 		_synctex_error("Bad sheet content.");
+		scanner->number_of_sheets -= 1;
+		scanner->number_of_unparsed_sheets -= scanner->flags.lazy;
 		goto bail;
 	}
 	SYNCTEX_APPEND_SHEET(scanner,sheet);
@@ -2711,6 +3077,45 @@ synctex_scanner_t synctex_scanner_new_with_output_file(const char * output, cons
 	return parse? synctex_scanner_parse(scanner):scanner;
 }
 
+/*  Where the synctex scanner is created from contents in memory. */
+synctex_scanner_t synctex_scanner_new_with_data(const char * output, const char * data, size_t size) {
+	synctex_scanner_t scanner = NULL;
+	_synctex_memory_t * memory = NULL;
+	if (NULL == data || size > UINT_MAX) {
+		return NULL;
+	}
+	if (NULL == (memory = (_synctex_memory_t *)_synctex_malloc(sizeof(_synctex_memory_t)))) {
+		_synctex_error("malloc problem");
+		return NULL;
+	}
+	memory->data = data;
+	memory->size = size;
+	if (size >= 2 && 0 == memcmp(data,"\x1f\x8b",2)) {
+		/*  gzip header only, like gzopen */
+		memory->gzipped = 1;
+		if (Z_OK != inflateInit2(&memory->stream,15+16)) {
+			_synctex_error("inflateInit2 problem");
+			free(memory);
+			return NULL;
+		}
+	}
+	if (NULL == (scanner = (synctex_scanner_t)_synctex_malloc(sizeof(_synctex_scanner_t)))) {
+		_synctex_error("malloc problem");
+		_synctex_memory_free(memory);
+		return NULL;
+	}
+	scanner->memory = memory;
+	/*  The output name only helps resolving input names, it may be void */
+	output = output?output:"";
+	if (NULL == (scanner->output = (char *)malloc(strlen(output)+1))) {
+		_synctex_error("!  synctex_scanner_new_with_data: Memory problem, scanner's output is not reliable.");
+	} else {
+		strcpy(scanner->output,output);
+	}
+	/*  The data is not owned by the scanner, it must be parsed now. */
+	return synctex_scanner_parse(scanner);
+}
+
 /*	This functions opens the file at the "output" given location.
  *  It manages the problem of quoted filenames that appear with pdftex and filenames containing the space character.
  *  In TeXLive 2008, the synctex file created with pdftex did contain unexpected quotes.
@@ -2896,33 +3301,42 @@ void synctex_scanner_free(synctex_scanner_t scanner) {
 	if (NULL == scanner) {
 		return;
 	}
-	if (SYNCTEX_FILE) {
-		gzclose(SYNCTEX_FILE);
-		SYNCTEX_FILE = NULL;
+	_synctex_close(scanner);
+	if (scanner->sheets) {
+		int i = 0;
+		for (i = 0;i<scanner->number_of_sheets;++i) {
+			free(scanner->sheets[i].friends);
+		}
+		free(scanner->sheets);
+	}
+	if (scanner->arena) {
+		/*  nodes, names, friend lists and output format all belong to the arena */
+#   if SYNCTEX_CAN_MAP
+		if (scanner->mapping_size) {
+			munmap(scanner->arena,scanner->mapping_size);
+		} else
+#   endif
+		free(scanner->arena);
+	} else {
+		SYNCTEX_FREE(scanner->sheet);
+		SYNCTEX_FREE(scanner->input);
+		free(scanner->output_fmt);
+		free(scanner->lists_of_friends);
 	}
-	SYNCTEX_FREE(scanner->sheet);
-	SYNCTEX_FREE(scanner->input);
 	free(SYNCTEX_START);
-	free(scanner->output_fmt);
 	free(scanner->output);
 	free(scanner->synctex);
-	free(scanner->lists_of_friends);
+	free(scanner->nodes);
+	free(scanner->parents);
+	free(scanner->node_entries);
+	free(scanner->line_index);
+	free(scanner->page_sheets);
+	free(scanner->page_index);
 	free(scanner);
 }
 
-/*  Where the synctex scanner parses the contents of the file. */
-synctex_scanner_t synctex_scanner_parse(synctex_scanner_t scanner) {
-	synctex_status_t status = 0;
-	if (!scanner || scanner->flags.has_parsed) {
-		return scanner;
-	}
-	scanner->flags.has_parsed=1;
-	scanner->pre_magnification = 1000;
-	scanner->pre_unit = 8192;
-	scanner->pre_x_offset = scanner->pre_y_offset = 578;
-	/*  initialize the offset with a fake unprobable value,
-	 *  If there is a post scriptum section, this value will be overriden by the real life value */
-	scanner->x_offset = scanner->y_offset = 6.027e23f;
+/*  Each scanner owns a copy of the class objects. */
+static void _synctex_scanner_setup_classes(synctex_scanner_t scanner) {
 #   define DEFINE_synctex_scanner_class(NAME)\
 	scanner->class[synctex_node_type_##NAME] = synctex_class_##NAME;\
 	(scanner->class[synctex_node_type_##NAME]).scanner = scanner
@@ -2936,27 +3350,202 @@ synctex_scanner_t synctex_scanner_parse(synctex_scanner_t scanner) {
     DEFINE_synctex_scanner_class(glue);
     DEFINE_synctex_scanner_class(math);
     DEFINE_synctex_scanner_class(boundary);
-	SYNCTEX_START = (char *)malloc(SYNCTEX_BUFFER_SIZE+1); /*  one more character for null termination */
+#   undef DEFINE_synctex_scanner_class
+}
+
+/*  Estimates the size of the inflated contents of the scanner, 0 when unknown.
+ *  gzip files record it, modulo 2^32, in their last 4 bytes. For files made of many gzip members,
+ *  this is the size of the last member only: the estimate is a hint, not a limit. */
+static size_t _synctex_scanner_contents_size(synctex_scanner_t scanner) {
+	unsigned char trailer[4] = {0,0,0,0};
+	size_t size = 0;
+	if (scanner->memory) {
+		if (!scanner->memory->gzipped) {
+			return scanner->memory->size;
+		}
+		if (scanner->memory->size >= 4) {
+			memcpy(trailer,scanner->memory->data+scanner->memory->size-4,4);
+		}
+	} else if (scanner->synctex) {
+		FILE * file = fopen(scanner->synctex,"rb");
+		long length = 0;
+		if (NULL == file) {
+			return 0;
+		}
+		if (2 == fread(trailer,1,2,file) && 0x1f == trailer[0] && 0x8b == trailer[1]) {
+			if (fseek(file,-4,SEEK_END) || 4 != fread(trailer,1,4,file)) {
+				memset(trailer,0,sizeof(trailer));
+			}
+		} else if (0 == fseek(file,0,SEEK_END) && 0 < (length = ftell(file))) {
+			size = (size_t)length;
+		}
+		fclose(file);
+		if (size) {
+			return size;
+		}
+	}
+	return (size_t)trailer[0]|((size_t)trailer[1]<<8)|((size_t)trailer[2]<<16)|((size_t)trailer[3]<<24);
+}
+
+/*  Reads the whole contents of the scanner in memory, inflating them at once, see synctex_buffering_bulk.
+ *  The file is closed, the contents are then read from memory: seeking them is cheap. */
+static synctex_status_t _synctex_scanner_load_contents(synctex_scanner_t scanner, size_t size) {
+	_synctex_memory_t * memory = NULL;
+	char * data = NULL, * more = NULL;
+	size_t length = 0, capacity = size>SYNCTEX_BUFFER_SIZE?size+1:SYNCTEX_BUFFER_SIZE;
+	unsigned long long start = _synctex_stats_start(scanner);
+	int read = 0;
+	if (NULL == (memory = (_synctex_memory_t *)_synctex_malloc(sizeof(_synctex_memory_t)))
+			|| NULL == (data = (char *)malloc(capacity))) {
+		_synctex_error("malloc error");
+		free(memory);
+		return SYNCTEX_STATUS_ERROR;
+	}
+	/*  The estimate is one byte short of the capacity, such that reaching it means the contents are complete */
+	while ((read = _synctex_read_contents(scanner,data+length,capacity-length<UINT_MAX/2?capacity-length:UINT_MAX/2))>0) {
+		length += (size_t)read;
+		if (length == capacity) {
+			if (NULL == (more = (char *)realloc(data,2*capacity))) {
+				_synctex_error("malloc error");
+				read = -1;
+				break;
+			}
+			data = more;
+			capacity *= 2;
+		}
+	}
+	_synctex_stats_stop(scanner,synctex_stat_read_ns,start);
+	if (read<0) {
+		_synctex_error("SyncTeX: can't read the contents");
+		free(data);
+		free(memory);
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (SYNCTEX_FILE) {
+		gzclose(SYNCTEX_FILE);
+		SYNCTEX_FILE = NULL;
+	}
+	_synctex_memory_free(scanner->memory);
+	memory->data = data;
+	memory->size = length;
+	memory->owned = 1;
+	scanner->memory = memory;
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  Sets up how the contents are read by the current parse, see synctex_scanner_set_buffering. */
+static synctex_status_t _synctex_scanner_setup_buffering(synctex_scanner_t scanner) {
+	size_t size = 0, limit = 0;
+	scanner->buffer_size = SYNCTEX_BUFFER_SIZE;
+	if (synctex_buffering_fixed == scanner->buffering) {
+		if (scanner->buffering_size) {
+			scanner->buffer_size = scanner->buffering_size;
+		}
+	} else if (scanner->memory && !scanner->memory->gzipped) {
+		/*  The contents are in memory already, refilling the buffer is a copy */
+		return SYNCTEX_STATUS_OK;
+	} else {
+		size = _synctex_scanner_contents_size(scanner);
+		limit = scanner->buffering_size?scanner->buffering_size:SYNCTEX_BUFFER_BULK_SIZE;
+		if (synctex_buffering_bulk == scanner->buffering && size && size <= limit) {
+			return _synctex_scanner_load_contents(scanner,size);
+		}
+		/*  Adaptive buffers hold about 1/64 of the contents */
+		limit = synctex_buffering_adaptive == scanner->buffering && scanner->buffering_size?scanner->buffering_size:SYNCTEX_BUFFER_ADAPTIVE_SIZE;
+		if (size/64 > scanner->buffer_size) {
+			scanner->buffer_size = size/64<limit?size/64:limit;
+		}
+	}
+	if (SYNCTEX_FILE && scanner->buffer_size > SYNCTEX_BUFFER_SIZE) {
+		/*  zlib reads the file with a buffer of the same size, before the first read only */
+		gzbuffer(SYNCTEX_FILE,(unsigned)scanner->buffer_size);
+	}
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  The friend lists are created with SYNCTEX_FRIEND_LISTS entries while parsing, the number of keys is only known
+ *  once all the sheets are parsed. Then the lists are rehashed to hold about one key each:
+ *  the friends of a key share their list whatever its size, more lists would stay empty.
+ *  The friends keep their order in each list, the order display queries return the nodes in.
+ *  The lists of a loaded snapshot belong to the snapshot and are not resized. */
+static void _synctex_scanner_resize_friends(synctex_scanner_t scanner) {
+	synctex_node_t * lists_of_friends = NULL, * tails = NULL;
+	synctex_node_t node = NULL, next = NULL;
+	int number_of_lists = SYNCTEX_FRIEND_LISTS, count = 0, i = 0, j = 0;
+	if (NULL == scanner->lists_of_friends || scanner->arena) {
+		return;
+	}
+	while (number_of_lists<scanner->number_of_friend_keys && number_of_lists<SYNCTEX_MAX_FRIEND_LISTS) {
+		number_of_lists *= 2;
+	}
+	if (number_of_lists == scanner->number_of_lists) {
+		return;
+	}
+	lists_of_friends = (synctex_node_t *)_synctex_malloc(number_of_lists*sizeof(synctex_node_t));
+	tails = (synctex_node_t *)_synctex_malloc(number_of_lists*sizeof(synctex_node_t));
+	if (NULL == lists_of_friends || NULL == tails) {
+		/*  The lists are kept as they are */
+		free(lists_of_friends);
+		free(tails);
+		return;
+	}
+	count = scanner->number_of_lists;
+	scanner->number_of_lists = number_of_lists;
+	for (i = 0;i<count;++i) {
+		for (node = scanner->lists_of_friends[i];node;node = next) {
+			next = SYNCTEX_FRIEND(node);
+			SYNCTEX_GETTER(node,friend)[0] = NULL;
+			j = _synctex_friend_index(scanner,SYNCTEX_TAG(node),SYNCTEX_LINE(node));
+			if (tails[j]) {
+				SYNCTEX_GETTER(tails[j],friend)[0] = node;
+			} else {
+				lists_of_friends[j] = node;
+			}
+			tails[j] = node;
+		}
+	}
+	free(tails);
+	free(scanner->lists_of_friends);
+	scanner->lists_of_friends = lists_of_friends;
+}
+
+/*  Where the synctex scanner scans the contents of the file, only the sheet structure when the scanner is lazy.
+ *  The scanner has no sheet and no input yet. In case of error, the buffer is freed. */
+static synctex_status_t _synctex_scanner_scan_file(synctex_scanner_t scanner) {
+	synctex_status_t status = 0;
+	scanner->pre_magnification = 1000;
+	scanner->pre_unit = 8192;
+	scanner->pre_x_offset = scanner->pre_y_offset = 578;
+	/*  initialize the offset with a fake unprobable value,
+	 *  If there is a post scriptum section, this value will be overriden by the real life value */
+	scanner->x_offset = scanner->y_offset = 6.027e23f;
+	scanner->unit = 0;
+	scanner->count = 0;
+	_synctex_scanner_setup_classes(scanner);
+	if (_synctex_scanner_setup_buffering(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	SYNCTEX_START = (char *)malloc(scanner->buffer_size+1); /*  one more character for null termination */
 	if (NULL == SYNCTEX_START) {
 		_synctex_error("malloc error");
-		synctex_scanner_free(scanner);
-		return NULL;
+		return SYNCTEX_STATUS_ERROR;
 	}
-	SYNCTEX_END = SYNCTEX_START+SYNCTEX_BUFFER_SIZE;
+	SYNCTEX_END = SYNCTEX_START+scanner->buffer_size;
 	/*  SYNCTEX_END always points to a null terminating character.
 	 *  Maybe there is another null terminating character between SYNCTEX_CUR and SYNCTEX_END-1.
 	 *  At least, we are sure that SYNCTEX_CUR points to a string covering a valid part of the memory. */
 	*SYNCTEX_END = '\0';
 	SYNCTEX_CUR = SYNCTEX_END;
 #   if defined(SYNCTEX_USE_CHARINDEX)
-    scanner->charindex_offset = -SYNCTEX_BUFFER_SIZE;
+    scanner->charindex_offset = -(z_off_t)scanner->buffer_size;
 #   endif
 	status = _synctex_scan_preamble(scanner);
 	if (status<SYNCTEX_STATUS_OK) {
 		_synctex_error("SyncTeX Error: Bad preamble\n");
 bailey:
-		synctex_scanner_free(scanner);
-		return NULL;
+		free(SYNCTEX_START);
+		SYNCTEX_START = SYNCTEX_CUR = SYNCTEX_END = NULL;
+		return SYNCTEX_STATUS_ERROR;
 	}
 	status = _synctex_scan_content(scanner);
 	if (status<SYNCTEX_STATUS_OK) {
@@ -2966,8 +3555,12 @@ bailey:
 	/*  Everything is finished, free the buffer, close the file */
 	free((void *)SYNCTEX_START);
 	SYNCTEX_START = SYNCTEX_CUR = SYNCTEX_END = NULL;
-	gzclose(SYNCTEX_FILE);
-	SYNCTEX_FILE = NULL;
+	if (0 == scanner->number_of_unparsed_sheets) {
+		/*  Lazy scanners keep the file for the sheets */
+		_synctex_close(scanner);
+		scanner->flags.lazy = 0;
+		_synctex_scanner_resize_friends(scanner);
+	}
 	/*  Final tuning: set the default values for various parameters */
 	/*  1 pre_unit = (scanner->pre_unit)/65536 pt = (scanner->pre_unit)/65781.76 bp
 	 * 1 pt = 65536 sp */
@@ -2994,10 +3587,40 @@ bailey:
 		scanner->x_offset /= 65781.76f;
 		scanner->y_offset /= 65781.76f;
 	}
+	return SYNCTEX_STATUS_OK;
+}
+
+static synctex_status_t _synctex_scanner_scan(synctex_scanner_t scanner) {
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_scanner_scan_file(scanner);
+	_synctex_stats_stop(scanner,synctex_stat_parse_ns,start);
+	return status;
+}
+
+/*  Where the synctex scanner parses the contents of the file.
+ *  Scanners created from memory can't be lazy, their contents are not kept. */
+static synctex_scanner_t _synctex_scanner_parse(synctex_scanner_t scanner, synctex_bool_t lazy) {
+	if (!scanner || scanner->flags.has_parsed) {
+		return scanner;
+	}
+	scanner->flags.has_parsed=1;
+	scanner->flags.lazy = lazy && SYNCTEX_FILE;
+	if (_synctex_scanner_scan(scanner)<SYNCTEX_STATUS_OK) {
+		synctex_scanner_free(scanner);
+		return NULL;
+	}
 	return scanner;
 	#undef SYNCTEX_FILE
 }
 
+synctex_scanner_t synctex_scanner_parse(synctex_scanner_t scanner) {
+	return _synctex_scanner_parse(scanner,synctex_NO);
+}
+
+synctex_scanner_t synctex_scanner_parse_lazily(synctex_scanner_t scanner) {
+	return _synctex_scanner_parse(scanner,synctex_YES);
+}
+
 /*  Scanner accessors.
  */
 int synctex_scanner_pre_x_offset(synctex_scanner_t scanner){
@@ -3019,6 +3642,7 @@ void synctex_scanner_display(synctex_scanner_t scanner) {
 	if (NULL == scanner) {
 		return;
 	}
+	synctex_scanner_parse_sheets(scanner);
 	printf("The scanner:\noutput:%s\noutput_fmt:%s\nversion:%i\n",scanner->output,scanner->output_fmt,scanner->version);
 	printf("pre_unit:%i\nx_offset:%i\ny_offset:%i\n",scanner->pre_unit,scanner->pre_x_offset,scanner->pre_y_offset);
 	printf("count:%i\npost_magnification:%f\npost_x_offset:%f\npost_y_offset:%f\n",
@@ -3400,113 +4024,1511 @@ int synctex_node_column(synctex_node_t node) {
 #       pragma mark Sheet
 #   endif
 
-synctex_node_t synctex_sheet(synctex_scanner_t scanner,int page) {
-	if (scanner) {
-		synctex_node_t sheet = scanner->sheet;
-		while(sheet) {
-			if (page == SYNCTEX_PAGE(sheet)) {
-				return sheet;
+/*  Once all the sheets of a lazy scanner are parsed, their friend lists are merged in document order,
+ *  such that the friend lists are exactly the ones of a scanner parsing everything at once.
+ *  Then the scanner is not lazy anymore. */
+static void _synctex_scanner_merge_friends(synctex_scanner_t scanner) {
+	int i = 0, j = 0;
+	for (i = 0;i<scanner->number_of_sheets;++i) {
+		synctex_node_t * friends = scanner->sheets[i].friends;
+		for (j = 0;j<scanner->number_of_lists;++j) {
+			synctex_node_t last = friends[j];
+			if (last) {
+				while (SYNCTEX_FRIEND(last)) {
+					last = SYNCTEX_FRIEND(last);
+				}
+				SYNCTEX_GETTER(last,friend)[0] = scanner->lists_of_friends[j];
+				scanner->lists_of_friends[j] = friends[j];
 			}
-			sheet = SYNCTEX_SIBLING(sheet);
 		}
+		free(friends);
+		scanner->sheets[i].friends = NULL;
 	}
-	return NULL;
+	_synctex_close(scanner);
+	scanner->flags.lazy = 0;
+	_synctex_scanner_resize_friends(scanner);
 }
 
-synctex_node_t synctex_sheet_content(synctex_scanner_t scanner,int page) {
-	if (scanner) {
-		return SYNCTEX_CHILD(synctex_sheet(scanner,page));
+/*  Parses the content of a sheet of a lazy scanner.
+ *  The buffer of the scanner holds the results of the last query, the sheet is parsed with the sheet buffer.
+ *  The file is only sought when the content of the sheet is not in the sheet buffer,
+ *  such that parsing the sheets in order reads the file once: seeking backwards in a gzipped file
+ *  inflates it again from the start. */
+static synctex_status_t _synctex_scanner_parse_sheet(synctex_scanner_t scanner, _synctex_sheet_entry_t * entry) {
+	synctex_node_t * lists_of_friends = scanner->lists_of_friends;
+	char * start = scanner->buffer_start, * cur = scanner->buffer_cur, * end = scanner->buffer_end;
+	synctex_status_t status = SYNCTEX_STATUS_OK;
+	z_off_t position = 0;
+	if (entry->parsed) {
+		return SYNCTEX_STATUS_OK;
 	}
-	return NULL;
+	if (NULL == scanner->sheet_buffer_start
+			&& NULL != (scanner->sheet_buffer_start = (char *)malloc(scanner->buffer_size+1))) {
+		scanner->sheet_buffer_end = scanner->sheet_buffer_start;
+	}
+	if (NULL == (entry->friends = (synctex_node_t *)_synctex_malloc(scanner->number_of_lists*sizeof(synctex_node_t)))
+			|| NULL == scanner->sheet_buffer_start) {
+		_synctex_error("malloc error");
+		status = SYNCTEX_STATUS_ERROR;
+	} else {
+		scanner->buffer_start = scanner->sheet_buffer_start;
+		scanner->buffer_end = scanner->sheet_buffer_end;
+		*scanner->buffer_end = '\0';
+		position = _synctex_tell(scanner)-(z_off_t)(scanner->buffer_end-scanner->buffer_start);
+		if (entry->offset < position || entry->offset > position+(z_off_t)(scanner->buffer_end-scanner->buffer_start)) {
+			/*  The buffer is emptied, it is filled from the content of the sheet */
+			if (entry->offset != _synctex_seek(scanner,entry->offset)) {
+				_synctex_error("can't seek file");
+				status = SYNCTEX_STATUS_ERROR;
+			}
+			position = entry->offset;
+			scanner->buffer_end = scanner->buffer_start;
+			*scanner->buffer_end = '\0';
+		}
+		scanner->buffer_cur = scanner->buffer_start+(entry->offset-position);
+#   if defined(SYNCTEX_USE_CHARINDEX)
+		scanner->charindex_offset = position;
+#   endif
+		if (SYNCTEX_STATUS_OK == status) {
+			unsigned long long start = _synctex_stats_start(scanner);
+			scanner->lists_of_friends = entry->friends;
+			status = _synctex_scan_sheet(scanner,entry->sheet);
+			scanner->lists_of_friends = lists_of_friends;
+			_synctex_stats_stop(scanner,synctex_stat_parse_ns,start);
+			SYNCTEX_STATS_ADD(scanner,synctex_stat_sheets_parsed,1);
+		}
+		/*  The sheet buffer is only valid when the file position is known */
+		scanner->sheet_buffer_end = status<SYNCTEX_STATUS_OK?scanner->sheet_buffer_start:scanner->buffer_end;
+	}
+	scanner->buffer_start = start;
+	scanner->buffer_cur = cur;
+	scanner->buffer_end = end;
+	if (status<SYNCTEX_STATUS_OK) {
+		_synctex_error("Bad sheet content.");
+		SYNCTEX_FREE(SYNCTEX_CHILD(entry->sheet));
+		SYNCTEX_GETTER(entry->sheet,child)[0] = NULL;
+		free(entry->friends);
+		entry->friends = NULL;
+		return SYNCTEX_STATUS_ERROR;
+	}
+	entry->parsed = 1;
+	if (0 == --scanner->number_of_unparsed_sheets) {
+		_synctex_scanner_merge_friends(scanner);
+	}
+	return SYNCTEX_STATUS_OK;
 }
 
-#	ifdef SYNCTEX_NOTHING
-#       pragma mark -
-#       pragma mark Query
-#   endif
+synctex_status_t synctex_scanner_parse_sheets(synctex_scanner_t scanner) {
+	int i = 0;
+	if (NULL == (scanner = synctex_scanner_parse(scanner))) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	while (scanner->number_of_unparsed_sheets && i<scanner->number_of_sheets) {
+		if (_synctex_scanner_parse_sheet(scanner,scanner->sheets+i++)<SYNCTEX_STATUS_OK) {
+			return SYNCTEX_STATUS_ERROR;
+		}
+	}
+	return SYNCTEX_STATUS_OK;
+}
 
-synctex_status_t synctex_display_query(synctex_scanner_t scanner,const char * name,int line,int column) {
+int synctex_scanner_unparsed_sheets(synctex_scanner_t scanner) {
+	return scanner?scanner->number_of_unparsed_sheets:0;
+}
+
+/*  Inserts the given nodes and their descendants in the given friend lists, as the parser does:
+ *  the nodes with no children are inserted in document order. */
+static void _synctex_scanner_replay_friends(synctex_scanner_t scanner, synctex_node_t node, synctex_node_t * lists_of_friends) {
+	while (node) {
+		if (SYNCTEX_CHILD(node)) {
+			_synctex_scanner_replay_friends(scanner,SYNCTEX_CHILD(node),lists_of_friends);
+		} else if (SYNCTEX_CAN_PERFORM(node,friend)) {
+			_synctex_scanner_add_friend(scanner,lists_of_friends,node,SYNCTEX_TAG(node),SYNCTEX_LINE(node));
+		}
+		node = SYNCTEX_SIBLING(node);
+	}
+}
+
+/*  Frees the page table and the page index, see _synctex_scanner_make_page_table. */
+static void _synctex_scanner_release_pages(synctex_scanner_t scanner) {
+	free(scanner->page_sheets);
+	free(scanner->page_index);
+	scanner->page_sheets = NULL;
+	scanner->page_index = NULL;
+	scanner->number_of_pages = scanner->page_index_size = scanner->first_page = 0;
+}
+
+/*  Frees the tables built on demand from the nodes and the results of the last query. */
+static void _synctex_scanner_release_indexes(synctex_scanner_t scanner) {
+	_synctex_scanner_release_pages(scanner);
+	free(scanner->nodes);
+	free(scanner->parents);
+	free(scanner->node_entries);
+	free(scanner->line_index);
+	scanner->nodes = NULL;
+	scanner->parents = NULL;
+	scanner->node_entries = NULL;
+	scanner->line_index = NULL;
+	scanner->number_of_nodes = scanner->line_index_size = 0;
+	free(SYNCTEX_START);
+	SYNCTEX_START = SYNCTEX_CUR = SYNCTEX_END = NULL;
+}
+
+/*  Frees all the sheets, when refreshing fails. */
+static void _synctex_scanner_drop_sheets(synctex_scanner_t scanner) {
+	int i = 0;
+	for (i = 0;i<scanner->number_of_sheets;++i) {
+		free(scanner->sheets[i].friends);
+	}
+	free(scanner->sheets);
+	scanner->sheets = NULL;
+	scanner->number_of_sheets = scanner->number_of_unparsed_sheets = 0;
+	SYNCTEX_FREE(scanner->sheet);
+	scanner->sheet = NULL;
+	_synctex_scanner_release_pages(scanner);
+	if (scanner->lists_of_friends) {
+		memset(scanner->lists_of_friends,0,scanner->number_of_lists*sizeof(synctex_node_t));
+		scanner->number_of_friend_keys = 0;
+	}
+	_synctex_close(scanner);
+	scanner->flags.lazy = 0;
+}
+
+int synctex_scanner_refresh(synctex_scanner_t scanner) {
+	_synctex_sheet_entry_t * sheets = NULL;
+	int number_of_sheets = 0, changed = 0, i = 0, j = 0, k = 0;
+	synctex_bool_t lazy = synctex_NO;
+	synctex_node_t sheet = NULL;
+	gzFile file = NULL;
+	if (NULL == scanner || NULL == scanner->synctex || !scanner->flags.has_parsed) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if (NULL == (file = gzopen(scanner->synctex,"rb"))) {
+		_synctex_error("SyncTeX: could not open %s, error %i\n",scanner->synctex,errno);
+		return SYNCTEX_STATUS_ERROR;
+	}
+	/*  Unparsed sheets of a lazy scanner are parsed lazily again, the other ones are parsed now */
+	lazy = scanner->flags.lazy;
+	_synctex_close(scanner);
+	scanner->file = file;
+	_synctex_scanner_release_indexes(scanner);
+	if (scanner->arena) {
+		/*  The nodes of a loaded scanner belong to the snapshot, none is reused */
+#   if SYNCTEX_CAN_MAP
+		if (scanner->mapping_size) {
+			munmap(scanner->arena,scanner->mapping_size);
+		} else
+#   endif
+		free(scanner->arena);
+		scanner->arena = NULL;
+		scanner->mapping_size = 0;
+		scanner->allocated = 0;
+		scanner->lists_of_friends = NULL;
+	} else {
+		sheets = scanner->sheets;
+		number_of_sheets = scanner->number_of_sheets;
+		for (i = 0;i<number_of_sheets;++i) {
+			free(sheets[i].friends);
+			sheets[i].friends = NULL;
+			SYNCTEX_GETTER(sheets[i].sheet,sibling)[0] = NULL;
+		}
+		SYNCTEX_FREE(scanner->input);
+		free(scanner->output_fmt);
+		/*  The lists are created again with the default size, they are resized once complete */
+		free(scanner->lists_of_friends);
+		scanner->lists_of_friends = NULL;
+	}
+	scanner->sheet = scanner->input = NULL;
+	scanner->output_fmt = NULL;
+	scanner->sheets = NULL;
+	scanner->number_of_sheets = scanner->number_of_unparsed_sheets = 0;
+	/*  Scan the sheet structure and the checksums of the new file */
+	scanner->flags.lazy = 1;
+	if (_synctex_scanner_scan(scanner)<SYNCTEX_STATUS_OK) {
+		_synctex_error("SyncTeX Error: Can't refresh\n");
+		goto bail;
+	}
+	for (i = 0;i<scanner->number_of_sheets;++i) {
+		SYNCTEX_GETTER(scanner->sheets[i].sheet,sibling)[0] = NULL;
+	}
+	/*  Reuse the parsed sheets with the same content, most likely found in the same order.
+	 *  Sheets with the content of a sheet never parsed are unchanged too, they stay unparsed. */
+	for (i = 0;i<scanner->number_of_sheets;++i) {
+		_synctex_sheet_entry_t * entry = scanner->sheets+i;
+		for (j = 0;j<number_of_sheets;++j) {
+			_synctex_sheet_entry_t * old = sheets+(k+j)%number_of_sheets;
+			if (old->sheet && old->length == entry->length
+					&& old->crc == entry->crc && old->adler == entry->adler) {
+				if (old->parsed) {
+					SYNCTEX_FREE(entry->sheet);
+					entry->sheet = old->sheet;
+					entry->parsed = 1;
+					old->sheet = NULL;
+					scanner->number_of_unparsed_sheets -= 1;
+				} else {
+					SYNCTEX_FREE(old->sheet);
+					old->sheet = NULL;
+				}
+				k = (k+j+1)%number_of_sheets;
+				break;
+			}
+		}
+		if (j == number_of_sheets) {
+			++changed;
+		}
+	}
+	for (j = 0;j<number_of_sheets;++j) {
+		SYNCTEX_FREE(sheets[j].sheet);
+	}
+	free(sheets);
+	sheets = NULL;
+	number_of_sheets = 0;
+	for (i = scanner->number_of_sheets;i-->0;) {
+		SYNCTEX_GETTER(scanner->sheets[i].sheet,sibling)[0] = sheet;
+		sheet = scanner->sheets[i].sheet;
+	}
+	scanner->sheet = sheet;
+	/*  Rebuild the friend lists, as if the sheets were parsed lazily */
+	if (0 == scanner->number_of_unparsed_sheets) {
+		for (i = 0;i<scanner->number_of_sheets;++i) {
+			_synctex_scanner_replay_friends(scanner,SYNCTEX_CHILD(scanner->sheets[i].sheet),scanner->lists_of_friends);
+		}
+		_synctex_close(scanner);
+		scanner->flags.lazy = 0;
+		_synctex_scanner_resize_friends(scanner);
+		return 0;
+	}
+	for (i = 0;i<scanner->number_of_sheets;++i) {
+		_synctex_sheet_entry_t * entry = scanner->sheets+i;
+		if (entry->parsed) {
+			if (NULL == (entry->friends = (synctex_node_t *)_synctex_malloc(scanner->number_of_lists*sizeof(synctex_node_t)))) {
+				_synctex_error("malloc error");
+				goto bail;
+			}
+			_synctex_scanner_replay_friends(scanner,SYNCTEX_CHILD(entry->sheet),entry->friends);
+		}
+	}
+	if (!lazy && synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK) {
+		goto bail;
+	}
+	return changed;
+bail:
+	for (j = 0;j<number_of_sheets;++j) {
+		SYNCTEX_FREE(sheets[j].sheet);
+	}
+	free(sheets);
+	_synctex_scanner_drop_sheets(scanner);
+	return SYNCTEX_STATUS_ERROR;
+}
+
+/*  The page table lists the sheets in document order, the order of the sheet table when there is one.
+ *  The page index gives the position of each page in the page table, the first sheet of a page wins.
+ *  Pages are numbered from 1 by the engine, the index has no entry for pages too far apart
+ *  to be indexed compactly: their sheets are looked for in the page table.
+ *  Both are built once on demand, they change when the scanner is refreshed. */
+static synctex_status_t _synctex_scanner_make_page_table(synctex_scanner_t scanner) {
+	synctex_node_t sheet = NULL;
+	int count = 0, i = 0, first = 0, last = 0, size = 0;
+	if (scanner->page_sheets) {
+		return SYNCTEX_STATUS_OK;
+	}
+	if (scanner->sheets) {
+		count = scanner->number_of_sheets;
+	} else {
+		for (sheet = scanner->sheet;sheet;sheet = SYNCTEX_SIBLING(sheet)) {
+			++count;
+		}
+	}
+	if (NULL == (scanner->page_sheets = (synctex_node_t *)malloc((count+1)*sizeof(synctex_node_t)))) {
+		_synctex_error("malloc error");
+		return SYNCTEX_STATUS_ERROR;
+	}
+	for (i = 0,sheet = scanner->sheet;i<count;++i) {
+		scanner->page_sheets[i] = scanner->sheets?scanner->sheets[i].sheet:sheet;
+		sheet = scanner->sheets?NULL:SYNCTEX_SIBLING(sheet);
+		first = i && first<SYNCTEX_PAGE(scanner->page_sheets[i])?first:SYNCTEX_PAGE(scanner->page_sheets[i]);
+		last = i && last>SYNCTEX_PAGE(scanner->page_sheets[i])?last:SYNCTEX_PAGE(scanner->page_sheets[i]);
+	}
+	scanner->number_of_pages = count;
+	size = count?last-first+1:0;
+	if (size > 0 && size <= 2*count+64
+			&& NULL != (scanner->page_index = (int *)malloc(size*sizeof(int)))) {
+		scanner->first_page = first;
+		scanner->page_index_size = size;
+		for (i = 0;i<size;++i) {
+			scanner->page_index[i] = -1;
+		}
+		for (i = count-1;i>=0;--i) {
+			scanner->page_index[SYNCTEX_PAGE(scanner->page_sheets[i])-first] = i;
+		}
+	}
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  Returns the position in the page table of the first sheet of the given page, -1 if there is none. */
+static int _synctex_scanner_page_position(synctex_scanner_t scanner, int page) {
+	int i = 0;
+	if (scanner->page_index) {
+		i = page-scanner->first_page;
+		return i>=0 && i<scanner->page_index_size?scanner->page_index[i]:-1;
+	}
+	for (i = 0;i<scanner->number_of_pages;++i) {
+		if (page == SYNCTEX_PAGE(scanner->page_sheets[i])) {
+			return i;
+		}
+	}
+	return -1;
+}
+
+synctex_node_t synctex_sheet(synctex_scanner_t scanner,int page) {
+	int i = 0;
+	if (NULL == scanner || _synctex_scanner_make_page_table(scanner)<SYNCTEX_STATUS_OK
+			|| 0 > (i = _synctex_scanner_page_position(scanner,page))) {
+		return NULL;
+	}
+	if (scanner->sheets) {
+		/*  the sheet is parsed on demand */
+		return _synctex_scanner_parse_sheet(scanner,scanner->sheets+i)<SYNCTEX_STATUS_OK?NULL:scanner->sheets[i].sheet;
+	}
+	return scanner->page_sheets[i];
+}
+
+int synctex_scanner_page_count(synctex_scanner_t scanner) {
+	if (NULL == (scanner = synctex_scanner_parse(scanner))
+			|| _synctex_scanner_make_page_table(scanner)<SYNCTEX_STATUS_OK) {
+		return 0;
+	}
+	return scanner->number_of_pages;
+}
+
+int synctex_scanner_page(synctex_scanner_t scanner, int index) {
+	if (synctex_scanner_page_count(scanner) <= index || index < 0) {
+		return 0;
+	}
+	return SYNCTEX_PAGE(scanner->page_sheets[index]);
+}
+
+synctex_node_t synctex_sheet_content(synctex_scanner_t scanner,int page) {
+	if (scanner) {
+		return SYNCTEX_CHILD(synctex_sheet(scanner,page));
+	}
+	return NULL;
+}
+
+#	ifdef SYNCTEX_NOTHING
+#       pragma mark -
+#       pragma mark Node table
+#   endif
+
+/*  The node table lists all the nodes of the scanner in document order:
+ *  each sheet is followed by its content, depth first, the parent before its children.
+ *  It is built once on demand, the tree does not change after parsing. */
+static int _synctex_count_nodes(synctex_node_t node) {
+	int count = 0;
+	while (node) {
+		count += 1+_synctex_count_nodes(SYNCTEX_CHILD(node));
+		node = SYNCTEX_SIBLING(node);
+	}
+	return count;
+}
+static void _synctex_fill_node_table(synctex_node_t * nodes, int * parents, synctex_node_t node, int parent, int * index_ref) {
+	while (node) {
+		int index = (*index_ref)++;
+		nodes[index] = node;
+		parents[index] = parent;
+		_synctex_fill_node_table(nodes,parents,SYNCTEX_CHILD(node),index,index_ref);
+		node = SYNCTEX_SIBLING(node);
+	}
+}
+static int _synctex_node_entry_compare(const void * left, const void * right) {
+	const _synctex_node_entry_t * l = left;
+	const _synctex_node_entry_t * r = right;
+	return l->node < r->node?-1:(l->node > r->node?1:0);
+}
+/*  The node table is published last, such that a scanner with a node table is ready for concurrent readers. */
+static synctex_status_t _synctex_scanner_make_node_table(synctex_scanner_t scanner) {
+	int count = 0, index = 0;
+	synctex_node_t * nodes = NULL;
+	if (synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (scanner->nodes) {
+		return SYNCTEX_STATUS_OK;
+	}
+	/*  The reentrant queries look for sheets too */
+	if (_synctex_scanner_make_page_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	count = _synctex_count_nodes(scanner->sheet);
+	nodes = (synctex_node_t *)malloc((count+1)*sizeof(synctex_node_t));
+	scanner->parents = (int *)malloc((count+1)*sizeof(int));
+	scanner->node_entries = (_synctex_node_entry_t *)malloc((count+1)*sizeof(_synctex_node_entry_t));
+	if (NULL == nodes || NULL == scanner->parents || NULL == scanner->node_entries) {
+		_synctex_error("malloc error");
+		free(nodes);
+		free(scanner->parents);
+		free(scanner->node_entries);
+		scanner->parents = NULL;
+		scanner->node_entries = NULL;
+		return SYNCTEX_STATUS_ERROR;
+	}
+	_synctex_fill_node_table(nodes,scanner->parents,scanner->sheet,-1,&index);
+	for (index = 0;index<count;++index) {
+		scanner->node_entries[index].node = nodes[index];
+		scanner->node_entries[index].index = index;
+	}
+	qsort(scanner->node_entries,count,sizeof(_synctex_node_entry_t),&_synctex_node_entry_compare);
+	scanner->number_of_nodes = count;
+	scanner->nodes = nodes;
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  Returns the index of node in the node table, -1 if node does not belong to it. */
+static int _synctex_scanner_node_index(synctex_scanner_t scanner, synctex_node_t node) {
+	_synctex_node_entry_t key = {NULL,0};
+	_synctex_node_entry_t * entry = NULL;
+	key.node = node;
+	entry = bsearch(&key,scanner->node_entries,scanner->number_of_nodes,sizeof(_synctex_node_entry_t),&_synctex_node_entry_compare);
+	return entry?entry->index:-1;
+}
+
+int synctex_scanner_node_count(synctex_scanner_t scanner) {
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return 0;
+	}
+	return scanner->number_of_nodes;
+}
+
+size_t synctex_scanner_memory(synctex_scanner_t scanner) {
+	size_t memory = 0;
+	int i = 0;
+	if (NULL == scanner) {
+		return 0;
+	}
+	memory = sizeof(_synctex_scanner_t)+scanner->allocated;
+	if (NULL == scanner->arena) {
+		memory += scanner->number_of_lists*sizeof(synctex_node_t);
+	}
+	if (scanner->sheets) {
+		memory += scanner->number_of_sheets*sizeof(_synctex_sheet_entry_t);
+		for (i = 0;i<scanner->number_of_sheets;++i) {
+			if (scanner->sheets[i].friends) {
+				memory += scanner->number_of_lists*sizeof(synctex_node_t);
+			}
+		}
+	}
+	if (scanner->nodes) {
+		memory += scanner->number_of_nodes*(sizeof(synctex_node_t)+sizeof(int)+sizeof(_synctex_node_entry_t));
+	}
+	memory += scanner->line_index_size*sizeof(_synctex_line_entry_t);
+	if (scanner->page_sheets) {
+		memory += (scanner->number_of_pages+1)*sizeof(synctex_node_t)+scanner->page_index_size*sizeof(int);
+	}
+	if (scanner->sheet_buffer_start) {
+		memory += scanner->buffer_size+1;
+	}
+	if (SYNCTEX_START && SYNCTEX_START != scanner->sheet_buffer_start) {
+		memory += scanner->buffer_size+1;
+	}
+	if (scanner->memory && scanner->memory->owned) {
+		memory += scanner->memory->size;
+	}
+	return memory;
+}
+
+synctex_status_t synctex_scanner_set_buffering(synctex_scanner_t scanner, synctex_buffering_t buffering, size_t size) {
+	if (NULL == scanner || buffering < synctex_buffering_fixed || buffering > synctex_buffering_bulk
+			|| (size && size < SYNCTEX_BUFFER_MIN_SIZE) || (synctex_buffering_bulk != buffering && size >= UINT_MAX/2)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	scanner->buffering = buffering;
+	scanner->buffering_size = size;
+	return SYNCTEX_STATUS_OK;
+}
+
+void synctex_scanner_set_stats(synctex_scanner_t scanner, int enabled) {
+	if (scanner) {
+		if (enabled && !scanner->stats_enabled) {
+			memset(scanner->stats,0,sizeof(scanner->stats));
+		}
+		scanner->stats_enabled = enabled != 0;
+	}
+}
+
+synctex_status_t synctex_scanner_stats(synctex_scanner_t scanner, char * buffer, size_t size) {
+	if (NULL == scanner || NULL == buffer || size < sizeof(scanner->stats)
+			|| ((size_t)buffer)%sizeof(unsigned long long)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	memcpy(buffer,scanner->stats,sizeof(scanner->stats));
+	return synctex_number_of_stats;
+}
+
+synctex_status_t synctex_scanner_friend_stats(synctex_scanner_t scanner, char * buffer, size_t size) {
+	int * stats = (int *)buffer;
+	int i = 0, length = 0;
+	synctex_node_t node = NULL;
+	if (NULL == buffer || size < synctex_number_of_friend_stats*sizeof(int) || ((size_t)buffer)%sizeof(int)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if (synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	memset(stats,0,synctex_number_of_friend_stats*sizeof(int));
+	stats[synctex_friend_stat_lists] = scanner->lists_of_friends?scanner->number_of_lists:0;
+	for (i = 0;i<stats[synctex_friend_stat_lists];++i) {
+		for (node = scanner->lists_of_friends[i], length = 0;node;node = SYNCTEX_FRIEND(node)) {
+			++length;
+		}
+		if (length) {
+			stats[synctex_friend_stat_friends] += length;
+			stats[synctex_friend_stat_used_lists] += 1;
+			if (length>stats[synctex_friend_stat_longest_list]) {
+				stats[synctex_friend_stat_longest_list] = length;
+			}
+		}
+	}
+	return synctex_number_of_friend_stats;
+}
+
+synctex_node_t synctex_scanner_node(synctex_scanner_t scanner, int index) {
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK
+			|| index < 0 || index >= scanner->number_of_nodes) {
+		return NULL;
+	}
+	return scanner->nodes[index];
+}
+
+/*  The box of a node is the node itself if it is a box, its parent otherwise, NULL for sheets and top level nodes. */
+static synctex_node_t _synctex_export_box(synctex_node_t node) {
+	if (SYNCTEX_IS_BOX(node)) {
+		return node;
+	}
+	node = SYNCTEX_PARENT(node);
+	return node && node->class->type != synctex_node_type_sheet?node:NULL;
+}
+
+/*  Unlike the public accessors, only the informations actually stored by each kind of node are read,
+ *  missing ones are exported as 0. The item of each field is stored at field*stride in the given buffer,
+ *  such that the informations of many nodes are organized by columns or by rows. */
+static void _synctex_export_node(synctex_node_t node, int page, int parent, int * ints, int stride) {
+	float * floats = (float *)ints;
+#   define SYNCTEX_EXPORT_INT(FIELD) ints[(FIELD)*stride]
+#   define SYNCTEX_EXPORT_FLOAT(FIELD) floats[(FIELD)*stride]
+	synctex_node_t box = NULL;
+	synctex_node_type_t type = node->class->type;
+	float unit = node->class->scanner->unit;
+	float x_offset = node->class->scanner->x_offset;
+	float y_offset = node->class->scanner->y_offset;
+	int field = 0;
+	for (field = 0;field<synctex_number_of_fields;++field) {
+		ints[field*stride] = 0;
+	}
+	SYNCTEX_EXPORT_INT(synctex_field_type) = type;
+	SYNCTEX_EXPORT_INT(synctex_field_parent) = parent;
+	SYNCTEX_EXPORT_INT(synctex_field_column) = -1;
+	SYNCTEX_EXPORT_INT(synctex_field_page) = page;
+	if (type == synctex_node_type_sheet) {
+		return;
+	} else if (type == synctex_node_type_input) {
+		/*  Input nodes only store a tag and a name */
+		SYNCTEX_EXPORT_INT(synctex_field_tag) = SYNCTEX_TAG(node);
+		return;
+	}
+	SYNCTEX_EXPORT_INT(synctex_field_tag) = SYNCTEX_TAG(node);
+	SYNCTEX_EXPORT_INT(synctex_field_line) = SYNCTEX_LINE(node);
+	SYNCTEX_EXPORT_INT(synctex_field_mean_line) = SYNCTEX_LINE(node);
+	SYNCTEX_EXPORT_INT(synctex_field_h) = SYNCTEX_HORIZ(node);
+	SYNCTEX_EXPORT_INT(synctex_field_v) = SYNCTEX_VERT(node);
+	SYNCTEX_EXPORT_FLOAT(synctex_field_visible_h) = SYNCTEX_HORIZ(node)*unit+x_offset;
+	SYNCTEX_EXPORT_FLOAT(synctex_field_visible_v) = SYNCTEX_VERT(node)*unit+y_offset;
+	/*  Fall through: the bigger nodes also store the informations of the smaller ones. */
+	switch(type) {
+		case synctex_node_type_hbox:
+			SYNCTEX_EXPORT_INT(synctex_field_mean_line) = SYNCTEX_MEAN_LINE(node);
+			SYNCTEX_EXPORT_INT(synctex_field_child_count) = SYNCTEX_NODE_WEIGHT(node);
+		case synctex_node_type_vbox:
+		case synctex_node_type_void_vbox:
+		case synctex_node_type_void_hbox:
+			SYNCTEX_EXPORT_INT(synctex_field_height) = SYNCTEX_HEIGHT(node);
+			SYNCTEX_EXPORT_INT(synctex_field_depth) = SYNCTEX_DEPTH(node);
+		case synctex_node_type_kern:
+		case synctex_node_type_math:
+			SYNCTEX_EXPORT_INT(synctex_field_width) = SYNCTEX_WIDTH(node);
+			SYNCTEX_EXPORT_FLOAT(synctex_field_visible_width) = SYNCTEX_WIDTH(node)*unit;
+		default:
+			break;
+	}
+	if (type == synctex_node_type_hbox) {
+		SYNCTEX_EXPORT_INT(synctex_field_horiz_v) = SYNCTEX_HORIZ_V(node);
+		SYNCTEX_EXPORT_INT(synctex_field_vert_v) = SYNCTEX_VERT_V(node);
+		SYNCTEX_EXPORT_INT(synctex_field_width_v) = SYNCTEX_WIDTH_V(node);
+		SYNCTEX_EXPORT_INT(synctex_field_height_v) = SYNCTEX_HEIGHT_V(node);
+		SYNCTEX_EXPORT_INT(synctex_field_depth_v) = SYNCTEX_DEPTH_V(node);
+	} else if (SYNCTEX_IS_BOX(node)) {
+		SYNCTEX_EXPORT_INT(synctex_field_horiz_v) = SYNCTEX_HORIZ(node);
+		SYNCTEX_EXPORT_INT(synctex_field_vert_v) = SYNCTEX_VERT(node);
+		SYNCTEX_EXPORT_INT(synctex_field_width_v) = SYNCTEX_WIDTH(node);
+		SYNCTEX_EXPORT_INT(synctex_field_height_v) = SYNCTEX_HEIGHT(node);
+		SYNCTEX_EXPORT_INT(synctex_field_depth_v) = SYNCTEX_DEPTH(node);
+	}
+	if ((box = _synctex_export_box(node))) {
+		SYNCTEX_EXPORT_INT(synctex_field_box_h) = SYNCTEX_HORIZ(box);
+		SYNCTEX_EXPORT_INT(synctex_field_box_v) = SYNCTEX_VERT(box);
+		SYNCTEX_EXPORT_INT(synctex_field_box_width) = SYNCTEX_WIDTH(box);
+		SYNCTEX_EXPORT_INT(synctex_field_box_height) = SYNCTEX_HEIGHT(box);
+		SYNCTEX_EXPORT_INT(synctex_field_box_depth) = SYNCTEX_DEPTH(box);
+		if (box->class->type == synctex_node_type_hbox) {
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_h) = SYNCTEX_HORIZ_V(box)*unit+x_offset;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_v) = SYNCTEX_VERT_V(box)*unit+y_offset;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_width) = SYNCTEX_WIDTH_V(box)*unit;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_height) = SYNCTEX_HEIGHT_V(box)*unit;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_depth) = SYNCTEX_DEPTH_V(box)*unit;
+		} else {
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_h) = SYNCTEX_HORIZ(box)*unit+x_offset;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_v) = SYNCTEX_VERT(box)*unit+y_offset;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_width) = SYNCTEX_WIDTH(box)*unit;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_height) = SYNCTEX_HEIGHT(box)*unit;
+			SYNCTEX_EXPORT_FLOAT(synctex_field_box_visible_depth) = SYNCTEX_DEPTH(box)*unit;
+		}
+	}
+#   undef SYNCTEX_EXPORT_INT
+#   undef SYNCTEX_EXPORT_FLOAT
+}
+
+synctex_status_t synctex_scanner_export(synctex_scanner_t scanner, char * buffer, size_t size) {
+	int n = 0, i = 0, page = 0;
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = scanner->number_of_nodes;
+	if (NULL == buffer || ((size_t)buffer)%sizeof(int)
+			|| size < (size_t)n*synctex_number_of_fields*sizeof(int)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;++i) {
+		synctex_node_t node = scanner->nodes[i];
+		if (node->class->type == synctex_node_type_sheet) {
+			page = SYNCTEX_PAGE(node);
+		}
+		_synctex_export_node(node,page,scanner->parents[i],(int *)buffer+i,n);
+	}
+	return n;
+}
+
+/*  The page of a node is the page of its sheet. */
+static int _synctex_export_page(synctex_node_t node) {
+	while (SYNCTEX_PARENT(node)) {
+		node = SYNCTEX_PARENT(node);
+	}
+	return node->class->type == synctex_node_type_sheet?SYNCTEX_PAGE(node):0;
+}
+
+synctex_status_t synctex_node_export(synctex_node_t node, char * buffer, size_t size) {
+	if (NULL == node || NULL == buffer || ((size_t)buffer)%sizeof(int)
+			|| size < synctex_number_of_fields*sizeof(int)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	/*  The node table is not built here: its index of the parent is only known when it exists */
+	_synctex_export_node(node,_synctex_export_page(node),
+			SYNCTEX_PARENT(node)?_synctex_scanner_node_index(node->class->scanner,SYNCTEX_PARENT(node)):-1,
+			(int *)buffer,1);
+	return 1;
+}
+
+int synctex_scanner_export_nodes(synctex_scanner_t scanner, const char * indices, size_t count, char * buffer, size_t size) {
+	const int * index = (const int *)indices;
+	int n = 0, i = 0;
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = (int)(count/sizeof(int));
+	if (NULL == indices || ((size_t)indices)%sizeof(int) || NULL == buffer || ((size_t)buffer)%sizeof(int)
+			|| size < (size_t)n*synctex_number_of_fields*sizeof(int)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;++i) {
+		synctex_node_t node = NULL;
+		if (index[i] < 0 || index[i] >= scanner->number_of_nodes) {
+			return SYNCTEX_STATUS_BAD_ARGUMENT;
+		}
+		node = scanner->nodes[index[i]];
+		_synctex_export_node(node,_synctex_export_page(node),scanner->parents[index[i]],
+				(int *)buffer+i*synctex_number_of_fields,1);
+	}
+	return n;
+}
+
+int synctex_scanner_select(synctex_scanner_t scanner, int start, int types, int first_page, int last_page, int tag, char * buffer, size_t size) {
+	int * indices = (int *)buffer;
+	int n = 0, count = 0, i = 0, page = 0;
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = (int)(size/sizeof(int));
+	if (NULL == buffer || ((size_t)buffer)%sizeof(int) || start < 0) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if (start < scanner->number_of_nodes) {
+		/*  The page of the first node is the one of its sheet, then each sheet gives the page of its content */
+		page = _synctex_export_page(scanner->nodes[start]);
+	}
+	for (i = start;i<scanner->number_of_nodes && count<n;++i) {
+		synctex_node_t node = scanner->nodes[i];
+		synctex_node_type_t type = node->class->type;
+		if (type == synctex_node_type_sheet) {
+			page = SYNCTEX_PAGE(node);
+		}
+		if ((types && !(types & (1<<type)))
+				|| (first_page && page < first_page)
+				|| (last_page && page > last_page)
+				|| (tag && (type == synctex_node_type_sheet || SYNCTEX_TAG(node) != tag))) {
+			continue;
+		}
+		indices[count++] = i;
+	}
+	return count;
+}
+
+/*  Converts a box in TeX coordinates to a rectangle in page coordinates multiplied by scale,
+ *  as left, top, right and bottom. A box spans from v-height to v+depth, widths may be negative. */
+static void _synctex_rectangle(synctex_scanner_t scanner, int h, int v, int width, int height, int depth, float scale, float * rectangle) {
+	float left = (h*scanner->unit+scanner->x_offset)*scale;
+	float right = ((h+width)*scanner->unit+scanner->x_offset)*scale;
+	float top = ((v-height)*scanner->unit+scanner->y_offset)*scale;
+	float bottom = ((v+depth)*scanner->unit+scanner->y_offset)*scale;
+	rectangle[0] = left<right?left:right;
+	rectangle[1] = top<bottom?top:bottom;
+	rectangle[2] = left<right?right:left;
+	rectangle[3] = top<bottom?bottom:top;
+}
+
+/*  The box of a node is its visible box, the one of synctex_edit_query, for boxes.
+ *  The other nodes are boxes with the dimensions they store, glues and boundaries are points. */
+static void _synctex_node_rectangle(synctex_node_t node, float scale, float * rectangle) {
+	int h = 0, v = 0, width = 0, height = 0, depth = 0;
+	/*  Fall through: the bigger nodes also store the informations of the smaller ones. */
+	switch(node->class->type) {
+		case synctex_node_type_hbox:
+			h = SYNCTEX_HORIZ_V(node);
+			v = SYNCTEX_VERT_V(node);
+			width = SYNCTEX_WIDTH_V(node);
+			height = SYNCTEX_HEIGHT_V(node);
+			depth = SYNCTEX_DEPTH_V(node);
+			break;
+		case synctex_node_type_vbox:
+		case synctex_node_type_void_vbox:
+		case synctex_node_type_void_hbox:
+			height = SYNCTEX_HEIGHT(node);
+			depth = SYNCTEX_DEPTH(node);
+		case synctex_node_type_kern:
+		case synctex_node_type_math:
+			width = SYNCTEX_WIDTH(node);
+		case synctex_node_type_glue:
+		case synctex_node_type_boundary:
+			h = SYNCTEX_HORIZ(node);
+			v = SYNCTEX_VERT(node);
+		default:
+			break;
+	}
+	_synctex_rectangle(node->class->scanner,h,v,width,height,depth,scale,rectangle);
+}
+
+int synctex_scanner_rectangles(synctex_scanner_t scanner, const char * indices, size_t count, float scale, char * buffer, size_t size) {
+	const int * index = (const int *)indices;
+	int n = 0, i = 0;
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK || 0 >= scanner->unit) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = (int)(count/sizeof(int));
+	if (NULL == indices || ((size_t)indices)%sizeof(int) || NULL == buffer || ((size_t)buffer)%sizeof(float)
+			|| size < (size_t)n*4*sizeof(float)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;++i) {
+		if (index[i] < 0 || index[i] >= scanner->number_of_nodes) {
+			return SYNCTEX_STATUS_BAD_ARGUMENT;
+		}
+		_synctex_node_rectangle(scanner->nodes[index[i]],scale,(float *)buffer+4*i);
+	}
+	return n;
+}
+
+int synctex_scanner_tex_to_page(synctex_scanner_t scanner, const char * boxes, size_t count, float scale, char * buffer, size_t size) {
+	const int * box = (const int *)boxes;
+	int n = 0, i = 0;
+	if (NULL == (scanner = synctex_scanner_parse(scanner)) || 0 >= scanner->unit) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = (int)(count/(5*sizeof(int)));
+	if (NULL == boxes || ((size_t)boxes)%sizeof(int) || NULL == buffer || ((size_t)buffer)%sizeof(float)
+			|| size < (size_t)n*4*sizeof(float)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;++i,box += 5) {
+		_synctex_rectangle(scanner,box[0],box[1],box[2],box[3],box[4],scale,(float *)buffer+4*i);
+	}
+	return n;
+}
+
+static int _synctex_round(double value) {
+	return (int)(value<0?value-0.5:value+0.5);
+}
+
+int synctex_scanner_page_to_tex(synctex_scanner_t scanner, const char * points, size_t count, float scale, char * buffer, size_t size) {
+	const float * point = (const float *)points;
+	int * tex = (int *)buffer;
+	int n = 0, i = 0;
+	if (NULL == (scanner = synctex_scanner_parse(scanner)) || 0 >= scanner->unit || 0 >= scale) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	n = (int)(count/(2*sizeof(float)));
+	if (NULL == points || ((size_t)points)%sizeof(float) || NULL == buffer || ((size_t)buffer)%sizeof(int)
+			|| size < (size_t)n*2*sizeof(int)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;++i) {
+		tex[2*i] = _synctex_round((point[2*i]/scale-scanner->x_offset)/scanner->unit);
+		tex[2*i+1] = _synctex_round((point[2*i+1]/scale-scanner->y_offset)/scanner->unit);
+	}
+	return n;
+}
+
+#	ifdef SYNCTEX_NOTHING
+#       pragma mark -
+#       pragma mark Snapshot
+#   endif
+
+/*  A snapshot is the image of the parsed node tree: a header, a table of classes, then from the
+ *  next page boundary the node records in node table order, the input records, the friend lists,
+ *  the input names and the output format. Records are the nodes as they are in memory, pointers
+ *  included: a pointer is the base address of the snapshot plus the offset of its target
+ *  in the image, the class of a node points into the table of classes. The base address is chosen
+ *  when the snapshot is made, so that a snapshot mapped from a file at its base address is used
+ *  in place: only the table of classes is written, node records are never touched and their
+ *  pages stay shared with the page cache and with other processes mapping the same file.
+ *  Anywhere else the pointers are relocated. Snapshots are bound to the build of the library
+ *  that created them, which is checked with format, pointer and node sizes. */
+#   define SYNCTEX_SNAPSHOT_MAGIC "SyncTeX"
+#   define SYNCTEX_SNAPSHOT_FORMAT 3
+#   define SYNCTEX_SNAPSHOT_PAGE_SIZE 4096
+
+typedef struct {
+	char magic[8];
+	int format;
+	int pointer_size;
+	int node_size;
+	int number_of_nodes;
+	int number_of_inputs;
+	int number_of_lists;
+	int version;
+	int pre_magnification;
+	int pre_unit;
+	int pre_x_offset;
+	int pre_y_offset;
+	int count;
+	float unit;
+	float x_offset;
+	float y_offset;
+	size_t size;          /*  size of the image, header included */
+	size_t base;          /*  the address the pointers of the image are relative to */
+	size_t classes;       /*  the offset of the table of classes */
+	size_t records;       /*  the offset of the first node record, page aligned */
+	size_t sheet;         /*  the scanner pointers, relative to base like the others, 0 for NULL */
+	size_t input;
+	size_t lists_of_friends;
+	size_t output_fmt;
+} _synctex_snapshot_header_t;
+
+static size_t _synctex_node_size(int type) {
+	switch(type) {
+		case synctex_node_type_input: return sizeof(synctex_input_t);
+		case synctex_node_type_sheet: return sizeof(synctex_node_sheet_t);
+		case synctex_node_type_vbox: return sizeof(synctex_node_vbox_t);
+		case synctex_node_type_void_vbox: return sizeof(synctex_node_void_vbox_t);
+		case synctex_node_type_hbox: return sizeof(synctex_node_hbox_t);
+		case synctex_node_type_void_hbox: return sizeof(synctex_node_void_hbox_t);
+		case synctex_node_type_kern: return sizeof(synctex_node_kern_t);
+		case synctex_node_type_glue: return sizeof(synctex_node_glue_t);
+		case synctex_node_type_math: return sizeof(synctex_node_math_t);
+		case synctex_node_type_boundary: return sizeof(synctex_node_boundary_t);
+		default: return 0;
+	}
+}
+
+/*  The navigation pointers of a node come first in its implementation, before its info. */
+static int _synctex_node_number_of_pointers(synctex_node_t node) {
+	return (int)((synctex_info_t *)SYNCTEX_INFO(node)-(synctex_info_t *)&(node->implementation));
+}
+
+static size_t _synctex_snapshot_offset(synctex_scanner_t scanner, size_t base, size_t * offsets, synctex_node_t node) {
+	int index = 0;
+	if (NULL == node) {
+		return 0;
+	}
+	index = _synctex_scanner_node_index(scanner,node);
+	return index<0?0:base+offsets[index];
+}
+
+/*  The base address of a snapshot, derived from the synctex file name so that the snapshots
+ *  of different documents mapped by one process do not compete for the same address.
+ *  It lies far from the places where programs and their heaps usually live.
+ *  Prelinking is only worth it with 64 bits addresses, 0 means that the image is always relocated. */
+static size_t _synctex_snapshot_base(synctex_scanner_t scanner) {
+	unsigned long hash = 2166136261UL;
+	const char * ptr = scanner->synctex;
+	if (sizeof(size_t) < 8) {
+		return 0;
+	}
+	while (ptr && *ptr) {
+		hash = ((hash^(unsigned char)*ptr++)*16777619UL)&0xFFFFFFFFUL;
+	}
+	/*  0x100000000000 plus a multiple of 4GB, below 0x500000000000 */
+	return ((size_t)1<<44)+(((size_t)(hash&0x3FFF))<<32);
+}
+
+synctex_status_t synctex_scanner_snapshot(synctex_scanner_t scanner, char * buffer, size_t size) {
+	_synctex_snapshot_header_t header;
+	size_t * offsets = NULL;
+	size_t offset = 0, names = 0, base = 0;
+	synctex_node_t node = NULL;
+	int i = 0, j = 0;
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (scanner->arena) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	memset(&header,0,sizeof(header));
+	strcpy(header.magic,SYNCTEX_SNAPSHOT_MAGIC);
+	header.format = SYNCTEX_SNAPSHOT_FORMAT;
+	header.pointer_size = sizeof(synctex_info_t);
+	header.node_size = sizeof(synctex_node_hbox_t);
+	header.number_of_nodes = scanner->number_of_nodes;
+	header.number_of_lists = scanner->number_of_lists;
+	header.version = scanner->version;
+	header.pre_magnification = scanner->pre_magnification;
+	header.pre_unit = scanner->pre_unit;
+	header.pre_x_offset = scanner->pre_x_offset;
+	header.pre_y_offset = scanner->pre_y_offset;
+	header.count = scanner->count;
+	header.unit = scanner->unit;
+	header.x_offset = scanner->x_offset;
+	header.y_offset = scanner->y_offset;
+	header.base = base = _synctex_snapshot_base(scanner);
+	/*  First the layout */
+	header.classes = (sizeof(header)+sizeof(synctex_info_t)-1)/sizeof(synctex_info_t)*sizeof(synctex_info_t);
+	header.records = offset = (header.classes+sizeof(scanner->class)+SYNCTEX_SNAPSHOT_PAGE_SIZE-1)
+		/SYNCTEX_SNAPSHOT_PAGE_SIZE*SYNCTEX_SNAPSHOT_PAGE_SIZE;
+	if (NULL == (offsets = (size_t *)malloc((scanner->number_of_nodes+1)*sizeof(size_t)))) {
+		_synctex_error("malloc error");
+		return SYNCTEX_STATUS_ERROR;
+	}
+	for (i = 0;i<scanner->number_of_nodes;++i) {
+		offsets[i] = offset;
+		offset += _synctex_node_size(scanner->nodes[i]->class->type);
+	}
+	header.input = scanner->input?base+offset:0;
+	for (node = scanner->input;node;node = SYNCTEX_SIBLING(node)) {
+		++header.number_of_inputs;
+		offset += sizeof(synctex_input_t);
+	}
+	header.lists_of_friends = base+offset;
+	offset += scanner->number_of_lists*sizeof(synctex_node_t);
+	names = offset;
+	for (node = scanner->input;node;node = SYNCTEX_SIBLING(node)) {
+		offset += strlen(SYNCTEX_NAME(node))+1;
+	}
+	if (scanner->output_fmt) {
+		header.output_fmt = base+offset;
+		offset += strlen(scanner->output_fmt)+1;
+	}
+	header.size = offset;
+	header.sheet = scanner->number_of_nodes?base+header.records:0;
+	if (size < header.size) {
+		free(offsets);
+		return header.size;
+	}
+	if (NULL == buffer || ((size_t)buffer)%sizeof(synctex_info_t)) {
+		free(offsets);
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	/*  Then the contents, the table of classes is filled when loading */
+	memset(buffer,0,header.size);
+	memcpy(buffer,&header,sizeof(header));
+	for (i = 0;i<scanner->number_of_nodes;++i) {
+		synctex_node_t record = (synctex_node_t)(buffer+offsets[i]);
+		synctex_node_t * pointers = (synctex_node_t *)&(record->implementation);
+		node = scanner->nodes[i];
+		memcpy(record,node,_synctex_node_size(node->class->type));
+		record->class = (synctex_class_t)(base+header.classes+node->class->type*sizeof(_synctex_class_t));
+		for (j = _synctex_node_number_of_pointers(node);j--;) {
+			pointers[j] = (synctex_node_t)_synctex_snapshot_offset(scanner,base,offsets,pointers[j]);
+		}
+	}
+	offset = header.input-base;
+	for (node = scanner->input;node;node = SYNCTEX_SIBLING(node)) {
+		synctex_node_t record = (synctex_node_t)(buffer+offset);
+		synctex_info_t * implementation = (synctex_info_t *)&(record->implementation);
+		memcpy(record,node,sizeof(synctex_input_t));
+		record->class = (synctex_class_t)(base+header.classes+synctex_node_type_input*sizeof(_synctex_class_t));
+		offset += sizeof(synctex_input_t);
+		/*  sibling, then SYNCTEX_TAG and SYNCTEX_NAME */
+		implementation[0].PTR = SYNCTEX_SIBLING(node)?(char *)(base+offset):NULL;
+		implementation[1+SYNCTEX_NAME_IDX].PTR = (char *)(base+names);
+		strcpy(buffer+names,SYNCTEX_NAME(node));
+		names += strlen(SYNCTEX_NAME(node))+1;
+	}
+	for (i = 0;i<scanner->number_of_lists;++i) {
+		((synctex_node_t *)(buffer+header.lists_of_friends-base))[i] =
+			(synctex_node_t)_synctex_snapshot_offset(scanner,base,offsets,scanner->lists_of_friends[i]);
+	}
+	if (scanner->output_fmt) {
+		strcpy(buffer+header.output_fmt-base,scanner->output_fmt);
+	}
+	free(offsets);
+	return header.size;
+}
+
+/*  Relocates in place the pointers of the image, whose classes are already set up. */
+static synctex_status_t _synctex_snapshot_relocate(_synctex_snapshot_header_t * header, char * image) {
+	size_t offset = header->records, end = header->lists_of_friends-header->base;
+	size_t delta = (size_t)image-header->base;
+	size_t classes = header->base+header->classes;
+	int i = 0, j = 0;
+#   define SYNCTEX_RELOCATE(VALUE, TYPE) if ((size_t)(VALUE)) {\
+		if ((size_t)(VALUE)-header->base < header->records || (size_t)(VALUE)-header->base >= header->size) {\
+			return SYNCTEX_STATUS_ERROR;\
+		}\
+		VALUE = (TYPE)((size_t)(VALUE)+delta);\
+	}
+	if (end < header->records || end > header->size || end+header->number_of_lists*sizeof(synctex_node_t) > header->size) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	for (i = 0;i<header->number_of_nodes+header->number_of_inputs;++i) {
+		synctex_node_t node = (synctex_node_t)(image+offset);
+		synctex_node_t * pointers = (synctex_node_t *)&(node->implementation);
+		size_t type = ((size_t)node->class-classes)/sizeof(_synctex_class_t);
+		size_t size = 0;
+		if (offset+sizeof(*node) > end || (size_t)node->class < classes
+				|| ((size_t)node->class-classes)%sizeof(_synctex_class_t)
+				|| type >= synctex_node_number_of_types
+				|| 0 == (size = _synctex_node_size(type)) || offset+size > end) {
+			return SYNCTEX_STATUS_ERROR;
+		}
+		node->class = (synctex_class_t)((size_t)node->class+delta);
+		for (j = _synctex_node_number_of_pointers(node);j--;) {
+			SYNCTEX_RELOCATE(pointers[j],synctex_node_t);
+		}
+		if (type == synctex_node_type_input) {
+			SYNCTEX_RELOCATE(SYNCTEX_NAME(node),char *);
+		}
+		offset += size;
+	}
+	for (i = 0;i<header->number_of_lists;++i) {
+		SYNCTEX_RELOCATE(((synctex_node_t *)(image+end))[i],synctex_node_t);
+	}
+#   undef SYNCTEX_RELOCATE
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  Makes the scanner use the nodes of the given image, as if it had parsed the synctex file.
+ *  The image is relocated unless it lies at its base address. */
+static synctex_status_t _synctex_scanner_load_image(synctex_scanner_t scanner, char * image, size_t size) {
+	_synctex_snapshot_header_t header;
+	size_t delta = 0;
+	if (NULL == scanner || scanner->flags.has_parsed || NULL == image || size < sizeof(header)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	memcpy(&header,image,sizeof(header));
+	if (strncmp(header.magic,SYNCTEX_SNAPSHOT_MAGIC,sizeof(header.magic))
+			|| header.format != SYNCTEX_SNAPSHOT_FORMAT
+			|| header.pointer_size != sizeof(synctex_info_t)
+			|| header.node_size != sizeof(synctex_node_hbox_t)
+			|| header.size != size
+			|| header.classes < sizeof(header) || header.classes%sizeof(synctex_info_t)
+			|| header.records < header.classes+sizeof(scanner->class) || header.records > size
+			|| header.number_of_nodes < 0 || header.number_of_inputs < 0 || header.number_of_lists <= 0
+			|| ((size_t)image)%sizeof(synctex_info_t)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	_synctex_scanner_setup_classes(scanner);
+	memcpy(image+header.classes,scanner->class,sizeof(scanner->class));
+	delta = (size_t)image-header.base;
+	if (delta && _synctex_snapshot_relocate(&header,image)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+#   define SYNCTEX_ADDRESS(VALUE) ((VALUE)?(VALUE)+delta:0)
+	scanner->version = header.version;
+	scanner->pre_magnification = header.pre_magnification;
+	scanner->pre_unit = header.pre_unit;
+	scanner->pre_x_offset = header.pre_x_offset;
+	scanner->pre_y_offset = header.pre_y_offset;
+	scanner->count = header.count;
+	scanner->unit = header.unit;
+	scanner->x_offset = header.x_offset;
+	scanner->y_offset = header.y_offset;
+	scanner->number_of_lists = header.number_of_lists;
+	scanner->sheet = (synctex_node_t)SYNCTEX_ADDRESS(header.sheet);
+	scanner->input = (synctex_node_t)SYNCTEX_ADDRESS(header.input);
+	scanner->lists_of_friends = (synctex_node_t *)SYNCTEX_ADDRESS(header.lists_of_friends);
+	scanner->output_fmt = (char *)SYNCTEX_ADDRESS(header.output_fmt);
+#   undef SYNCTEX_ADDRESS
+	scanner->arena = image;
+	scanner->flags.has_parsed = 1;
+	_synctex_close(scanner);
+	return SYNCTEX_STATUS_OK;
+}
+
+synctex_status_t synctex_scanner_load(synctex_scanner_t scanner, const char * snapshot, size_t size) {
+	synctex_status_t status = 0;
+	char * image = NULL;
+	if (NULL == snapshot || size < sizeof(_synctex_snapshot_header_t)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if (NULL == (image = (char *)malloc(size))) {
+		_synctex_error("malloc error");
+		return SYNCTEX_STATUS_ERROR;
+	}
+	memcpy(image,snapshot,size);
+	if ((status = _synctex_scanner_load_image(scanner,image,size))<SYNCTEX_STATUS_OK) {
+		free(image);
+		return status;
+	}
+	scanner->allocated = size;
+	return status;
+}
+
+#   if SYNCTEX_CAN_MAP
+synctex_status_t synctex_scanner_map(synctex_scanner_t scanner, const char * path, size_t offset) {
+	_synctex_snapshot_header_t header;
+	struct stat info;
+	synctex_status_t status = 0;
+	char * image = NULL;
+	size_t size = 0;
+	int fd = 0;
+	if (NULL == scanner || scanner->flags.has_parsed || NULL == path
+			|| offset%(size_t)sysconf(_SC_PAGESIZE)) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if ((fd = open(path,O_RDONLY))<0) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (fstat(fd,&info) || (size_t)info.st_size < offset+sizeof(header)
+			|| pread(fd,&header,sizeof(header),(off_t)offset) != (ssize_t)sizeof(header)) {
+		close(fd);
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	size = (size_t)info.st_size-offset;
+	/*  The base address is only a hint, the image is relocated wherever it is mapped.
+	 *  The mapping is private: what is written, the classes or the relocated pointers, is not shared. */
+	image = (char *)mmap((void *)header.base,size,PROT_READ|PROT_WRITE,MAP_PRIVATE,fd,(off_t)offset);
+	close(fd);
+	if (MAP_FAILED == (void *)image) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if ((status = _synctex_scanner_load_image(scanner,image,size))<SYNCTEX_STATUS_OK) {
+		munmap(image,size);
+		return status;
+	}
+	scanner->mapping_size = size;
+	if ((size_t)image != header.base) {
+		/*  relocated pages are private copies */
+		scanner->allocated = size;
+		return SYNCTEX_STATUS_NOT_OK;
+	}
+	return SYNCTEX_STATUS_OK;
+}
+#   else
+synctex_status_t synctex_scanner_map(synctex_scanner_t scanner, const char * path, size_t offset) {
+	return SYNCTEX_STATUS_BAD_ARGUMENT;
+}
+#   endif
+
+#	ifdef SYNCTEX_NOTHING
+#       pragma mark -
+#       pragma mark Query
+#   endif
+
+/*  The results of a query, an array of nodes from start to end.
+ *  The scanner's buffer holds the results of the last non reentrant query,
+ *  to be retrieved with synctex_next_result. */
+typedef struct {
+	char * start;
+	char * cur;
+	char * end;
+	int visited;  /*  The number of friends or boxes browsed, for the counters */
+} _synctex_results_t;
+
+/*  Counts a query of the given kind, synctex_stat_display_queries or synctex_stat_edit_queries,
+ *  followed by its time, its visited nodes and the maximum of them. */
+static void _synctex_stats_query(synctex_scanner_t scanner, synctex_stat_t kind, _synctex_results_t * results, unsigned long long start) {
+	if (scanner && scanner->stats_enabled) {
+		SYNCTEX_STATS_ADD(scanner,kind,1);
+		_synctex_stats_stop(scanner,kind+1,start);
+		SYNCTEX_STATS_ADD(scanner,kind+2,results->visited);
+		_synctex_stats_max(scanner,kind+3,results->visited);
+	}
+}
+
+/*  The non reentrant queries store their results in the scanner's buffer. */
+static void _synctex_scanner_keep_results(synctex_scanner_t scanner,_synctex_results_t * results) {
+	free(SYNCTEX_START);
+	SYNCTEX_START = results->start;
+	SYNCTEX_CUR = results->cur;
+	SYNCTEX_END = results->end;
+}
+
+/*  Given the nodes matching a display query in display order, stored in results,
+ *  reorders them to put first the one which fits best and keeps only one node per parent.
+ *  Returns the number of results. */
+static synctex_status_t _synctex_display_query_keep_best(_synctex_results_t * results) {
+	unsigned int best_match = -1;
+	unsigned int next_match = -1;
+	unsigned int best_weight = 0;
+	synctex_node_t * best_ref   = NULL;
+	synctex_node_t * start_ref = NULL;
+	synctex_node_t * end_ref   = NULL;
+	synctex_node_t node = NULL;
+	/*  Now reorder the nodes to put first the one which fits best.
+	 *  The idea is to walk along the list of nodes and pick up the first one
+	 *  which line info is exactly the mean line of its parent, or at least very close.
+	 *  Then we choose among all such node the one with the maximum number of child nodes.
+	 *  Then we switch with the first node.
+	 */
+	best_ref = start_ref = (synctex_node_t *)results->start;
+	node = *start_ref;
+	best_match = abs(SYNCTEX_LINE(node)-SYNCTEX_MEAN_LINE(SYNCTEX_PARENT(node)));
+	end_ref = (synctex_node_t *)results->end;
+	while (++start_ref<end_ref) {
+		synctex_node_t parent = NULL;
+		node = *start_ref;
+		parent = SYNCTEX_PARENT(node);
+		next_match = abs(SYNCTEX_LINE(node)-SYNCTEX_MEAN_LINE(parent));
+		if (next_match < best_match
+				|| (next_match == best_match && SYNCTEX_NODE_WEIGHT(parent)>best_weight)) {
+			best_match = next_match;
+			best_ref = start_ref;
+			best_weight = SYNCTEX_NODE_WEIGHT(parent);
+		}
+	}
+	node = *best_ref;
+	*best_ref = *(synctex_node_t *)results->start;
+	*(synctex_node_t *)results->start = node;
+	/*  Basically, we keep the first node for each parent.
+	 *  More precisely, we keep only nodes that are not children of
+	 *  their predecessor's parent. */
+	start_ref = (synctex_node_t *)results->start;
+	end_ref   = (synctex_node_t *)results->start;
+next_end:
+	end_ref += 1; /*  we allways have start_ref<= end_ref*/
+	if (end_ref < (synctex_node_t *)results->end) {
+		node = *end_ref;
+		while ((node = SYNCTEX_PARENT(node))) {
+			if (SYNCTEX_PARENT(*start_ref) == node) {
+				goto next_end;
+			}
+		}
+		start_ref += 1;
+		*start_ref = *end_ref;
+		goto next_end;
+	}
+	start_ref += 1;
+	results->end = (char *)start_ref;
+	results->cur = NULL;// added on behalf of Jose Alliste
+	return (results->end-results->start)/sizeof(synctex_node_t);// added on behalf Jan Sundermeyer
+}
+
+/*  The line index lists all the friend nodes sorted by tag, line and display order.
+ *  In each friend list, the nodes are in reverse display order. */
+static int _synctex_line_entry_compare(const void * left, const void * right) {
+	const _synctex_line_entry_t * l = left;
+	const _synctex_line_entry_t * r = right;
+	if (l->tag != r->tag) {
+		return l->tag < r->tag?-1:1;
+	}
+	if (l->line != r->line) {
+		return l->line < r->line?-1:1;
+	}
+	return l->order < r->order?-1:(l->order > r->order?1:0);
+}
+
+/*  Like the node table, the line index is published last. */
+synctex_status_t synctex_scanner_index_lines(synctex_scanner_t scanner) {
+	int i = 0, count = 0, order = 0;
+	synctex_node_t node = NULL;
+	_synctex_line_entry_t * line_index = NULL;
+	if (synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (scanner->line_index) {
+		return scanner->line_index_size;
+	}
+	for (i = 0;i<scanner->number_of_lists;++i) {
+		for (node = scanner->lists_of_friends[i];node;node = SYNCTEX_FRIEND(node)) {
+			++count;
+		}
+	}
+	if (NULL == (line_index = (_synctex_line_entry_t *)malloc((count+1)*sizeof(_synctex_line_entry_t)))) {
+		_synctex_error("malloc error");
+		return SYNCTEX_STATUS_ERROR;
+	}
+	count = 0;
+	for (i = 0;i<scanner->number_of_lists;++i) {
+		for (node = scanner->lists_of_friends[i], order = 0;node;node = SYNCTEX_FRIEND(node)) {
+			_synctex_line_entry_t * entry = line_index+count++;
+			entry->tag = SYNCTEX_TAG(node);
+			entry->line = SYNCTEX_LINE(node);
+			entry->order = --order;
+			entry->node = node;
+		}
+	}
+	qsort(line_index,count,sizeof(_synctex_line_entry_t),&_synctex_line_entry_compare);
+	scanner->line_index_size = count;
+	scanner->line_index = line_index;
+	return count;
+}
+
+/*  The number of lines display queries look at, from the given line up to the first one with nodes.
+ *  This was the number of friend lists before they were sized after the document. */
+#   define SYNCTEX_DISPLAY_LINES 1024
+
+/*  Same as synctex_display_query but using the line index:
+ *  the first line with nodes is found by binary search instead of browsing the friend lists. */
+static synctex_status_t _synctex_display_query_indexed(synctex_scanner_t scanner,_synctex_results_t * results,int tag,int line) {
+	_synctex_line_entry_t * first = scanner->line_index;
+	_synctex_line_entry_t * last = scanner->line_index+scanner->line_index_size;
+	_synctex_line_entry_t * entry = NULL;
+	synctex_node_type_t min_types[3] = {synctex_node_type_boundary,synctex_node_type_kern,synctex_node_type_error};
+	int i = 0, count = 0;
+	/*  first entry not before (tag,line) */
+	while (first<last) {
+		entry = first+(last-first)/2;
+		if (entry->tag<tag || (entry->tag == tag && entry->line<line)) {
+			first = entry+1;
+		} else {
+			last = entry;
+		}
+	}
+	last = scanner->line_index+scanner->line_index_size;
+	if (first == last || first->tag != tag) {
+		return 0;
+	}
+#   if defined(__SYNCTEX_STRONG_DISPLAY_QUERY__)
+	if (first->line != line) {
+#   else
+	if (line < INT_MAX-SYNCTEX_DISPLAY_LINES && first->line >= line+SYNCTEX_DISPLAY_LINES) {
+#   endif
+		return 0;
+	}
+	line = first->line;
+	for (entry = first;entry<last && entry->tag == tag && entry->line == line;++entry);
+	last = entry;
+	results->visited += (int)(last-first);
+	/*  Boundary nodes first, then glue or kern, then boxes */
+	for (i = 0;i<3;++i) {
+		count = 0;
+		for (entry = first;entry<last;++entry) {
+			if (synctex_node_type(entry->node)>=min_types[i]) {
+				++count;
+			}
+		}
+		if (count) {
+			if (NULL == (results->start = malloc(count*sizeof(synctex_node_t)))) {
+				return SYNCTEX_STATUS_ERROR;
+			}
+			results->cur = results->start;
+			for (entry = first;entry<last;++entry) {
+				if (synctex_node_type(entry->node)>=min_types[i]) {
+					*(synctex_node_t *)results->cur = entry->node;
+					results->cur += sizeof(synctex_node_t);
+				}
+			}
+			results->end = results->cur;
+			return _synctex_display_query_keep_best(results);
+		}
+	}
+	return 0;
+}
+
+static synctex_status_t _synctex_display_query_tag(synctex_scanner_t scanner,_synctex_results_t * results,int tag,int line,int column) {
 #	ifdef __DARWIN_UNIX03
 #       pragma unused(column)
 #   endif
-	int tag = synctex_scanner_get_tag(scanner,name);
 	size_t size = 0;
 	int friend_index = 0;
 	int max_line = 0;
 	synctex_node_t node = NULL;
-	if (tag == 0) {
-		printf("SyncTeX Warning: No tag for %s\n",name);
-		return -1;
+	if (synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
 	}
-	free(SYNCTEX_START);
-	SYNCTEX_CUR = SYNCTEX_END = SYNCTEX_START = NULL;
-	max_line = line < INT_MAX-scanner->number_of_lists ? line+scanner->number_of_lists:INT_MAX;
+	if (scanner->line_index) {
+		return _synctex_display_query_indexed(scanner,results,tag,line);
+	}
+	max_line = line < INT_MAX-SYNCTEX_DISPLAY_LINES ? line+SYNCTEX_DISPLAY_LINES:INT_MAX;
 	while(line<max_line) {
 		/*  This loop will only be performed once for advanced viewers */
-		friend_index = (tag+line)%(scanner->number_of_lists);
+		friend_index = _synctex_friend_index(scanner,tag,line);
 		if ((node = (scanner->lists_of_friends)[friend_index])) {
 			do {
+				++results->visited;
 				if ((synctex_node_type(node)>=synctex_node_type_boundary)
 					&& (tag == SYNCTEX_TAG(node))
 						&& (line == SYNCTEX_LINE(node))) {
-					if (SYNCTEX_CUR == SYNCTEX_END) {
+					if (results->cur == results->end) {
 						size += 16;
-						SYNCTEX_END = realloc(SYNCTEX_START,size*sizeof(synctex_node_t *));
-						SYNCTEX_CUR += SYNCTEX_END - SYNCTEX_START;
-						SYNCTEX_START = SYNCTEX_END;
-						SYNCTEX_END = SYNCTEX_START + size*sizeof(synctex_node_t *);
+						results->end = realloc(results->start,size*sizeof(synctex_node_t *));
+						results->cur += results->end - results->start;
+						results->start = results->end;
+						results->end = results->start + size*sizeof(synctex_node_t *);
 					}			
-					*(synctex_node_t *)SYNCTEX_CUR = node;
-					SYNCTEX_CUR += sizeof(synctex_node_t);
+					*(synctex_node_t *)results->cur = node;
+					results->cur += sizeof(synctex_node_t);
 				}
 			} while ((node = SYNCTEX_FRIEND(node)));
-			if (SYNCTEX_START == NULL) {
+			if (results->start == NULL) {
 				/*  We did not find any matching boundary, retry with glue or kern */
 				node = (scanner->lists_of_friends)[friend_index];/*  no need to test it again, already done */
 				do {
+					++results->visited;
 					if ((synctex_node_type(node)>=synctex_node_type_kern)
 						&& (tag == SYNCTEX_TAG(node))
 							&& (line == SYNCTEX_LINE(node))) {
-						if (SYNCTEX_CUR == SYNCTEX_END) {
+						if (results->cur == results->end) {
 							size += 16;
-							SYNCTEX_END = realloc(SYNCTEX_START,size*sizeof(synctex_node_t *));
-							SYNCTEX_CUR += SYNCTEX_END - SYNCTEX_START;
-							SYNCTEX_START = SYNCTEX_END;
-							SYNCTEX_END = SYNCTEX_START + size*sizeof(synctex_node_t *);
+							results->end = realloc(results->start,size*sizeof(synctex_node_t *));
+							results->cur += results->end - results->start;
+							results->start = results->end;
+							results->end = results->start + size*sizeof(synctex_node_t *);
 						}			
-						*(synctex_node_t *)SYNCTEX_CUR = node;
-						SYNCTEX_CUR += sizeof(synctex_node_t);
+						*(synctex_node_t *)results->cur = node;
+						results->cur += sizeof(synctex_node_t);
 					}
 				} while ((node = SYNCTEX_FRIEND(node)));
-				if (SYNCTEX_START == NULL) {
+				if (results->start == NULL) {
 					/*  We did not find any matching glue or kern, retry with boxes */
 					node = (scanner->lists_of_friends)[friend_index];/*  no need to test it again, already done */
 					do {
+						++results->visited;
 						if ((tag == SYNCTEX_TAG(node))
 								&& (line == SYNCTEX_LINE(node))) {
-							if (SYNCTEX_CUR == SYNCTEX_END) {
+							if (results->cur == results->end) {
 								size += 16;
-								SYNCTEX_END = realloc(SYNCTEX_START,size*sizeof(synctex_node_t *));
-								SYNCTEX_CUR += SYNCTEX_END - SYNCTEX_START;
-								SYNCTEX_START = SYNCTEX_END;
-								SYNCTEX_END = SYNCTEX_START + size*sizeof(synctex_node_t *);
+								results->end = realloc(results->start,size*sizeof(synctex_node_t *));
+								results->cur += results->end - results->start;
+								results->start = results->end;
+								results->end = results->start + size*sizeof(synctex_node_t *);
 							}			
-							*(synctex_node_t *)SYNCTEX_CUR = node;
-							SYNCTEX_CUR += sizeof(synctex_node_t);
+							*(synctex_node_t *)results->cur = node;
+							results->cur += sizeof(synctex_node_t);
 						}
 					} while((node = SYNCTEX_FRIEND(node)));
 				}
 			}
-			SYNCTEX_END = SYNCTEX_CUR;
-			/*  Now reverse the order to have nodes in display order, and then keep just a few nodes.
-             *  Order first the best node. */
-			if ((SYNCTEX_START) && (SYNCTEX_END)) {
-                unsigned int best_match = -1;
-                unsigned int next_match = -1;
-                unsigned int best_weight = 0;
-                synctex_node_t * best_ref   = NULL;
-				synctex_node_t * start_ref = (synctex_node_t *)SYNCTEX_START;
-				synctex_node_t * end_ref   = (synctex_node_t *)SYNCTEX_END;
+			results->end = results->cur;
+			/*  Now reverse the order to have nodes in display order, and then keep just a few nodes. */
+			if ((results->start) && (results->end)) {
+				synctex_node_t * start_ref = (synctex_node_t *)results->start;
+				synctex_node_t * end_ref   = (synctex_node_t *)results->end;
 				--end_ref;
 				while (start_ref < end_ref) {
 					node = *start_ref;
@@ -3515,56 +5537,10 @@ synctex_status_t synctex_display_query(synctex_scanner_t scanner,const char * na
 					++start_ref;
 					--end_ref;
 				}
-                /*  Now reorder the nodes to put first the one which fits best.
-                 *  The idea is to walk along the list of nodes and pick up the first one
-                 *  which line info is exactly the mean line of its parent, or at least very close.
-                 *  Then we choose among all such node the one with the maximum number of child nodes.
-                 *  Then we switch with the first node.
-                 */
-                best_ref = start_ref = (synctex_node_t *)SYNCTEX_START;
-                node = *start_ref;
-                best_match = abs(SYNCTEX_LINE(node)-SYNCTEX_MEAN_LINE(SYNCTEX_PARENT(node)));
-                end_ref = (synctex_node_t *)SYNCTEX_END;
-				while (++start_ref<end_ref) {
-                    synctex_node_t parent = NULL;
-					node = *start_ref;
-                    parent = SYNCTEX_PARENT(node);
-                    next_match = abs(SYNCTEX_LINE(node)-SYNCTEX_MEAN_LINE(parent));
-                    if (next_match < best_match
-                            || (next_match == best_match && SYNCTEX_NODE_WEIGHT(parent)>best_weight)) {
-                        best_match = next_match;
-                        best_ref = start_ref;
-                        best_weight = SYNCTEX_NODE_WEIGHT(parent);
-                    }
-				}
-                node = *best_ref;
-                *best_ref = *(synctex_node_t *)SYNCTEX_START;
-                *(synctex_node_t *)SYNCTEX_START = node;
-				/*  Basically, we keep the first node for each parent.
-				 *  More precisely, we keep only nodes that are not children of
-				 *  their predecessor's parent. */
-				start_ref = (synctex_node_t *)SYNCTEX_START;
-				end_ref   = (synctex_node_t *)SYNCTEX_START;
-next_end:
-				end_ref += 1; /*  we allways have start_ref<= end_ref*/
-				if (end_ref < (synctex_node_t *)SYNCTEX_END) {
-					node = *end_ref;
-					while ((node = SYNCTEX_PARENT(node))) {
-						if (SYNCTEX_PARENT(*start_ref) == node) {
-							goto next_end;
-						}
-					}
-					start_ref += 1;
-					*start_ref = *end_ref;
-					goto next_end;
-				}
-				start_ref += 1;
-                SYNCTEX_END = (char *)start_ref;
-                SYNCTEX_CUR = NULL;// added on behalf of Jose Alliste
-				return (SYNCTEX_END-SYNCTEX_START)/sizeof(synctex_node_t);// added on behalf Jan Sundermeyer
+				return _synctex_display_query_keep_best(results);
             }
-			SYNCTEX_CUR = NULL;
-			// return (SYNCTEX_END-SYNCTEX_START)/sizeof(synctex_node_t); removed on behalf Jan Sundermeyer
+			results->cur = NULL;
+			// return (results->end-results->start)/sizeof(synctex_node_t); removed on behalf Jan Sundermeyer
 		}
 #       if defined(__SYNCTEX_STRONG_DISPLAY_QUERY__)
 		break;
@@ -3575,6 +5551,246 @@ next_end:
 	return 0;
 }
 
+static synctex_status_t _synctex_display_query(synctex_scanner_t scanner,_synctex_results_t * results,const char * name,int line,int column) {
+	int tag = synctex_scanner_get_tag(scanner,name);
+	if (tag == 0) {
+		printf("SyncTeX Warning: No tag for %s\n",name);
+		return -1;
+	}
+	return _synctex_display_query_tag(scanner,results,tag,line,column);
+}
+
+/*  Copies the results as node table indices into buffer, as many as it can hold, then frees them. */
+static synctex_status_t _synctex_results_export(synctex_scanner_t scanner,_synctex_results_t * results,synctex_status_t status,char * buffer,size_t size) {
+	int * indices = (int *)buffer;
+	size_t i = 0, capacity = size/sizeof(int);
+	for (i = 0;status>0 && i<(size_t)status && i<capacity;++i) {
+		indices[i] = _synctex_scanner_node_index(scanner,((synctex_node_t *)results->start)[i]);
+	}
+	free(results->start);
+	return status;
+}
+
+/*  The reentrant queries need the node table to return indices, building it is the only change of the scanner. */
+static synctex_status_t _synctex_results_check(synctex_scanner_t scanner,char * buffer,size_t size) {
+	if (_synctex_scanner_make_node_table(scanner)<SYNCTEX_STATUS_OK) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (size && (NULL == buffer || ((size_t)buffer)%sizeof(int))) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	return SYNCTEX_STATUS_OK;
+}
+
+synctex_status_t synctex_display_query(synctex_scanner_t scanner,const char * name,int line,int column) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_display_query(scanner,&results,name,line,column);
+	_synctex_stats_query(scanner,synctex_stat_display_queries,&results,start);
+	if (scanner) {
+		_synctex_scanner_keep_results(scanner,&results);
+	}
+	return status;
+}
+
+synctex_status_t synctex_display_query_r(synctex_scanner_t scanner,const char * name,int line,int column,char * buffer,size_t size) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_results_check(scanner,buffer,size);
+	if (status<SYNCTEX_STATUS_OK) {
+		return status;
+	}
+	status = _synctex_display_query(scanner,&results,name,line,column);
+	if (status<=0 || (size_t)status<=size/sizeof(int)) {
+		/*  Results not fitting in buffer are counted when the caller repeats the query. */
+		_synctex_stats_query(scanner,synctex_stat_display_queries,&results,start);
+	}
+	return _synctex_results_export(scanner,&results,status,buffer,size);
+}
+
+synctex_status_t synctex_display_query_tag_r(synctex_scanner_t scanner,int tag,int line,int column,char * buffer,size_t size) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_results_check(scanner,buffer,size);
+	if (status<SYNCTEX_STATUS_OK) {
+		return status;
+	}
+	status = _synctex_display_query_tag(scanner,&results,tag,line,column);
+	if (status<=0 || (size_t)status<=size/sizeof(int)) {
+		/*  Results not fitting in buffer are counted when the caller repeats the query. */
+		_synctex_stats_query(scanner,synctex_stat_display_queries,&results,start);
+	}
+	return _synctex_results_export(scanner,&results,status,buffer,size);
+}
+
+/*  The rows of synctex_display_range, an int page followed by a float rectangle: 4 bytes items like exported records. */
+typedef struct {
+	int page;
+	float rectangle[4];
+} _synctex_page_rectangle_t;
+
+typedef struct {
+	_synctex_page_rectangle_t * rows;
+	int count;
+	int capacity;
+	float scale;
+	int visited;
+} _synctex_range_t;
+
+/*  Merges the rectangle of the box of the given node, as exported by synctex_scanner_export_nodes,
+ *  into the rectangle of its page. Rows are kept sorted by page, pages mostly come in order. */
+static synctex_status_t _synctex_range_add(_synctex_range_t * range, synctex_node_t node) {
+	synctex_node_t box = _synctex_export_box(node);
+	_synctex_page_rectangle_t * row = NULL;
+	float rectangle[4];
+	int page = synctex_node_page(node), i = range->count;
+	_synctex_node_rectangle(box?box:node,range->scale,rectangle);
+	while (i>0 && range->rows[i-1].page>page) {
+		--i;
+	}
+	if (i>0 && range->rows[i-1].page == page) {
+		row = range->rows+i-1;
+		row->rectangle[0] = rectangle[0]<row->rectangle[0]?rectangle[0]:row->rectangle[0];
+		row->rectangle[1] = rectangle[1]<row->rectangle[1]?rectangle[1]:row->rectangle[1];
+		row->rectangle[2] = rectangle[2]>row->rectangle[2]?rectangle[2]:row->rectangle[2];
+		row->rectangle[3] = rectangle[3]>row->rectangle[3]?rectangle[3]:row->rectangle[3];
+		return SYNCTEX_STATUS_OK;
+	}
+	if (range->count == range->capacity) {
+		int capacity = range->capacity?2*range->capacity:16;
+		if (NULL == (row = (_synctex_page_rectangle_t *)realloc(range->rows,capacity*sizeof(_synctex_page_rectangle_t)))) {
+			_synctex_error("malloc error");
+			return SYNCTEX_STATUS_ERROR;
+		}
+		range->rows = row;
+		range->capacity = capacity;
+	}
+	memmove(range->rows+i+1,range->rows+i,(range->count-i)*sizeof(_synctex_page_rectangle_t));
+	range->rows[i].page = page;
+	memcpy(range->rows[i].rectangle,rectangle,sizeof(rectangle));
+	range->count += 1;
+	return SYNCTEX_STATUS_OK;
+}
+
+/*  The kinds of nodes display queries fall back to when a line has none of the previous kind:
+ *  boundaries first, then glues, kerns or math nodes, then boxes. */
+static int _synctex_display_level(synctex_node_t node) {
+	if (synctex_node_type(node)>=synctex_node_type_boundary) {
+		return 0;
+	}
+	return synctex_node_type(node)>=synctex_node_type_kern?1:2;
+}
+
+/*  Adds the nodes of the given lines to the range, the ones a display query of each line would find.
+ *  The line index is walked from the first line on, otherwise the friend list of each line is browsed. */
+static synctex_status_t _synctex_range_add_lines(synctex_scanner_t scanner,_synctex_range_t * range,int tag,int first_line,int last_line) {
+	synctex_node_t node = NULL, list = NULL;
+	int line = 0, level = 0;
+	if (scanner->line_index) {
+		_synctex_line_entry_t * first = scanner->line_index;
+		_synctex_line_entry_t * last = scanner->line_index+scanner->line_index_size;
+		_synctex_line_entry_t * entry = NULL, * end = last;
+		while (first<last) {
+			entry = first+(last-first)/2;
+			if (entry->tag<tag || (entry->tag == tag && entry->line<first_line)) {
+				first = entry+1;
+			} else {
+				last = entry;
+			}
+		}
+		while (first<end && first->tag == tag && first->line <= last_line) {
+			level = 2;
+			for (last = first;last<end && last->tag == tag && last->line == first->line;++last) {
+				if (_synctex_display_level(last->node)<level) {
+					level = _synctex_display_level(last->node);
+				}
+			}
+			range->visited += (int)(last-first);
+			for (entry = first;entry<last;++entry) {
+				if (_synctex_display_level(entry->node)<=level && _synctex_range_add(range,entry->node)<SYNCTEX_STATUS_OK) {
+					return SYNCTEX_STATUS_ERROR;
+				}
+			}
+			first = last;
+		}
+		return SYNCTEX_STATUS_OK;
+	}
+	if (last_line-(long long)first_line > scanner->number_of_lists) {
+		/*  Long ranges end at the last line with nodes, found in about the time of browsing as many lines as lists */
+		for (line = level = 0;line<scanner->number_of_lists;++line) {
+			for (node = scanner->lists_of_friends[line];node;node = SYNCTEX_FRIEND(node)) {
+				if (tag == SYNCTEX_TAG(node) && SYNCTEX_LINE(node)>level) {
+					level = SYNCTEX_LINE(node);
+				}
+			}
+		}
+		last_line = level<last_line?level:last_line;
+	}
+	for (line = first_line;line <= last_line;++line) {
+		level = 3;
+		list = scanner->lists_of_friends[_synctex_friend_index(scanner,tag,line)];
+		for (node = list;node;node = SYNCTEX_FRIEND(node)) {
+			++range->visited;
+			if (tag == SYNCTEX_TAG(node) && line == SYNCTEX_LINE(node) && _synctex_display_level(node)<level) {
+				level = _synctex_display_level(node);
+			}
+		}
+		for (node = level<3?list:NULL;node;node = SYNCTEX_FRIEND(node)) {
+			if (tag == SYNCTEX_TAG(node) && line == SYNCTEX_LINE(node) && _synctex_display_level(node)<=level
+					&& _synctex_range_add(range,node)<SYNCTEX_STATUS_OK) {
+				return SYNCTEX_STATUS_ERROR;
+			}
+		}
+		if (line == INT_MAX) {
+			break;
+		}
+	}
+	return SYNCTEX_STATUS_OK;
+}
+
+synctex_status_t synctex_display_range(synctex_scanner_t scanner,const char * name,int first_line,int last_line,float scale,char * buffer,size_t size) {
+	_synctex_range_t range = {NULL,0,0,scale,0};
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = SYNCTEX_STATUS_OK;
+	int tag = 0, i = 0;
+	if (NULL == scanner || first_line > last_line || (size && (NULL == buffer || ((size_t)buffer)%sizeof(int)))) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	if (0 == (tag = synctex_scanner_get_tag(scanner,name))) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (synctex_scanner_parse_sheets(scanner)<SYNCTEX_STATUS_OK || 0 >= scanner->unit) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	status = _synctex_range_add_lines(scanner,&range,tag,first_line,last_line);
+	if (SYNCTEX_STATUS_OK == status && 0 == range.count) {
+		/*  No line of the range has nodes, the range gets the ones of the next line with nodes */
+		status = _synctex_display_query_tag(scanner,&results,tag,first_line,0);
+		for (i = 0;status>0 && i<(int)status;++i) {
+			if (_synctex_range_add(&range,((synctex_node_t *)results.start)[i])<SYNCTEX_STATUS_OK) {
+				status = SYNCTEX_STATUS_ERROR;
+			}
+		}
+		range.visited += results.visited;
+		free(results.start);
+	}
+	if (status>=0) {
+		status = range.count;
+		for (i = 0;i<range.count && (size_t)(i+1)*sizeof(_synctex_page_rectangle_t)<=size;++i) {
+			((int *)buffer)[5*i] = range.rows[i].page;
+			memcpy((float *)buffer+5*i+1,range.rows[i].rectangle,4*sizeof(float));
+		}
+		if (status<=0 || (size_t)status*sizeof(_synctex_page_rectangle_t)<=size) {
+			/*  Results not fitting in buffer are counted when the caller repeats the query. */
+			results.visited = range.visited;
+			_synctex_stats_query(scanner,synctex_stat_display_queries,&results,start);
+		}
+	}
+	free(range.rows);
+	return status;
+}
+
 synctex_node_t synctex_next_result(synctex_scanner_t scanner) {
 	if (NULL == SYNCTEX_CUR) {
 		SYNCTEX_CUR = SYNCTEX_START;
@@ -3641,29 +5857,23 @@ SYNCTEX_INLINE static synctex_node_t _synctex_eq_closest_child(synctex_point_t h
 #define SYNCTEX_MASK_LEFT 1
 #define SYNCTEX_MASK_RIGHT 2
 
-synctex_status_t synctex_edit_query(synctex_scanner_t scanner,int page,float h,float v) {
+/*  Stores in results the result of an edit query,
+ *  given the smallest horizontal box containing the hit point. */
+static synctex_status_t _synctex_edit_query_container(_synctex_results_t * results, synctex_point_t hitPoint, synctex_node_t node);
+
+static synctex_status_t _synctex_edit_query(synctex_scanner_t scanner,_synctex_results_t * results,int page,float h,float v) {
 	synctex_node_t sheet = NULL;
 	synctex_node_t node = NULL; /*  placeholder */
 	synctex_node_t other_node = NULL; /*  placeholder */
 	synctex_point_t hitPoint = {0,0}; /*  placeholder */
-	synctex_node_set_t bestNodes = {NULL,NULL}; /*  holds the best node */
-	synctex_distances_t bestDistances = {INT_MAX,INT_MAX}; /*  holds the best distances for the best node */
-	synctex_node_t bestContainer = NULL; /*  placeholder */
 	if (NULL == (scanner = synctex_scanner_parse(scanner)) || 0 >= scanner->unit) {/*  scanner->unit must be >0 */
 		return 0;
 	}
 	/*  Convert the given point to scanner integer coordinates */
 	hitPoint.h = (h-scanner->x_offset)/scanner->unit;
 	hitPoint.v = (v-scanner->y_offset)/scanner->unit;
-	/*  We will store in the scanner's buffer the result of the query. */
-	free(SYNCTEX_START);
-	SYNCTEX_START = SYNCTEX_END = SYNCTEX_CUR = NULL;
-	/*  Find the proper sheet */
-	sheet = scanner->sheet;
-	while((sheet) && SYNCTEX_PAGE(sheet) != page) {
-		sheet = SYNCTEX_SIBLING(sheet);
-	}
-	if (NULL == sheet) {
+	/*  Find the proper sheet, parsing it if needed */
+	if (NULL == (sheet = synctex_sheet(scanner,page))) {
 		return -1;
 	}
 	/*  Now sheet points to the sheet node with proper page number */
@@ -3674,58 +5884,20 @@ synctex_status_t synctex_edit_query(synctex_scanner_t scanner,int page,float h,f
 	 *  We browse all the horizontal boxes until we find one containing the hit point. */
 	if ((node = SYNCTEX_NEXT_hbox(sheet))) {
 		do {
+			++results->visited;
 			if (_synctex_point_in_box(hitPoint,node,synctex_YES)) {
 				/*  Maybe the hitPoint belongs to a contained vertical box. */
 end:
 				/*  This trick is for catching overlapping boxes */
 				if ((other_node = SYNCTEX_NEXT_hbox(node))) {
 					do {
+						++results->visited;
 						if (_synctex_point_in_box(hitPoint,other_node,synctex_YES)) {
 							node = _synctex_smallest_container(other_node,node); 
 						}
 					} while((other_node = SYNCTEX_NEXT_hbox(other_node)));
 				}
-                /*  node is the smallest horizontal box that contains hitPoint. */
-				if ((bestContainer = _synctex_eq_deepest_container(hitPoint,node,synctex_YES))) {
-					node = bestContainer;
-				}
-				_synctex_eq_get_closest_children_in_box(hitPoint,node,&bestNodes,&bestDistances,synctex_YES);
-				if (bestNodes.right && bestNodes.left) {
-					if ((SYNCTEX_TAG(bestNodes.right)!=SYNCTEX_TAG(bestNodes.left))
-							|| (SYNCTEX_LINE(bestNodes.right)!=SYNCTEX_LINE(bestNodes.left))
-								|| (SYNCTEX_COLUMN(bestNodes.right)!=SYNCTEX_COLUMN(bestNodes.left))) {
-						if ((SYNCTEX_START = malloc(2*sizeof(synctex_node_t)))) {
-							if (bestDistances.left>bestDistances.right) {
-								((synctex_node_t *)SYNCTEX_START)[0] = bestNodes.right;
-								((synctex_node_t *)SYNCTEX_START)[1] = bestNodes.left;
-							} else {
-								((synctex_node_t *)SYNCTEX_START)[0] = bestNodes.left;
-								((synctex_node_t *)SYNCTEX_START)[1] = bestNodes.right;
-							}
-							SYNCTEX_END = SYNCTEX_START + 2*sizeof(synctex_node_t);
-							SYNCTEX_CUR = NULL;
-							return (SYNCTEX_END-SYNCTEX_START)/sizeof(synctex_node_t);
-						}
-						return SYNCTEX_STATUS_ERROR;
-					}
-					/*  both nodes have the same input coordinates
-					 *  We choose the one closest to the hit point  */
-					if (bestDistances.left>bestDistances.right) {
-						bestNodes.left = bestNodes.right;
-					}
-					bestNodes.right = NULL;
-				} else if (bestNodes.right) {
-					bestNodes.left = bestNodes.right;
-				} else if (!bestNodes.left){
-					bestNodes.left = node;
-				}
-				if ((SYNCTEX_START = malloc(sizeof(synctex_node_t)))) {
-					* (synctex_node_t *)SYNCTEX_START = bestNodes.left;
-					SYNCTEX_END = SYNCTEX_START + sizeof(synctex_node_t);
-					SYNCTEX_CUR = NULL;
-					return (SYNCTEX_END-SYNCTEX_START)/sizeof(synctex_node_t);
-				}
-				return SYNCTEX_STATUS_ERROR;
+				return _synctex_edit_query_container(results,hitPoint,node);
 			}
 		} while ((node = SYNCTEX_NEXT_hbox(node)));
 		/*  All the horizontal boxes have been tested,
@@ -3738,6 +5910,132 @@ end:
 	}
 	return 0;
 }
+static synctex_status_t _synctex_edit_query_in_box(synctex_scanner_t scanner,_synctex_results_t * results,synctex_node_t box,float h,float v) {
+	synctex_point_t hitPoint = {0,0}; /*  placeholder */
+	if (NULL == (scanner = synctex_scanner_parse(scanner)) || 0 >= scanner->unit) {/*  scanner->unit must be >0 */
+		return 0;
+	}
+	hitPoint.h = (h-scanner->x_offset)/scanner->unit;
+	hitPoint.v = (v-scanner->y_offset)/scanner->unit;
+	if (NULL == box || box->class->scanner != scanner) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	return _synctex_edit_query_container(results,hitPoint,box);
+}
+synctex_status_t synctex_edit_query(synctex_scanner_t scanner,int page,float h,float v) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_edit_query(scanner,&results,page,h,v);
+	_synctex_stats_query(scanner,synctex_stat_edit_queries,&results,start);
+	if (scanner) {
+		_synctex_scanner_keep_results(scanner,&results);
+	}
+	return status;
+}
+synctex_status_t synctex_edit_query_in_box(synctex_scanner_t scanner,synctex_node_t box,float h,float v) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_edit_query_in_box(scanner,&results,box,h,v);
+	_synctex_stats_query(scanner,synctex_stat_edit_queries,&results,start);
+	if (scanner) {
+		_synctex_scanner_keep_results(scanner,&results);
+	}
+	return status;
+}
+synctex_status_t synctex_edit_query_r(synctex_scanner_t scanner,int page,float h,float v,char * buffer,size_t size) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_results_check(scanner,buffer,size);
+	if (status<SYNCTEX_STATUS_OK) {
+		return status;
+	}
+	status = _synctex_edit_query(scanner,&results,page,h,v);
+	if (status<=0 || (size_t)status<=size/sizeof(int)) {
+		/*  Results not fitting in buffer are counted when the caller repeats the query. */
+		_synctex_stats_query(scanner,synctex_stat_edit_queries,&results,start);
+	}
+	return _synctex_results_export(scanner,&results,status,buffer,size);
+}
+synctex_status_t synctex_edit_query_in_box_r(synctex_scanner_t scanner,synctex_node_t box,float h,float v,char * buffer,size_t size) {
+	_synctex_results_t results = {NULL,NULL,NULL,0};
+	unsigned long long start = _synctex_stats_start(scanner);
+	synctex_status_t status = _synctex_results_check(scanner,buffer,size);
+	if (status<SYNCTEX_STATUS_OK) {
+		return status;
+	}
+	status = _synctex_edit_query_in_box(scanner,&results,box,h,v);
+	if (status<=0 || (size_t)status<=size/sizeof(int)) {
+		/*  Results not fitting in buffer are counted when the caller repeats the query. */
+		_synctex_stats_query(scanner,synctex_stat_edit_queries,&results,start);
+	}
+	return _synctex_results_export(scanner,&results,status,buffer,size);
+}
+synctex_status_t synctex_scanner_hit_points(synctex_scanner_t scanner, char * buffer, size_t size) {
+	float * points = (float *)buffer;
+	int * hitPoints = (int *)buffer;
+	size_t i = 0, n = size/sizeof(float);
+	if (NULL == (scanner = synctex_scanner_parse(scanner)) || 0 >= scanner->unit) {
+		return SYNCTEX_STATUS_ERROR;
+	}
+	if (NULL == buffer || ((size_t)buffer)%sizeof(float) || n%2) {
+		return SYNCTEX_STATUS_BAD_ARGUMENT;
+	}
+	for (i = 0;i<n;i+=2) {
+		/*  Same conversion as in the queries */
+		synctex_point_t hitPoint;
+		hitPoint.h = (points[i]-scanner->x_offset)/scanner->unit;
+		hitPoint.v = (points[i+1]-scanner->y_offset)/scanner->unit;
+		hitPoints[i] = hitPoint.h;
+		hitPoints[i+1] = hitPoint.v;
+	}
+	return n/2;
+}
+static synctex_status_t _synctex_edit_query_container(_synctex_results_t * results, synctex_point_t hitPoint, synctex_node_t node) {
+	synctex_node_set_t bestNodes = {NULL,NULL}; /*  holds the best node */
+	synctex_distances_t bestDistances = {INT_MAX,INT_MAX}; /*  holds the best distances for the best node */
+	synctex_node_t bestContainer = NULL; /*  placeholder */
+	/*  node is the smallest horizontal box that contains hitPoint. */
+	if ((bestContainer = _synctex_eq_deepest_container(hitPoint,node,synctex_YES))) {
+		node = bestContainer;
+	}
+	_synctex_eq_get_closest_children_in_box(hitPoint,node,&bestNodes,&bestDistances,synctex_YES);
+	if (bestNodes.right && bestNodes.left) {
+		if ((SYNCTEX_TAG(bestNodes.right)!=SYNCTEX_TAG(bestNodes.left))
+				|| (SYNCTEX_LINE(bestNodes.right)!=SYNCTEX_LINE(bestNodes.left))
+					|| (SYNCTEX_COLUMN(bestNodes.right)!=SYNCTEX_COLUMN(bestNodes.left))) {
+			if ((results->start = malloc(2*sizeof(synctex_node_t)))) {
+				if (bestDistances.left>bestDistances.right) {
+					((synctex_node_t *)results->start)[0] = bestNodes.right;
+					((synctex_node_t *)results->start)[1] = bestNodes.left;
+				} else {
+					((synctex_node_t *)results->start)[0] = bestNodes.left;
+					((synctex_node_t *)results->start)[1] = bestNodes.right;
+				}
+				results->end = results->start + 2*sizeof(synctex_node_t);
+				results->cur = NULL;
+				return (results->end-results->start)/sizeof(synctex_node_t);
+			}
+			return SYNCTEX_STATUS_ERROR;
+		}
+		/*  both nodes have the same input coordinates
+		 *  We choose the one closest to the hit point  */
+		if (bestDistances.left>bestDistances.right) {
+			bestNodes.left = bestNodes.right;
+		}
+		bestNodes.right = NULL;
+	} else if (bestNodes.right) {
+		bestNodes.left = bestNodes.right;
+	} else if (!bestNodes.left){
+		bestNodes.left = node;
+	}
+	if ((results->start = malloc(sizeof(synctex_node_t)))) {
+		* (synctex_node_t *)results->start = bestNodes.left;
+		results->end = results->start + sizeof(synctex_node_t);
+		results->cur = NULL;
+		return (results->end-results->start)/sizeof(synctex_node_t);
+	}
+	return SYNCTEX_STATUS_ERROR;
+}
 
 #	ifdef SYNCTEX_NOTHING
 #       pragma mark -
@@ -4329,7 +6627,7 @@ synctex_updater_t synctex_updater_new_with_output_file(const char * output, cons
 	synctex_io_mode_t io_mode = 0;
 	const char * mode = NULL;
 	/*  prepare the updater, the memory is the only one dynamically allocated */
-	updater = (synctex_updater_t)_synctex_malloc(sizeof(synctex_updater_t));
+	updater = (synctex_updater_t)_synctex_malloc(sizeof(_synctex_updater_t));
 	if (NULL == updater) {
 		_synctex_error("!  synctex_updater_new_with_file: malloc problem");
 		return NULL;
@@ -4361,7 +6659,6 @@ no_write_error:
 		}
 		updater->fprintf = (synctex_fprintf_t)(&gzprintf);
 	}
-	printf("SyncTeX: updating %s...",synctex);
 	free(synctex);
 	return updater;
 }
@@ -4407,6 +6704,5 @@ void synctex_updater_free(synctex_updater_t updater){
 		gzclose((gzFile)SYNCTEX_FILE);
 	}
 	free(updater);
-	printf("... done.\n");
 	return;
 }
@@ -55,6 +55,8 @@ Thu Jun 19 09:39:21 UTC 2008
 #ifndef __SYNCTEX_PARSER__
 #   define __SYNCTEX_PARSER__
 
+#include <stddef.h>
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -102,6 +104,15 @@ typedef _synctex_scanner_t *  synctex_scanner_t;
  */
 synctex_scanner_t synctex_scanner_new_with_output_file(const char * output, const char * build_directory, int parse);
 
+/*  This is the constructor for synctex contents already in memory, gzipped or not,
+ *  for example received from the network. No file is opened.
+ *  The contents are parsed before the function returns, the caller keeps owning them.
+ *  "output" is the name of the output file the contents come from, it only helps resolving
+ *  relative input names in synctex_scanner_get_tag, it can be nil.
+ *  NULL is returned in case of an error, in particular if the contents can't be parsed.
+ */
+synctex_scanner_t synctex_scanner_new_with_data(const char * output, const char * data, size_t size);
+
 /*  This is the designated method to delete a synctex scanner object.
  *  Frees all the memory, you must call it when you are finished with the scanner.
  */
@@ -169,6 +180,59 @@ synctex_status_t synctex_display_query(synctex_scanner_t scanner,const char *  n
 synctex_status_t synctex_edit_query(synctex_scanner_t scanner,int page,float h,float v);
 synctex_node_t synctex_next_result(synctex_scanner_t scanner);
 
+/*  synctex_display_query browses the friend lists of the scanner,
+ *  once for each line following the given one until a line with nodes is found.
+ *  With synctex_scanner_index_lines, the friend nodes are indexed once for all
+ *  by tag and line, such that the next line with nodes is found by binary search.
+ *  Subsequent display queries use the index, with the very same results.
+ *  Returns the number of indexed nodes, or a negative value in case of error.
+ */
+synctex_status_t synctex_scanner_index_lines(synctex_scanner_t scanner);
+
+/*  synctex_edit_query first looks for the smallest horizontal box containing the hit point,
+ *  browsing all the horizontal boxes of the page.
+ *  Clients maintaining their own spatial index of the boxes can skip this step with
+ *  synctex_edit_query_in_box, given that smallest box, or the first child of the sheet
+ *  when no horizontal box contains the hit point. Results are then retrieved with synctex_next_result.
+ *  The hit point used by both functions is obtained from h and v like in synctex_scanner_hit_points:
+ *  this function converts in place pairs of float page coordinates (h,v) into pairs of int TeX coordinates.
+ *  It returns the number of converted points, or a negative value in case of error.
+ */
+synctex_status_t synctex_edit_query_in_box(synctex_scanner_t scanner,synctex_node_t box,float h,float v);
+synctex_status_t synctex_scanner_hit_points(synctex_scanner_t scanner, char * buffer, size_t size);
+
+/*  The queries above store their results in the scanner, such that one scanner can't serve concurrent queries.
+ *  The reentrant versions below store their results in the given buffer instead, as int indices of the
+ *  resulting nodes in the node table (see synctex_scanner_node), and leave the scanner untouched.
+ *  They return the number of results, which may exceed the number of indices the buffer can hold,
+ *  or a negative value in case of error. The buffer must be int aligned, it may be NULL when size is 0.
+ *  The node table is built by the first call, if needed: parse the scanner and call synctex_scanner_node_count
+ *  (and synctex_scanner_index_lines, if wanted) before sharing the scanner between threads.
+ */
+synctex_status_t synctex_display_query_r(synctex_scanner_t scanner,const char *  name,int line,int column, char * buffer, size_t size);
+synctex_status_t synctex_edit_query_r(synctex_scanner_t scanner,int page,float h,float v, char * buffer, size_t size);
+synctex_status_t synctex_edit_query_in_box_r(synctex_scanner_t scanner,synctex_node_t box,float h,float v, char * buffer, size_t size);
+
+/*  synctex_display_query_tag_r is synctex_display_query_r given the tag of the input file instead of its name,
+ *  for clients resolving names to tags once (see synctex_scanner_get_tag). An unknown tag has no results.
+ */
+synctex_status_t synctex_display_query_tag_r(synctex_scanner_t scanner,int tag,int line,int column, char * buffer, size_t size);
+
+/*  synctex_display_range is the display query of all the lines from first_line to last_line included, at once.
+ *  Each line of the range gets the nodes a display query of that very line would get, before keeping the best ones,
+ *  and when no line of the range has nodes, the range gets the results of the display query of first_line.
+ *  The nodes are not returned: the rectangles of their boxes, as exported by synctex_scanner_export_nodes
+ *  (the node itself if it has no box), are merged into one bounding rectangle per page.
+ *  Rectangles are in page coordinates multiplied by scale, see synctex_scanner_rectangles.
+ *  The buffer is filled with rows of 5 items in page order: the int page, then left, top, right and bottom floats.
+ *  Returns the number of pages, which may exceed the number of rows the buffer can hold, or a negative value
+ *  in case of error. The buffer must be int aligned, it may be NULL when size is 0.
+ *  Lines are found like display queries do, with the line index if built (see synctex_scanner_index_lines):
+ *  without it, the friend list of every line of the range is browsed.
+ *  Like the reentrant queries, it leaves the scanner untouched once its sheets are parsed.
+ */
+synctex_status_t synctex_display_range(synctex_scanner_t scanner,const char *  name,int first_line,int last_line,float scale, char * buffer, size_t size);
+
 /*  Display all the information contained in the scanner object.
  *  If the records are too numerous, only the first ones are displayed.
  *  This is mainly for informatinal purpose to help developers.
@@ -242,6 +306,72 @@ synctex_node_t synctex_node_next(synctex_node_t node);
 synctex_node_t synctex_sheet(synctex_scanner_t scanner,int page);
 synctex_node_t synctex_sheet_content(synctex_scanner_t scanner,int page);
 
+/*  Pages of the scanner. synctex_sheet, synctex_sheet_content and synctex_edit_query find the sheet
+ *  of a page in constant time, through a page table built once, on demand, after parsing.
+ *  synctex_scanner_page_count returns the number of sheets, 0 in case of error.
+ *  synctex_scanner_page returns the page of the sheet at the given 0 based index, in document order,
+ *  0 when out of range. Neither parses the content of the sheets of a lazy scanner.
+ */
+int synctex_scanner_page_count(synctex_scanner_t scanner);
+int synctex_scanner_page(synctex_scanner_t scanner, int index);
+
+/*  Like synctex_scanner_parse, but the content of each sheet is only parsed the first time it is needed.
+ *  One light pass records where each sheet starts in the synctex file, parses inputs, postamble
+ *  and post scriptum. Then synctex_sheet, synctex_sheet_content and synctex_edit_query parse
+ *  the sheet of the given page only, which is kept. Everything that needs all the nodes,
+ *  display queries, node table, line index, export and snapshot, parses the remaining sheets first.
+ *  synctex_scanner_parse_sheets does it explicitly, it returns a negative value in case of error.
+ *  synctex_scanner_unparsed_sheets returns the number of sheets not parsed yet.
+ *  The synctex file stays open until all the sheets are parsed. Until then, parsing is not
+ *  reentrant: queries on a lazy scanner must not run concurrently.
+ *  Scanners created from memory are never lazy.
+ */
+synctex_scanner_t synctex_scanner_parse_lazily(synctex_scanner_t scanner);
+synctex_status_t synctex_scanner_parse_sheets(synctex_scanner_t scanner);
+int synctex_scanner_unparsed_sheets(synctex_scanner_t scanner);
+
+/*  Re-syncs a parsed scanner with its synctex file, typically after the document was compiled again.
+ *  The sheets are compared with the previous parse using checksums of their content:
+ *  the nodes of unchanged sheets are kept as is, only new or changed sheets are parsed,
+ *  lazily when the scanner still has unparsed sheets. Inputs, preamble, postamble
+ *  and post scriptum are read again. Node table, line index and query results are rebuilt on demand.
+ *  Nodes of changed sheets obtained before are freed.
+ *  Scanners loaded from snapshots are parsed again entirely.
+ *  Returns the number of new or changed sheets, or a negative value in case of error.
+ *  Unchanged sheets which were never parsed by a lazy scanner are not counted, they stay unparsed.
+ *  When the synctex file can't be opened, the scanner is unchanged, otherwise it has no sheet anymore.
+ *  Scanners created from memory can't be refreshed.
+ */
+int synctex_scanner_refresh(synctex_scanner_t scanner);
+
+/*  Returns an estimate of the memory used by the scanner, in bytes: its nodes, its private snapshot image,
+ *  its sheet table, friend lists, node table, line index and buffers. The pages of a snapshot mapped
+ *  in place are shared, they are not counted. Input names are not counted either.
+ */
+size_t synctex_scanner_memory(synctex_scanner_t scanner);
+
+/*  How the scanner reads the contents of its synctex file, set before parsing,
+ *  typically on a scanner created with parse set to 0. It applies to refreshes too.
+ *  synctex_buffering_fixed, the default, parses the contents through a buffer of size bytes,
+ *  refilled as parsing goes, 0 meaning 32 KiB.
+ *  synctex_buffering_adaptive sizes the buffer after the inflated size of the contents,
+ *  about 1/64 of it, between 32 KiB and size bytes, 0 meaning 1 MiB.
+ *  zlib reads the file through a buffer of the same size.
+ *  synctex_buffering_bulk inflates the whole contents in memory at once before parsing them
+ *  when their inflated size is at most size bytes, 0 meaning 256 MiB, otherwise it is adaptive.
+ *  Seeking the contents is then cheap, which makes parsing the sheets of a lazy scanner
+ *  and refreshing cheaper too. The contents are kept until all the sheets are parsed.
+ *  The inflated size of gzipped contents is read from the gzip trailer, it is only known modulo 4 GiB.
+ *  Returns SYNCTEX_STATUS_BAD_ARGUMENT for an unknown buffering or a size below 16 bytes.
+ */
+typedef enum {
+	synctex_buffering_fixed = 0,
+	synctex_buffering_adaptive,
+	synctex_buffering_bulk
+} synctex_buffering_t;
+
+synctex_status_t synctex_scanner_set_buffering(synctex_scanner_t scanner, synctex_buffering_t buffering, size_t size);
+
 /*  These are the types of the synctex nodes */
 typedef enum {
 	synctex_node_type_error = 0,
@@ -263,6 +393,57 @@ typedef enum {
 synctex_node_type_t synctex_node_type(synctex_node_t node);
 const char * synctex_node_isa(synctex_node_t node);
 
+/*  Instrumentation of the parser and of the queries, disabled by default.
+ *  synctex_scanner_set_stats enables or disables the counters of the scanner, enabling resets them.
+ *  To include the initial parse, create the scanner with parse set to 0 and enable the counters first.
+ *  synctex_scanner_stats copies the counters into the given buffer, which must be aligned for
+ *  unsigned long long and hold synctex_number_of_stats of them, in the order of the enumeration below.
+ *  It returns synctex_number_of_stats, or a negative value in case of error.
+ *  Times are in nanoseconds. Reading time includes gzip inflation, parsing time includes reading time
+ *  and query times include the parsing of the sheets queries need. Visited friends are the nodes of the
+ *  friend lists (or of the line index) browsed by display queries, visited boxes are the horizontal boxes
+ *  browsed by edit queries to find the one containing the hit point. The nodes created by the parser
+ *  are counted by type, at index synctex_stat_nodes+type.
+ *  A reentrant query whose results do not fit in its buffer is not counted, callers repeat it with a larger one.
+ *  Counters are updated atomically, queries running concurrently in several threads are all counted.
+ */
+typedef enum {
+	synctex_stat_bytes_read = 0,
+	synctex_stat_read_ns,
+	synctex_stat_parse_ns,
+	synctex_stat_sheets_parsed,
+	synctex_stat_display_queries,
+	synctex_stat_display_ns,
+	synctex_stat_display_friends,
+	synctex_stat_display_friends_max,
+	synctex_stat_edit_queries,
+	synctex_stat_edit_ns,
+	synctex_stat_edit_boxes,
+	synctex_stat_edit_boxes_max,
+	synctex_stat_nodes,
+	synctex_number_of_stats = synctex_stat_nodes+synctex_node_number_of_types
+} synctex_stat_t;
+
+void synctex_scanner_set_stats(synctex_scanner_t scanner, int enabled);
+synctex_status_t synctex_scanner_stats(synctex_scanner_t scanner, char * buffer, size_t size);
+
+/*  The friend lists are the hash table of the nodes by tag and line used by display queries.
+ *  They are sized after the number of nodes once all the sheets are parsed.
+ *  synctex_scanner_friend_stats parses all the sheets and copies the figures of the table into the given buffer,
+ *  which must be aligned for int and hold synctex_number_of_friend_stats of them, in the order of the enumeration below:
+ *  the number of lists, of nodes in the lists, of non empty lists and the length of the longest list.
+ *  It returns synctex_number_of_friend_stats, or a negative value in case of error.
+ */
+typedef enum {
+	synctex_friend_stat_lists = 0,
+	synctex_friend_stat_friends,
+	synctex_friend_stat_used_lists,
+	synctex_friend_stat_longest_list,
+	synctex_number_of_friend_stats
+} synctex_friend_stat_t;
+
+synctex_status_t synctex_scanner_friend_stats(synctex_scanner_t scanner, char * buffer, size_t size);
+
 /*  This is primarily used for debugging purpose.
  *  The second one logs information for the node and recursively displays information for its next node */
 void synctex_node_log(synctex_node_t node);
@@ -333,6 +514,135 @@ float synctex_node_box_visible_width(synctex_node_t node);
 float synctex_node_box_visible_height(synctex_node_t node);
 float synctex_node_box_visible_depth(synctex_node_t node);
 
+/*  Bulk access to the nodes.
+ *  The node table lists all the nodes of the scanner in document order:
+ *  each sheet is followed by its content, depth first, each node before its children.
+ *  It is built once when first needed, the index of a node is stable during the scanner life.
+ *  synctex_scanner_node_count returns the number of nodes in the table,
+ *  synctex_scanner_node returns the node at the given 0 based index, NULL when out of range.
+ *
+ *  synctex_scanner_export fills the given buffer with the informations of all the nodes in one pass.
+ *  The buffer is organized by columns, one column of synctex_scanner_node_count(scanner) 4 bytes items
+ *  per field below, in the order of the synctex_field_t enumeration.
+ *  The fields up to synctex_field_depth_v are int values,
+ *  the visible fields are float values expressed in page coordinates.
+ *  The _v fields are the visible dimensions of boxes in TeX coordinates,
+ *  as used by synctex_edit_query: the cached visible size of horizontal boxes,
+ *  the real size of the other boxes, 0 for nodes which are not boxes.
+ *  The parent field is the index of the parent node in the table, -1 for sheets.
+ *  The informations that a node does not store (the width of a glue, the box of a sheet...)
+ *  are exported as 0, the column is always -1.
+ *  The buffer must be aligned for int and contain at least
+ *  synctex_scanner_node_count(scanner)*synctex_number_of_fields*4 bytes.
+ *  Returns the number of exported nodes, or a negative value in case of error.
+ */
+typedef enum {
+	synctex_field_type = 0,
+	synctex_field_tag,
+	synctex_field_line,
+	synctex_field_column,
+	synctex_field_page,
+	synctex_field_parent,
+	synctex_field_h,
+	synctex_field_v,
+	synctex_field_width,
+	synctex_field_height,
+	synctex_field_depth,
+	synctex_field_box_h,
+	synctex_field_box_v,
+	synctex_field_box_width,
+	synctex_field_box_height,
+	synctex_field_box_depth,
+	synctex_field_mean_line,
+	synctex_field_child_count,
+	synctex_field_horiz_v,
+	synctex_field_vert_v,
+	synctex_field_width_v,
+	synctex_field_height_v,
+	synctex_field_depth_v,
+	synctex_field_visible_h,
+	synctex_field_visible_v,
+	synctex_field_visible_width,
+	synctex_field_box_visible_h,
+	synctex_field_box_visible_v,
+	synctex_field_box_visible_width,
+	synctex_field_box_visible_height,
+	synctex_field_box_visible_depth,
+	synctex_number_of_fields
+} synctex_field_t;
+
+int synctex_scanner_node_count(synctex_scanner_t scanner);
+synctex_node_t synctex_scanner_node(synctex_scanner_t scanner, int index);
+synctex_status_t synctex_scanner_export(synctex_scanner_t scanner, char * buffer, size_t size);
+
+/*  Records of nodes: the informations of one node exported as a row
+ *  of synctex_number_of_fields 4 bytes items, in the order of the synctex_field_t enumeration,
+ *  with the same values as the ones of synctex_scanner_export.
+ *  synctex_node_export fills the given buffer with the record of the given node.
+ *  It does not build the node table: the parent field is -1 until the table is built.
+ *  Input nodes only export their type and tag.
+ *  The buffer must be aligned for int and contain at least synctex_number_of_fields*4 bytes.
+ *  Returns 1, or a negative value in case of error.
+ *  synctex_scanner_export_nodes fills the given buffer with the records of the nodes
+ *  at the given indices of the node table, one after the other. The indices are given as
+ *  an int aligned buffer of count bytes, the buffer must contain at least
+ *  count*synctex_number_of_fields bytes. Returns the number of exported records,
+ *  or a negative value in case of error.
+ */
+synctex_status_t synctex_node_export(synctex_node_t node, char * buffer, size_t size);
+int synctex_scanner_export_nodes(synctex_scanner_t scanner, const char * indices, size_t count, char * buffer, size_t size);
+
+/*  Walking the nodes in bulk, in document order, depth first: the order of the node table.
+ *  synctex_scanner_select fills the given int aligned buffer of size bytes with the indices
+ *  in the node table of the nodes matching all the given filters, starting from index start.
+ *  types is a bit mask of the accepted node types (1<<synctex_node_type_...), 0 for all of them.
+ *  The nodes are accepted when the page of their sheet is between first_page and last_page,
+ *  0 for no bound. When tag is not 0, only the nodes with that input tag are accepted, sheets excluded.
+ *  Returns the number of indices written, or a negative value in case of error.
+ *  When the buffer is full, the walk goes on from the index following the last one written.
+ *  The node table is read only, synctex_scanner_select can run concurrently with the reentrant queries.
+ */
+int synctex_scanner_select(synctex_scanner_t scanner, int start, int types, int first_page, int last_page, int tag, char * buffer, size_t size);
+
+/*  Converting coordinates in bulk, between TeX coordinates, as given by synctex_node_h and friends,
+ *  and page coordinates, as given by synctex_node_visible_h and friends, multiplied by scale.
+ *  Page coordinates are in big points (1/72 in) with origin at the top left corner of the page,
+ *  scale is zoom*dpi/72 for pixels, 1 for page coordinates.
+ *  Rectangles are 4 floats: left, top, right and bottom, in a row in the float aligned buffer of size bytes.
+ *  synctex_scanner_rectangles fills the buffer with the rectangles of the nodes at the given indices
+ *  of the node table, given as an int aligned buffer of count bytes. The rectangle of a box is its visible box,
+ *  the one used by synctex_edit_query, the other nodes get the dimensions they store:
+ *  glues and boundaries are points.
+ *  synctex_scanner_tex_to_page converts boxes given as 5 ints h, v, width, height and depth in a row,
+ *  in an int aligned buffer of count bytes, to rectangles. A box spans from v-height to v+depth.
+ *  synctex_scanner_page_to_tex converts points given as 2 floats x and y in a row,
+ *  in a float aligned buffer of count bytes, to 2 ints h and v in a row in buffer, rounded.
+ *  Returns the number of converted items, or a negative value in case of error.
+ */
+int synctex_scanner_rectangles(synctex_scanner_t scanner, const char * indices, size_t count, float scale, char * buffer, size_t size);
+int synctex_scanner_tex_to_page(synctex_scanner_t scanner, const char * boxes, size_t count, float scale, char * buffer, size_t size);
+int synctex_scanner_page_to_tex(synctex_scanner_t scanner, const char * points, size_t count, float scale, char * buffer, size_t size);
+
+/*  A snapshot is a binary image of the parsed scanner, which can be loaded much faster than
+ *  the synctex file can be parsed. synctex_scanner_snapshot returns the size of the snapshot,
+ *  and fills the given pointer aligned buffer if it is big enough, or a negative value in case of error.
+ *  synctex_scanner_load makes an unparsed scanner, created with parse set to 0, use the nodes
+ *  of the snapshot instead of parsing its synctex file. The snapshot is copied.
+ *  It returns a negative value if the snapshot does not come from the same build of the library,
+ *  in which case the scanner is left untouched.
+ *  The snapshot is trusted: no attempt is made to know whether it is up to date or not.
+ *  synctex_scanner_map does the same without copying, with a snapshot stored in the file at path
+ *  from the given page aligned offset to the end. The file is mapped privately and read-only scanners
+ *  use the nodes in place, no node is allocated. It returns SYNCTEX_STATUS_OK when the snapshot
+ *  could be mapped at the address it was made for, in which case its node pages are shared with
+ *  every process mapping the same file, and SYNCTEX_STATUS_NOT_OK when it had to be relocated,
+ *  in which case the pages are copied on write. The mapping is released by synctex_scanner_free.
+ *  The file must not be modified in place while it is mapped.
+ */
+synctex_status_t synctex_scanner_snapshot(synctex_scanner_t scanner, char * buffer, size_t size);
+synctex_status_t synctex_scanner_load(synctex_scanner_t scanner, const char * snapshot, size_t size);
+synctex_status_t synctex_scanner_map(synctex_scanner_t scanner, const char * path, size_t offset);
+
 /*  The main synctex updater object.
  *  This object is used to append information to the synctex file.
  *  Its implementation is considered private.
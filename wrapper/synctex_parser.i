@@ -1,8 +1,33 @@
 /* synctex_parser.i */
-%module synctex_parser
+%module(threads="1") synctex_parser
 %{
 /* Headers and declarations */
 #include <synctex_parser.h>
 %}
 
-%include "synctex_package/synctex_parser.h"
\ No newline at end of file
+/* Buffer protocol objects for bulk access */
+%include <pybuffer.i>
+%pybuffer_mutable_binary(char * buffer, size_t size);
+%pybuffer_binary(const char * snapshot, size_t size);
+%pybuffer_binary(const char * data, size_t size);
+%pybuffer_binary(const char * indices, size_t count);
+%pybuffer_binary(const char * boxes, size_t count);
+%pybuffer_binary(const char * points, size_t count);
+
+/* Only parsing and the reentrant queries release the GIL */
+%nothread;
+%thread synctex_scanner_new_with_output_file;
+%thread synctex_scanner_new_with_data;
+%thread synctex_scanner_parse;
+%thread synctex_scanner_parse_lazily;
+%thread synctex_scanner_refresh;
+%thread synctex_scanner_load;
+%thread synctex_scanner_map;
+%thread synctex_display_query_r;
+%thread synctex_display_query_tag_r;
+%thread synctex_display_range;
+%thread synctex_edit_query_r;
+%thread synctex_edit_query_in_box_r;
+%thread synctex_scanner_select;
+
+%include "synctex_package/synctex_parser.h"